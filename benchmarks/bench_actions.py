@@ -0,0 +1,101 @@
+"""
+Benchmark for buffering the actions of held input
+
+Holds left and soft drop with ARR 0 so actions are queued on every tick, and counts the memory blocks that queueing
+them allocates with sys.getallocatedblocks(), for the ActionBuffer of packed records against a queue of action dicts
+as the actions were buffered before. The actions are taken and decoded each tick as Four does, and what is taken is
+kept until the end so freed dicts are not reused from the freelist, which sys.getallocatedblocks() does not count.
+The blocks of a run with no keys held are taken off, leaving what the held input allocates.
+
+usage:
+    python benchmarks/bench_actions.py [--ticks N] [--held-keys N]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pygame # noqa: E402
+from config import StructConfig # noqa: E402
+from core.handling import Handling # noqa: E402
+from core.action_buffer import ACTIONS, ACTION_MASK # noqa: E402
+from core.state.struct_handling import StructHandling # noqa: E402
+
+class DictQueue():
+    """
+    Queue of an action dict for each action, dequeued in order up to the tick being performed
+    """
+    def __init__(self):
+        self.queue = deque()
+
+    def push(self, tick, action, source = None):
+        self.queue.append({'action': action, 'tick': tick})
+
+    def take(self, tick):
+        actions = []
+
+        while self.queue and self.queue[0]['tick'] <= tick:
+            actions.append(self.queue.popleft())
+
+        return actions
+
+def held_input(ticks, held_keys, dicts):
+    """
+    Run the handling with keys held, returning the blocks allocated by queueing the actions and the time taken
+    """
+    Config = StructConfig()
+    Config.HANDLING_SETTINGS['ARR'] = 0
+    HandlingStruct = StructHandling()
+    handling = Handling(Config, HandlingStruct)
+
+    if dicts:
+        handling.action_buffer = DictQueue()
+
+    for key in (pygame.K_LEFT, pygame.K_UP, pygame.K_x, pygame.K_z, pygame.K_c)[:held_keys]:
+        handling.on_key_press(key)
+
+    allocated = 0
+    actions = 0
+    taken = []
+    start = time.perf_counter()
+
+    for tick in range(ticks):
+        HandlingStruct.current_time = tick / Config.TPS
+        HandlingStruct.current_tick = tick
+
+        blocks = sys.getallocatedblocks()
+        buffer = handling.before_loop_hook()
+        allocated += sys.getallocatedblocks() - blocks
+
+        taken.append(buffer.take(tick))
+
+        if dicts:
+            actions_this_tick = [action_dict['action'] for action_dict in taken[-1]]
+        else:
+            actions_this_tick = [ACTIONS[record & ACTION_MASK] for record in taken[-1]]
+
+        actions += len(actions_this_tick)
+
+    return allocated, actions, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type = int, default = 50_000)
+    parser.add_argument('--held-keys', type = int, default = 2, help = 'number of keys held, of left, soft drop, rotate cw, rotate ccw and hold')
+    args = parser.parse_args()
+
+    TPS = StructConfig().TPS
+    print(f"{args.ticks} ticks, {args.held_keys} keys held, {TPS} TPS")
+
+    for name, dicts in (("action dicts  ", True), ("packed records", False)):
+        idle, _, _ = held_input(args.ticks, 0, dicts)
+        allocated, actions, elapsed = held_input(args.ticks, args.held_keys, dicts)
+        allocated -= idle
+        print(f"{name} {actions / args.ticks:4.1f} actions/tick {allocated * TPS / args.ticks:8.0f} blocks allocated/s {elapsed / args.ticks * 1e6:6.2f} us/tick")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark for the vectorized environment
+
+Steps a VectorEnv with random actions and reads the boards of every environment from the observation after each step,
+timing it against stepping the same games on engines directly and copying each matrix into an array with
+np.array(matrix.matrix).
+
+usage:
+    python benchmarks/bench_env.py [--envs N] [--steps N] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from instance.engine import Engine # noqa: E402
+from instance.env import VectorEnv, ACTIONS # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--envs', type = int, default = 16)
+    parser.add_argument('--steps', type = int, default = 2000)
+    parser.add_argument('--workers', type = int, default = 0)
+    args = parser.parse_args()
+
+    actions = np.random.default_rng(0).integers(0, len(ACTIONS), size = (args.steps, args.envs))
+
+    engines = [Engine(seed) for seed in range(args.envs)]
+
+    for engine in engines:
+        engine.step()
+
+    start = time.perf_counter()
+
+    for step_actions in actions:
+        for idx, (engine, action) in enumerate(zip(engines, step_actions)):
+            engine.step((ACTIONS[action],) if action else ())
+
+            if engine.FlagStruct.GAME_OVER:
+                engines[idx] = Engine(engine.seed + args.envs)
+                engines[idx].step()
+
+        boards = np.stack([np.array(engine.GameInstanceStruct.matrix.matrix, dtype = np.uint8) for engine in engines])
+
+    copied = time.perf_counter() - start
+
+    with VectorEnv(args.envs, workers = args.workers) as env:
+        observation, _ = env.reset()
+        start = time.perf_counter()
+
+        for step_actions in actions:
+            observation, rewards, terminated, truncated, _ = env.step(step_actions)
+            boards = observation['plane'] # noqa: F841
+
+        zero_copy = time.perf_counter() - start
+
+    steps = args.steps * args.envs
+    print(f"{args.envs} envs, {args.steps} steps")
+    print(f"engines + np.array(matrix.matrix) {steps / copied:8.0f} env steps/s")
+    print(f"VectorEnv workers={args.workers:<2}            {steps / zero_copy:8.0f} env steps/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for the batched board evaluator
+
+Plays a seeded game by always taking the best scored placement, timing the evaluation of every placement of each
+piece in one batch against evaluating the placements one at a time.
+
+usage:
+    python benchmarks/bench_evaluator.py [--pieces N] [--hold]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from instance.engine import Engine # noqa: E402
+from bot.evaluator import BoardEvaluator # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pieces', type = int, default = 200)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--hold', action = 'store_true')
+    args = parser.parse_args()
+
+    evaluator = BoardEvaluator()
+    engine = Engine(args.seed)
+    engine.GameInstanceStruct.gravity = 0
+    engine.GameInstanceStruct.lock_delay = 'inf'
+    engine.step()
+
+    batched = []
+    single = []
+    boards = 0
+
+    for _ in range(args.pieces):
+        placements = engine.placements(args.hold)
+
+        if not placements or engine.FlagStruct.GAME_OVER:
+            break
+
+        matrix = engine.GameInstanceStruct.matrix
+
+        start = time.perf_counter()
+        scores = evaluator.evaluate(matrix, placements)
+        batched.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for placement in placements:
+            evaluator.evaluate(matrix, [placement])
+        single.append(time.perf_counter() - start)
+
+        boards += len(placements)
+        engine.step(list(placements[int(scores.argmax())].actions))
+
+    batched.sort()
+    single.sort()
+    print(f"{len(batched)} pieces, {boards / len(batched):.1f} boards/piece")
+    print(f"batched    median {batched[len(batched) // 2] * 1e6:6.0f} us/piece")
+    print(f"one by one median {single[len(single) // 2] * 1e6:6.0f} us/piece")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark for the move generator
+
+Plays seeded games by always taking the lowest placement, timing Engine.placements() for every piece along the way.
+
+usage:
+    python benchmarks/bench_movegen.py [--games N] [--pieces N] [--hold]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from instance.engine import Engine # noqa: E402
+
+def time_game(seed:int, pieces:int, hold:bool):
+    """
+    Time the move generator for each piece of a game
+
+    args:
+        seed (int): The seed of the game
+        pieces (int): The maximum number of pieces to place
+        hold (bool): Whether to include the placements of the hold piece
+
+    returns:
+        times (list): The seconds taken to find the placements of each piece
+        placements (int): The total number of placements found
+    """
+    engine = Engine(seed)
+    engine.GameInstanceStruct.gravity = 0
+    engine.GameInstanceStruct.lock_delay = 'inf'
+    engine.step()
+
+    times = []
+    count = 0
+
+    for _ in range(pieces):
+        start = time.perf_counter()
+        placements = engine.placements(hold)
+        times.append(time.perf_counter() - start)
+        count += len(placements)
+
+        if not placements or engine.FlagStruct.GAME_OVER:
+            break
+
+        lowest = max(placements, key = lambda placement: (placement.y + placement.shape.min_y, -placement.x))
+        engine.step(list(lowest.actions))
+
+    return times, count
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type = int, default = 10)
+    parser.add_argument('--pieces', type = int, default = 100)
+    parser.add_argument('--hold', action = 'store_true')
+    args = parser.parse_args()
+
+    times = []
+    count = 0
+
+    for seed in range(args.games):
+        game_times, game_count = time_game(seed, args.pieces, args.hold)
+        times += game_times
+        count += game_count
+
+    times.sort()
+    print(f"{len(times)} pieces, {count / len(times):.1f} placements/piece")
+    print(f"median {times[len(times) // 2] * 1e6:.0f} us  p99 {times[int(len(times) * 0.99)] * 1e6:.0f} us  max {times[-1] * 1e6:.0f} us")
+
+if __name__ == '__main__':
+    main()
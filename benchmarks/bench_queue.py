@@ -0,0 +1,47 @@
+"""
+Benchmark for bulk piece sequence generation
+
+Times Queue.sequences() for the first pieces of many seeds against taking the same pieces from a Queue one seed at a
+time, and checks that both give the same pieces.
+
+usage:
+    python benchmarks/bench_queue.py [--seeds N] [--pieces N]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from instance.queue import Queue, RNG, BAG # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type = int, default = 10_000)
+    parser.add_argument('--pieces', type = int, default = 10_000)
+    parser.add_argument('--single-seeds', type = int, default = 100, help = 'number of seeds to time one at a time')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sequences = Queue.sequences(np.arange(args.seeds), args.pieces)
+    bulk = (time.perf_counter() - start) / args.seeds
+
+    start = time.perf_counter()
+
+    for seed in range(args.single_seeds):
+        queue = Queue(RNG(seed))
+        pieces = [queue.get_next_piece() for _ in range(args.pieces)]
+
+        if [BAG[index] for index in sequences[seed]] != pieces:
+            raise ValueError(f"\033[31mBulk sequence does not match the queue!: seed {seed} \033[31m\033[0m")
+
+    single = (time.perf_counter() - start) / args.single_seeds
+
+    print(f"{args.seeds} seeds, {args.pieces} pieces/seed")
+    print(f"Queue.sequences() {bulk * 1e6:8.1f} us/seed")
+    print(f"one at a time     {single * 1e6:8.1f} us/seed ({single / bulk:.0f}x)")
+
+if __name__ == '__main__':
+    main()
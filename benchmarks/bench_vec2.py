@@ -0,0 +1,173 @@
+"""
+Microbenchmark for Vec2 allocations
+
+Measures the memory of each Vec2 instance against the previous __dict__ based implementation, and counts the Vec2
+objects and memory blocks the engine hot paths allocate per tick of a scripted game. Every vector the loop creates is
+kept alive until the end, so sys.getallocatedblocks() around the loop counts the blocks of the vectors that would
+otherwise be freed within the tick. Pass --baseline with a checkout of the tree from before Vec2 became a tuple to run
+the same loop against the old Vec2 and hot paths.
+
+usage:
+    python benchmarks/bench_vec2.py [--ticks N] [--baseline PATH]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+class LegacyVec2():
+    def __init__(self, x, y):
+        """
+        The previous Vec2 implementation, kept for comparison
+        """
+        self.x = x
+        self.y = y
+
+    def __add__(self, vec):
+        return LegacyVec2(self.x + vec.x , self.y + vec.y)
+
+def instance_memory(cls, count:int = 100_000):
+    """
+    Get the number of bytes allocated per vector when creating many vectors
+
+    args:
+        cls (type): The vector class
+        count (int): The number of vectors to create
+    """
+    tracemalloc.start()
+    vectors = [cls(i, i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vectors
+
+    return current / count
+
+def add_time(cls, count:int = 1_000_000):
+    """
+    Get the time per addition of two vectors
+
+    args:
+        cls (type): The vector class
+        count (int): The number of additions
+    """
+    position = cls(0, 0)
+    step = cls(1, 0)
+
+    start = time.perf_counter()
+    for _ in range(count):
+        position = position + step
+
+    return (time.perf_counter() - start) / count
+
+def count_tick_allocations(ticks:int):
+    """
+    Count the Vec2 objects and memory blocks allocated per tick by moving, rotating, dropping and drawing the ghost of a
+    piece, in the tree on sys.path
+
+    args:
+        ticks (int): The number of ticks to run
+
+    returns:
+        vectors (float): The Vec2 objects created per tick, including those of the spawned piece
+        blocks (float): The memory blocks allocated per tick for them
+    """
+    import utils
+    from utils import Vec2
+    from core.handling import Action
+    from instance.matrix import Matrix
+    from instance.rotation import RotationSystem
+    from instance.tetromino import Tetromino
+
+    vectors = [None] * (64 * ticks) # preallocated so keeping the vectors does not allocate blocks in the loop
+    created = 0
+
+    if hasattr(utils, '_new_tuple'): # every Vec2, including the results of arithmetic, is built by _new_tuple
+        new = utils._new_tuple
+
+        def counting_new(cls, args):
+            nonlocal created
+            vector = new(cls, args)
+
+            if cls is Vec2:
+                vectors[created] = vector
+                created += 1
+
+            return vector
+
+        utils._new_tuple = counting_new
+        restore = lambda: setattr(utils, '_new_tuple', new) # noqa: E731
+    else: # the __dict__ based Vec2, built by __init__
+        init = Vec2.__init__
+
+        def counting_init(self, x, y):
+            nonlocal created
+            init(self, x, y)
+            vectors[created] = self
+            created += 1
+
+        Vec2.__init__ = counting_init
+        restore = lambda: setattr(Vec2, '__init__', init) # noqa: E731
+
+    kicks = RotationSystem('SRS').kicks
+    actions = [Action.MOVE_LEFT, Action.ROTATE_CLOCKWISE, Action.MOVE_RIGHT, Action.ROTATE_COUNTERCLOCKWISE, Action.SONIC_LEFT, Action.SONIC_RIGHT]
+    matrix = Matrix(10, 40)
+    tetromino = None
+
+    blocks = sys.getallocatedblocks()
+    try:
+        for tick in range(ticks):
+            tetromino = Tetromino('TSZLJOI'[tick // 6 % 7], 0, 4, 18, matrix)
+            action = actions[tick % len(actions)]
+
+            match action:
+                case Action.MOVE_LEFT | Action.MOVE_RIGHT:
+                    tetromino.move(action)
+                case Action.SONIC_LEFT | Action.SONIC_RIGHT:
+                    tetromino.sonic_move(action)
+                case _:
+                    tetromino.rotate(action, kicks)
+
+            tetromino.attempt_to_move_downwards()
+            tetromino.ghost()
+            tetromino.is_on_floor()
+    finally:
+        blocks = sys.getallocatedblocks() - blocks
+        restore()
+
+    return created / ticks, blocks / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type = int, default = 20_000)
+    parser.add_argument('--baseline', default = None, help = 'path of a checkout from before Vec2 became a tuple to compare against')
+    parser.add_argument('--tree', default = ROOT, help = argparse.SUPPRESS) # the tree to run the tick loop in, used to run the baseline
+    args = parser.parse_args()
+
+    sys.path.insert(0, args.tree)
+
+    if args.tree != ROOT:
+        print(*count_tick_allocations(args.ticks))
+        return
+
+    from utils import Vec2
+
+    for cls in (LegacyVec2, Vec2):
+        print(f"{cls.__name__:<12} {instance_memory(cls):6.1f} bytes/vector  {add_time(cls) * 1e9:6.1f} ns/add")
+
+    trees = [('Vec2', None)] + ([('baseline', args.baseline)] if args.baseline else [])
+
+    for name, tree in trees:
+        if tree is None:
+            vectors, blocks = count_tick_allocations(args.ticks)
+        else:
+            output = subprocess.run([sys.executable, __file__, '--ticks', str(args.ticks), '--tree', tree], capture_output = True, text = True, check = True).stdout
+            vectors, blocks = map(float, output.split()[-2:])
+
+        print(f"{name:<12} {vectors:6.2f} vectors/tick {blocks:6.2f} blocks/tick (including the spawned piece)")
+
+if __name__ == '__main__':
+    main()
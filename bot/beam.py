@@ -0,0 +1,344 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from instance.engine import Engine
+from instance.matrix import Matrix
+from instance.movegen import MoveGenerator
+from instance.rotation import RotationSystem
+from instance.tetromino import Tetromino
+from instance.zobrist import PIECE_KEYS, TranspositionTable
+from bot.evaluator import BoardEvaluator, FEATURES
+from core.state.struct_engine_config import StructEngineConfig
+from core.state.struct_gameinstance import StructGameInstance
+
+LINES_CLEARED = FEATURES.index('lines_cleared')
+
+@dataclass(frozen = True)
+class BeamNode():
+    """
+    A game state reached by placing pieces from the root of the search
+
+    args:
+        board (bytes): The colour codes of the matrix in row order
+        held (str): The hold piece, or None
+        index (int): The index of the current piece in the pieces of the search
+        root (int): The index of the placement of the root piece this state follows from
+        reward (float): The weighted lines cleared by the placements so far
+        value (float): The reward before the last placement plus the score of the board
+    """
+    board: bytes
+    held: str
+    index: int
+    root: int
+    reward: float
+    value: float
+
+class BeamWorker():
+    def __init__(self, boards:np.ndarray, rotation_system:str, weights:dict, WIDTH:int, HEIGHT:int, table_capacity:int, use_hold:bool = True):
+        """
+        Expands the nodes of the beam, run in each worker process of the search or in the search itself with no workers
+
+        The children of placing a piece on a board are cached in a transposition table keyed by the Zobrist hash of the
+        board and the piece, as the next search goes over many of the same boards one piece deeper.
+
+        args:
+            boards (np.ndarray): (beam width, HEIGHT, WIDTH) boards of the beam, shared with the search
+            rotation_system (str): The rotation system to use
+            weights (dict): The weights of the board evaluator
+            WIDTH (int): The width of the matrix
+            HEIGHT (int): The height of the matrix
+            table_capacity (int): The number of expansions to cache
+            use_hold (bool): Whether pieces can be held
+
+        methods:
+            expand(slots, nodes, pieces, keep): Get the best children of the nodes
+        """
+        self.boards = boards
+        self.matrix = Matrix(WIDTH, HEIGHT)
+        self.move_generator = MoveGenerator(RotationSystem(rotation_system).kicks)
+        self.evaluator = BoardEvaluator(weights)
+        self.table = TranspositionTable(table_capacity)
+        self.use_hold = use_hold
+
+        spawn_pos = StructGameInstance.spawn_pos
+        self.spawns = {type: tuple(Tetromino(type, 0, spawn_pos.x, spawn_pos.y, self.matrix).position) for type in PIECE_KEYS}
+
+    def expand(self, slots:list, nodes:list, pieces:tuple, keep:int, deadline:float):
+        """
+        Get the best children of the nodes, by placing the current piece or by holding it if use_hold
+
+        args:
+            slots (list): The slot of the board of each node in boards
+            nodes (list): The BeamNode of each slot
+            pieces (tuple): The types of the pieces of the search, in order
+            keep (int): The number of children to return
+            deadline (float): The time.perf_counter() time to give up at
+
+        returns:
+            children (list): The best children, best first, or None if the deadline passed
+        """
+        children = []
+
+        for slot, node in zip(slots, nodes):
+            if time.perf_counter() > deadline:
+                return None
+
+            if node.index >= len(pieces): # no pieces left to place
+                children.append(node)
+                continue
+
+            self.matrix.load(self.boards[slot].data.cast('B'))
+            current = pieces[node.index]
+            options = [(current, node.held, node.index + 1)] # (piece to place, hold piece after, index after)
+
+            if self.use_hold:
+                if node.held is None and node.index + 1 < len(pieces):
+                    options.append((pieces[node.index + 1], current, node.index + 2))
+                elif node.held is not None and node.held != current:
+                    options.append((node.held, current, node.index + 1))
+
+            for piece, held, index in options:
+                boards, scores, rewards = self.__place(piece)
+
+                for board, score, reward in zip(boards, scores, rewards):
+                    children.append(BeamNode(board.tobytes(), held, index, node.root, node.reward + reward, node.reward + score))
+
+        children.sort(key = lambda child: child.value, reverse = True)
+
+        return children[:keep]
+
+    def __place(self, piece:str):
+        """
+        Get the boards, scores and line clear rewards of every placement of a piece on the loaded matrix
+        """
+        key = self.matrix.hash ^ PIECE_KEYS[piece]
+        result = self.table.get(key)
+
+        if result is None:
+            x, y = self.spawns[piece]
+            placements = self.move_generator.placements(self.matrix, piece, 0, x, y)
+
+            if placements:
+                boards = self.evaluator.boards(self.matrix, placements)
+                features = self.evaluator.features(boards)
+                result = (self.evaluator.clear_lines(boards), features @ self.evaluator.weights, features[:, LINES_CLEARED] * self.evaluator.weights[LINES_CLEARED])
+            else: # the piece can not spawn
+                result = ((), (), ())
+
+            self.table.store(key, result)
+
+        return result
+
+WORKER_MEMORY = None # the shared memory of the beam, kept open for the life of the worker process
+WORKER = None
+
+def init_worker(shared_name:str, shape:tuple, rotation_system:str, weights:dict, table_capacity:int, use_hold:bool):
+    """
+    Set up a worker process of the search, attaching to the shared boards of the beam
+    """
+    global WORKER_MEMORY, WORKER
+    WORKER_MEMORY = shared_memory.SharedMemory(name = shared_name)
+    boards = np.ndarray(shape, dtype = np.uint8, buffer = WORKER_MEMORY.buf)
+    WORKER = BeamWorker(boards, rotation_system, weights, shape[2], shape[1], table_capacity, use_hold)
+
+def expand_nodes(slots:list, nodes:list, pieces:tuple, keep:int, deadline:float):
+    """
+    Expand nodes of the beam in a worker process, see BeamWorker.expand
+    """
+    return WORKER.expand(slots, nodes, pieces, keep, deadline)
+
+class BeamSearch():
+    def __init__(self, rotation_system:str = 'SRS', weights:dict = None, beam_width:int = 64, depth:int = None, lookahead:int = None, budget:float = 0.1, workers:int = 0, use_hold:bool = True, table_capacity:int = 1024, config:StructEngineConfig = None):
+        """
+        Choose where to place the current piece with a beam search over the pieces in the queue
+
+        The root placements are found from the pose of the current piece, each following piece is placed from its spawn
+        position. Every depth places one more piece on each board of the beam and keeps the beam_width best boards by
+        the score of the board evaluator plus the lines cleared on the way.
+
+        The boards of the beam are written to shared memory and the beam is split across a pool of worker processes
+        to expand, which only send back their best children. The search goes one depth deeper at a time until it has
+        placed every piece it can see or the time budget is used up, and the best placement of the deepest finished
+        depth is chosen. A depth that does not finish in time is discarded.
+
+        The input sequences of the placements are found without gravity, so the search can not be used at 20G.
+
+        args:
+            rotation_system (str): The rotation system to use
+            weights (dict): The weights of the board evaluator
+            beam_width (int): The number of boards kept at each depth
+            depth (int): The maximum number of pieces to place, defaults to every piece that can be seen
+            lookahead (int): The number of pieces of the queue that can be seen, defaults to the pieces in the preview
+            budget (float): The time budget of each search in seconds
+            workers (int): The number of worker processes, 0 expands the beam in the calling process
+            use_hold (bool): Whether the search can hold pieces
+            table_capacity (int): The number of expansions each worker caches
+            config (StructEngineConfig): The game configuration
+
+        methods:
+            search(engine): Find the best placement of the current piece
+            close(): Stop the worker processes and free the shared memory
+        """
+        if beam_width < 1:
+            raise ValueError(f"\033[31mInvalid beam width!: {beam_width} \033[31m\033[0m")
+
+        self.Config = config if config is not None else StructEngineConfig()
+        self.rotation_system = rotation_system
+        self.evaluator = BoardEvaluator(weights)
+        self.beam_width = beam_width
+        self.depth = depth
+        self.lookahead = lookahead
+        self.budget = budget
+        self.workers = workers
+        self.use_hold = use_hold
+        self.last_depth = 0 # the depth reached by the last search
+
+        shape = (beam_width, self.Config.MATRIX_HEIGHT, self.Config.MATRIX_WIDTH)
+        self.shared = shared_memory.SharedMemory(create = True, size = int(np.prod(shape)))
+        self.boards = np.ndarray(shape, dtype = np.uint8, buffer = self.shared.buf)
+
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers = workers, initializer = init_worker, initargs = (self.shared.name, shape, rotation_system, weights, table_capacity, use_hold))
+            self.worker = None
+        else:
+            self.executor = None
+            self.worker = BeamWorker(self.boards, rotation_system, weights, shape[2], shape[1], table_capacity, use_hold)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory
+        """
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures = True)
+            self.executor = None
+
+        if self.shared is not None:
+            self.boards = None
+            self.shared.close()
+            self.shared.unlink()
+            self.shared = None
+
+    def search(self, engine:Engine):
+        """
+        Find the best placement of the current piece of the engine
+
+        args:
+            engine (Engine): The game to search, it is not changed
+
+        returns:
+            placement (Placement): The best placement, or None if the current piece can not be placed
+        """
+        deadline = time.perf_counter() + self.budget
+        GameInstanceStruct = engine.GameInstanceStruct
+        tetromino = GameInstanceStruct.current_tetromino
+
+        if tetromino is None or engine.FlagStruct.GAME_OVER:
+            return None
+
+        pieces = (tetromino.type,) + GameInstanceStruct.queue.preview(self.lookahead)
+        max_depth = min(self.depth or len(pieces), len(pieces))
+
+        placements = engine.placements(hold = self.use_hold)
+
+        if not placements:
+            return None
+
+        beam = self.__select(self.__expand_root(engine, placements))
+        self.last_depth = 1
+
+        while self.last_depth < max_depth and time.perf_counter() < deadline:
+            children = self.__expand(beam, pieces, deadline)
+
+            if not children: # out of time, or every board topped out
+                break
+
+            beam = self.__select(children)
+            self.last_depth += 1
+
+        return placements[beam[0].root]
+
+    def __expand_root(self, engine:Engine, placements:list):
+        """
+        Get the nodes of the root placements, which can start from the current pose of the piece
+        """
+        GameInstanceStruct = engine.GameInstanceStruct
+        matrix = GameInstanceStruct.matrix
+        current = GameInstanceStruct.current_tetromino.type
+        held = GameInstanceStruct.held_tetromino
+
+        boards = self.evaluator.boards(matrix, placements)
+        features = self.evaluator.features(boards)
+        scores = features @ self.evaluator.weights
+        rewards = features[:, LINES_CLEARED] * self.evaluator.weights[LINES_CLEARED]
+        boards = self.evaluator.clear_lines(boards)
+
+        nodes = []
+
+        for root, placement in enumerate(placements):
+            if not placement.hold:
+                node_held, index = held, 1
+            else:
+                node_held, index = current, 2 if held is None else 1
+
+            nodes.append(BeamNode(boards[root].tobytes(), node_held, index, root, rewards[root], scores[root]))
+
+        return nodes
+
+    def __expand(self, beam:list, pieces:tuple, deadline:float):
+        """
+        Place the next piece on every board of the beam
+
+        returns:
+            children (list): The children of the beam, or an empty list if the depth did not finish in time
+        """
+        for slot, node in enumerate(beam):
+            self.boards[slot] = np.frombuffer(node.board, dtype = np.uint8).reshape(self.boards.shape[1:])
+
+        if self.executor is None:
+            return self.worker.expand(range(len(beam)), beam, pieces, self.beam_width, deadline) or []
+
+        chunk_size = -(-len(beam) // self.workers)
+        futures = [
+            self.executor.submit(expand_nodes, list(range(start, min(start + chunk_size, len(beam)))), beam[start:start + chunk_size], pieces, self.beam_width, deadline)
+            for start in range(0, len(beam), chunk_size)
+        ]
+
+        done, pending = wait(futures, timeout = max(deadline - time.perf_counter(), 0) + 0.01) # the workers stop at the deadline themselves
+        results = [future.result() for future in done]
+
+        if pending or None in results:
+            for future in pending:
+                future.cancel()
+            return []
+
+        return [child for result in results for child in result]
+
+    def __select(self, nodes:list):
+        """
+        Keep the best beam_width nodes, dropping nodes with the same board, hold piece and piece index
+        """
+        nodes = sorted(nodes, key = lambda node: node.value, reverse = True)
+        seen = set()
+        beam = []
+
+        for node in nodes:
+            key = (node.board, node.held, node.index)
+
+            if key in seen:
+                continue
+
+            seen.add(key)
+            beam.append(node)
+
+            if len(beam) == self.beam_width:
+                break
+
+        return beam
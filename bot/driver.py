@@ -0,0 +1,180 @@
+"""
+Drive a game with the beam search bot, on the headless engine or on a running instance of Four
+
+Run as a stress test of the search, playing a seeded game on the headless engine and reporting the pieces per second
+the bot reaches and how deep it searched.
+
+usage:
+    python -m bot.driver [--pieces N] [--pps N] [--workers N] [--beam-width N] [--budget SECONDS]
+"""
+import argparse
+import time
+from instance.engine import Engine
+from bot.beam import BeamSearch
+from core.action_buffer import Source
+
+class BotPolicy():
+    def __init__(self, pps:float = None, **search_args):
+        """
+        Input policy that plays the placement chosen by a beam search, one piece at a time, see RandomPolicy
+
+        The search is run once for each new piece and every action of the placement is performed on the same tick.
+        Pieces are placed at most pps times per second of game time, so the bot can be held to a target rate. The
+        search is created on the first reset, so the policy can be pickled to the worker processes of a sweep.
+
+        args:
+            pps (float): The maximum pieces per second, not limited by default
+            search_args: The arguments of the BeamSearch
+
+        methods:
+            reset(seed): Prepare the policy for a new game
+            close(): Free the search
+        """
+        self.pps = pps
+        self.search_args = search_args
+        self.search = None
+        self.piece = None
+        self.next_tick = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['search'] = None
+        return state
+
+    def __repr__(self):
+        search_args = ''.join(f", {name} = {value!r}" for name, value in sorted(self.search_args.items()))
+        return f"BotPolicy(pps = {self.pps!r}{search_args})"
+
+    def reset(self, seed:int):
+        if self.search is None:
+            self.search = BeamSearch(**self.search_args)
+
+        self.piece = None
+        self.next_tick = 0
+
+    def close(self):
+        if self.search is not None:
+            self.search.close()
+            self.search = None
+
+    def __call__(self, engine:Engine):
+        tetromino = engine.GameInstanceStruct.current_tetromino
+
+        if tetromino is None or tetromino is self.piece or engine.tick < self.next_tick:
+            return []
+
+        self.piece = tetromino
+        placement = self.search.search(engine)
+
+        if placement is None:
+            return []
+
+        if self.pps:
+            self.next_tick = engine.tick + round(engine.Config.TPS / self.pps)
+
+        return list(placement.actions)
+
+class BotDriver():
+    def __init__(self, four, search:BeamSearch, pps:float = None):
+        """
+        Play an instance of Four with a beam search, pushing the actions of each placement into the ActionBuffer of
+        the handling on the current tick
+
+        The bot runs in the handling's before_loop_hook, so the actions are performed on the tick the placement is
+        found. The search blocks the game loop for up to its time budget, which should be kept under the time of a
+        tick at the target rate.
+
+        args:
+            four (Four): The instance of the game
+            search (BeamSearch): The search to choose placements with
+            pps (float): The maximum pieces per second, not limited by default
+
+        methods:
+            before_loop_hook(): Queue the actions of the next placement, then get the action states from the handling
+        """
+        self.four = four
+        self.search = search
+        self.pps = pps
+        self.piece = None
+        self.next_time = 0
+
+        handling = four.core_instance.handling
+        self.__handling_hook = handling.before_loop_hook
+        handling.before_loop_hook = self.before_loop_hook
+
+    def before_loop_hook(self):
+        action_buffer = self.__handling_hook()
+        current_time = self.four.core_instance.StructTiming.current_time
+        tetromino = self.four.engine.GameInstanceStruct.current_tetromino
+
+        if tetromino is None or tetromino is self.piece or current_time < self.next_time:
+            return action_buffer
+
+        self.piece = tetromino
+        placement = self.search.search(self.four.engine)
+
+        if placement is None:
+            return action_buffer
+
+        for action in placement.actions:
+            action_buffer.push(self.four.engine.tick, action, Source.BOT)
+
+        if self.pps:
+            self.next_time = current_time + 1 / self.pps
+
+        return action_buffer
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pieces', type = int, default = 200)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--pps', type = float, default = None, help = 'target pieces per second of wall time, sets the default budget')
+    parser.add_argument('--workers', type = int, default = 0)
+    parser.add_argument('--beam-width', type = int, default = 64)
+    parser.add_argument('--depth', type = int, default = None)
+    parser.add_argument('--lookahead', type = int, default = None, help = 'pieces of the queue to search, defaults to the preview')
+    parser.add_argument('--budget', type = float, default = None, help = 'seconds per piece, defaults to 0.9 / pps or 0.1')
+    parser.add_argument('--no-hold', action = 'store_true')
+    args = parser.parse_args()
+
+    budget = args.budget if args.budget is not None else (0.9 / args.pps if args.pps else 0.1)
+    engine = Engine(args.seed)
+    engine.step() # spawn the first piece
+
+    with BeamSearch(beam_width = args.beam_width, depth = args.depth, lookahead = args.lookahead, budget = budget, workers = args.workers, use_hold = not args.no_hold) as search:
+        search.search(engine) # start the workers before timing
+
+        pieces = lines = depth = 0
+        times = []
+        start = time.perf_counter()
+
+        while pieces < args.pieces and not engine.FlagStruct.GAME_OVER:
+            search_start = time.perf_counter()
+            placement = search.search(engine)
+            times.append(time.perf_counter() - search_start)
+
+            if placement is None:
+                break
+
+            if args.pps: # hold the target rate when the search finishes early
+                time.sleep(max(search_start + 1 / args.pps - time.perf_counter(), 0))
+
+            engine.step(list(placement.actions))
+            lines += len(engine.cleared_lines)
+
+            while engine.GameInstanceStruct.current_tetromino is None and not engine.FlagStruct.GAME_OVER: # wait for the next piece to spawn
+                engine.step()
+                lines += len(engine.cleared_lines)
+
+            pieces += 1
+            depth += search.last_depth
+
+        elapsed = time.perf_counter() - start
+
+    times.sort()
+    print(f"{pieces} pieces, {lines} lines, {'game over' if engine.FlagStruct.GAME_OVER else 'alive'}")
+    print(f"{pieces / elapsed:.1f} pieces/s  mean depth {depth / max(pieces, 1):.1f}")
+    print(f"search median {times[len(times) // 2] * 1e3:.1f} ms  max {times[-1] * 1e3:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import numpy as np
+from instance.matrix import Matrix
+from instance.batch import PIECE_INDEX, PIECE_CELLS, PIECE_VALUES
+
+FEATURES = ('aggregate_height', 'holes', 'bumpiness', 'well_depth', 'row_transitions', 'column_transitions', 'lines_cleared')
+
+DEFAULT_WEIGHTS = {
+    'aggregate_height': -0.51,
+    'holes': -7.9,
+    'bumpiness': -0.18,
+    'well_depth': -0.5,
+    'row_transitions': -3.2,
+    'column_transitions': -9.3,
+    'lines_cleared': 3.4,
+}
+
+class BoardEvaluator():
+    def __init__(self, weights:dict = None):
+        """
+        Score the boards that result from a set of placements, all at once as a stacked NumPy array
+
+        The boards are uint8 arrays of shape (N, HEIGHT, WIDTH) in the layout of the Matrix colour plane, holding the
+        COLOUR_MAP piece codes (0 is empty), so a board can be made from matrix.colours directly. Only whether a cell
+        is occupied is used to score a board.
+
+        args:
+            weights (dict): The weight of each feature, missing features have a weight of 0, defaults to DEFAULT_WEIGHTS
+
+        methods:
+            boards(matrix, placements): Get the board after each placement, before full lines are cleared
+            clear_lines(boards): Get each board after its full lines are cleared
+            features(boards): Get the features of each board
+            evaluate(matrix, placements): Get the weighted score of each placement
+        """
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+
+        for name in weights:
+            if name not in FEATURES:
+                raise ValueError(f"\033[31mUnknown board feature!: {name} \033[31m\033[0m")
+
+        self.weights = np.array([weights.get(name, 0) for name in FEATURES], dtype = np.float64)
+
+    def boards(self, matrix:Matrix, placements:list):
+        """
+        Get the board after each placement, before full lines are cleared
+
+        args:
+            matrix (Matrix): The matrix the pieces are placed in
+            placements (list): The placements, from MoveGenerator
+
+        returns:
+            boards (np.ndarray): (N, HEIGHT, WIDTH) uint8 array of piece codes
+        """
+        board = np.frombuffer(b''.join(matrix.colours), dtype = np.uint8).reshape(matrix.HEIGHT, matrix.WIDTH)
+        boards = np.repeat(board[np.newaxis], len(placements), axis = 0)
+
+        if not placements:
+            return boards
+
+        poses = np.array([(PIECE_INDEX[placement.type], placement.state, placement.x, placement.y) for placement in placements], dtype = np.int64)
+        cells = PIECE_CELLS[poses[:, 0], poses[:, 1]] + poses[:, np.newaxis, 2:] # [placement, cell, (x, y)]
+
+        boards[np.arange(len(placements))[:, np.newaxis], cells[:, :, 1], cells[:, :, 0]] = PIECE_VALUES[poses[:, 0], np.newaxis]
+
+        return boards
+
+    def clear_lines(self, boards:np.ndarray):
+        """
+        Get each board after its full lines are cleared, the rows above a cleared line move down as in Matrix.clear_lines
+
+        args:
+            boards (np.ndarray): (N, HEIGHT, WIDTH) array of piece codes
+
+        returns:
+            boards (np.ndarray): (N, HEIGHT, WIDTH) array of piece codes with the full lines cleared
+        """
+        full = (boards != 0).all(axis = 2)
+        lines_cleared = np.count_nonzero(full, axis = 1)
+
+        if not lines_cleared.any():
+            return boards
+
+        order = np.argsort(~full, axis = 1, kind = 'stable') # the full rows move to the top, the other rows keep their order
+        boards = np.take_along_axis(boards, order[:, :, np.newaxis], axis = 1)
+        boards[np.arange(boards.shape[1]) < lines_cleared[:, np.newaxis]] = 0
+
+        return boards
+
+    def features(self, boards:np.ndarray):
+        """
+        Get the features of each board after its full lines are cleared
+
+        args:
+            boards (np.ndarray): (N, HEIGHT, WIDTH) array of piece codes
+
+        returns:
+            features (np.ndarray): (N, len(FEATURES)) array of the features of each board, in the order of FEATURES
+        """
+        N, HEIGHT, WIDTH = boards.shape
+        occupied = boards != 0
+
+        # only the rows from just above the highest block of any board are scored, the rows above are empty on every board
+        occupied_rows = np.flatnonzero(occupied.any(axis = (0, 2)))
+        top = max(occupied_rows[0] - 1, 0) if len(occupied_rows) else HEIGHT - 1
+        occupied = occupied[:, top:]
+        rows = HEIGHT - top
+
+        full = occupied.all(axis = 2)
+        lines_cleared = np.count_nonzero(full, axis = 1)
+
+        if lines_cleared.any(): # move the full rows to the top and empty them, keeping the order of the other rows
+            order = np.argsort(~full, axis = 1, kind = 'stable')
+            occupied = np.take_along_axis(occupied, order[:, :, np.newaxis], axis = 1)
+            occupied &= (np.arange(rows) >= lines_cleared[:, np.newaxis])[:, :, np.newaxis]
+
+        filled = occupied.any(axis = 1)
+        heights = np.where(filled, rows - occupied.argmax(axis = 1), 0) # the first occupied row of each column is its top
+
+        holes = heights.sum(axis = 1) - np.count_nonzero(occupied, axis = (1, 2))
+        bumpiness = np.abs(np.diff(heights, axis = 1)).sum(axis = 1)
+
+        walls = np.full((N, WIDTH + 2), HEIGHT, dtype = heights.dtype) # the walls are as high as the matrix
+        walls[:, 1:-1] = heights
+        well_depth = np.clip(np.minimum(walls[:, :-2], walls[:, 2:]) - heights, 0, None).max(axis = 1)
+
+        # the walls and the floor count as occupied, the empty rows above the stack are not counted
+        row_transitions = np.count_nonzero(occupied[:, :, 1:] != occupied[:, :, :-1], axis = 2) + ~occupied[:, :, 0] + ~occupied[:, :, -1]
+        in_stack = np.arange(rows) >= (rows - heights.max(axis = 1))[:, np.newaxis]
+        row_transitions = (row_transitions * in_stack).sum(axis = 1)
+
+        column_transitions = np.count_nonzero(occupied[:, 1:] != occupied[:, :-1], axis = (1, 2)) + np.count_nonzero(~occupied[:, -1], axis = 1)
+
+        return np.stack((heights.sum(axis = 1), holes, bumpiness, well_depth, row_transitions, column_transitions, lines_cleared), axis = 1)
+
+    def evaluate(self, matrix:Matrix, placements:list):
+        """
+        Get the weighted score of each placement, higher is better
+
+        args:
+            matrix (Matrix): The matrix the pieces are placed in
+            placements (list): The placements, from MoveGenerator
+
+        returns:
+            scores (np.ndarray): (N,) array of the score of each placement
+        """
+        return self.features(self.boards(matrix, placements)) @ self.weights
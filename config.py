@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
 import pygame
 from core.handling import Action
+from core.state.struct_engine_config import StructEngineConfig
 from typing import Dict, Tuple
 @dataclass
-class StructConfig():
+class StructConfig(StructEngineConfig):
     
     key_bindings: Dict[Action, list[int]] = field(default_factory = lambda: {
         Action.MOVE_LEFT:                   [pygame.K_LEFT],
@@ -16,18 +17,6 @@ class StructConfig():
         Action.HOLD:                        [pygame.K_c],
     })
     
-    HANDLING_SETTINGS: Dict[str, object] = field(default_factory = lambda: {
-        'ARR': 33,           # Auto repeat rate (int) in ms: The speed at which tetrominoes move when holding down the movement keys (ms)
-        'DAS': 167,          # Delayed Auto Shift (int) in ms: The time between the initial key press and the automatic repeat movement (ms)
-        'DCD': 0,            # DAS Cut Delay (int) in ms: If non-zero, any ongoing DAS movement will pause for a set amount of time after dropping/rotating a piece (ms)
-        'SDF': 'inf',        # Soft Drop Factor (int): The factor the soft dropping scales the current gravity by, or 'inf' for instant soft drop
-        'PrevAccHD': True,   # Prevent Accidental Hard Drops (bool): When a piece locks on its own, the hard drop action is disabled for a few frames
-        'DASCancel': False,  # Cancel DAS When Changing Directions (bool): If true, the DAS timer will reset if the opposite direction is pressed
-        'PrefSD': True,      # Prefer Soft Drop Over Movement (bool): At very high speeds, the soft drop action will be performed first if both the soft drop and movement keys are held
-        'PrioriDir': True,   # Prioritize the Most Recent Direction (bool): whether to prioritise the most recent direction key over the other when both are held
-        'SonicDrop': False   # Sonic Drop (bool): Whether to replace the hard drop action with the sonic drop action
-    })
-    
     CAPTION: str = 'Four'
     WINDOW_WIDTH: int = 1500
     WINDOW_HEIGHT: int = 900
@@ -37,13 +26,9 @@ class StructConfig():
 
     UNCAPPED_FPS: bool = False
     FPS: int = 144
-    TPS: int = 256
     POLLING_RATE: int = 1000
-
-    SEED: int = 0
-    MATRIX_WIDTH: int = 10
-    MATRIX_HEIGHT: int = 40
-    QUEUE_LENGTH: int = 5
+    MAX_CATCH_UP_TICKS: int = 8 # most ticks run at once when the game loop falls behind, the rest are dropped
+    SPIN_TIME: float = 0.0005 # time before each tick, frame and poll that the game loop spins instead of sleeping to wake up on time (s)
 
     COLOUR_MAP: Dict[int, Tuple[int, int, int]] = field(default_factory = lambda: {
         -1: (255, 0, 0),
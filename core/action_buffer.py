@@ -0,0 +1,115 @@
+from enum import IntEnum
+from instance.action import Action
+
+ACTION_BITS = 4 # each record is packed as (source << ACTION_BITS) | action value, into a byte
+ACTION_MASK = (1 << ACTION_BITS) - 1
+BUCKET_CAPACITY = 256 # most actions buffered for a single tick
+
+if max(action.value for action in Action) > ACTION_MASK:
+    raise ValueError(f"\033[31mAction values do not fit in {ACTION_BITS} bits of an action record! \033[31m\033[0m")
+
+ACTIONS = tuple(next((action for action in Action if action.value == value), None) for value in range(1 << ACTION_BITS)) # action of each action value
+
+class Source(IntEnum):
+    """
+    Where a buffered action came from
+    """
+    HANDLING = 0
+    BOT = 1
+
+class ActionBuffer():
+    def __init__(self, threshold:int, capacity:int = BUCKET_CAPACITY):
+        """
+        Ring buffer of the actions to perform, with a bucket of action records for each tick
+
+        Each tick takes only its own bucket, so a tick costs the number of actions performed on it however many are
+        buffered. An action added for a tick that has already been taken is moved onto the next tick to be taken if
+        it is at most threshold ticks late and dropped otherwise, so no action is left behind in the ring. The buckets
+        of ticks that were skipped over are cleared when the ring wraps around to them.
+
+        The records are the action value and source packed into a byte, kept in one preallocated bytearray, so 
+        buffering an action allocates nothing. The tick of a record is the tick of its bucket.
+
+        args:
+            threshold (int): The most ticks late an action can be and still be performed, also how far ahead actions can be added
+            capacity (int): The most actions in a bucket
+
+        methods:
+            push(tick, action, source): Add an action to perform on a tick
+            take(tick): Take the records of the actions to perform on a tick
+            clear(): Remove all the actions
+        """
+        self.threshold = threshold
+        self.capacity = capacity
+        self.size = 1 << threshold.bit_length() # power of two above the threshold, so the bucket of a tick is found with a mask
+        self.mask = self.size - 1
+
+        self.records = bytearray(self.size * capacity) # bucket i holds records[i * capacity:i * capacity + counts[i]]
+        self.view = memoryview(self.records)
+        self.counts = [0] * self.size
+        self.bucket_ticks = [-1] * self.size # the tick the records in each bucket are for
+        self.next_tick = 0 # the next tick to be taken
+
+    def __len__(self):
+        return sum(count for count, tick in zip(self.counts, self.bucket_ticks) if tick >= self.next_tick)
+
+    def push(self, tick:int, action:Action, source:Source = Source.HANDLING):
+        """
+        Add an action to perform on a tick
+
+        args:
+            tick (int): The tick to perform the action on
+            action (Action): The action to perform
+            source (Source): Where the action came from
+        """
+        if tick < self.next_tick:
+            if self.next_tick - tick > self.threshold:
+                return
+
+            tick = self.next_tick
+
+        elif tick - self.next_tick > self.mask:
+            raise ValueError(f"\033[31mAction is too far ahead to buffer: tick {tick}, next tick {self.next_tick} \033[31m\033[0m")
+
+        slot = tick & self.mask
+
+        if self.bucket_ticks[slot] != tick: # the bucket still holds the records of a skipped tick
+            self.counts[slot] = 0
+            self.bucket_ticks[slot] = tick
+
+        count = self.counts[slot]
+
+        if count == self.capacity:
+            raise ValueError(f"\033[31mToo many actions buffered for tick {tick}: {count} \033[31m\033[0m")
+
+        self.records[slot * self.capacity + count] = source << ACTION_BITS | action.value
+        self.counts[slot] = count + 1
+
+    def take(self, tick:int):
+        """
+        Take the records of the actions to perform on a tick, in the order they were added.
+        The action of a record is ACTIONS[record & ACTION_MASK] and its source is record >> ACTION_BITS
+
+        args:
+            tick (int): The tick being performed, ticks can be skipped but not taken twice
+
+        returns:
+            records (memoryview): The records, only valid until the next tick is taken
+        """
+        self.next_tick = tick + 1
+        slot = tick & self.mask
+
+        if self.bucket_ticks[slot] != tick:
+            return self.view[:0]
+
+        start = slot * self.capacity
+        count = self.counts[slot]
+        self.bucket_ticks[slot] = -1
+        return self.view[start:start + count]
+
+    def clear(self):
+        """
+        Remove all the actions
+        """
+        self.counts = [0] * self.size
+        self.bucket_ticks = [-1] * self.size
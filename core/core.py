@@ -1,11 +1,11 @@
 import pygame
 from config import StructConfig
 from core.handling import Handling
+from core.scheduler import Scheduler
+from core.timeline import Timeline, NS_PER_SECOND
 from render.render import Render
 import time
-import asyncio
 from collections import deque 
-from core.handling import Action
 from core.state.struct_debug import StructDebug
 from core.state.struct_timing import StructTiming
 from core.state.struct_gameinstance import StructGameInstance
@@ -30,6 +30,8 @@ class Core():
         self.StructDebug = StructDebug()
         
         self.render_clock = Clock()
+        self.scheduler = Scheduler(self.Config.SPIN_TIME)
+        self.timeline = Timeline(self.Config.TPS, self.Config.MAX_CATCH_UP_TICKS, self.StructTiming)
         self.window = self.__init_window()
         self.render = Render(self.window, self.Config, self.RenderStruct, self.FlagStruct, self.GameInstanceStruct, self.StructTiming)
         self.handling = Handling(self.Config, self.HandlingStruct)
@@ -42,8 +44,6 @@ class Core():
         self.exited = False
         self.state_snapshot = None
         
-        self.key_dict = None
-        
     def __initialise(self, four):
         """
         Initalise the instance of the game
@@ -67,79 +67,66 @@ class Core():
         Exit the game
         """
         self.exited = True
+        self.scheduler.stop()
         pygame.quit()
            
-    async def run(self, four):
+    def run(self, four):
         """
-        Run the game
+        Run the game, the event handling, game loop, debug info and render loop are run by the scheduler at their 
+        own rates, sleeping between their deadlines
     
         args:
         (Four) four: the instance of the game
         """
         self.__initialise(four)
         
-        await asyncio.gather(
-            self.__timing_wrapper("handle_events", self.__handle_events()),
-            self.__timing_wrapper("game_loop", self.__game_loop(four)),
-            self.__timing_wrapper("get_debug_info", self.__get_debug_info()),
-            self.__timing_wrapper("render_loop", self.__render_loop()),
-        )
+        for name in self.StructTiming.start_times:
+            self.StructTiming.start_times[name] = time.perf_counter()
+        
+        self.timeline.start()
+        
+        self.scheduler.add("handle_events", self.handling.polling_tick_time, self.__timing_wrapper("handle_events", self.__handle_events))
+        self.scheduler.add("game_loop", self.time_per_tick, self.__timing_wrapper("game_loop", lambda: self.__game_loop(four)))
+        self.scheduler.add("get_debug_info", self.frame_time, self.__timing_wrapper("get_debug_info", self.__get_debug_info))
+        self.scheduler.add("render_loop", 0 if self.Config.UNCAPPED_FPS else self.frame_time, self.__timing_wrapper("render_loop", self.__render_loop))
+        
+        self.scheduler.run()
 
-    async def __timing_wrapper(self, name, coro):
+    def __timing_wrapper(self, name, callback):
         """
-        Wrapper function to time coroutines of the game, 
+        Wrap a task of the scheduler to time it, 
         used to time the game loop, render loop and event handling loop
         
         args:
-        (str) name: the name of the coroutine
-        (coro) coro: the coroutine to time
+        (str) name: the name of the task
+        (callable) callback: the task to time, what it returns is passed on to the scheduler
         """
+        def timed():
+            iter_start = time.perf_counter()
+            self.StructTiming.elapsed_times[name] = iter_start - self.StructTiming.start_times[name]
+            
+            next_deadline = callback()
+            
+            self.StructTiming.iter_times[name] = time.perf_counter() - iter_start
+            return next_deadline
         
-        self.StructTiming.start_times[name] = time.perf_counter()
-        
-        async def monitor():
-            while True:
-                
-                iter_start = time.perf_counter()
-                self.StructTiming.elapsed_times[name] = time.perf_counter() - self.StructTiming.start_times[name]
-                self.StructTiming.iter_times[name] = time.perf_counter() - iter_start
-                
-                await asyncio.sleep(0) 
-        
-        monitor_task = asyncio.create_task(monitor())
-        
-        try:
-            await coro
-        finally:
-            monitor_task.cancel()  
+        return timed
 
-    async def __handle_events(self):
+    def __handle_events(self):
         """
-        Handle pygame key events and pass them to the handling object, updates at an uncapped rate
+        Handle pygame key events and pass them to the handling object, run at the polling rate
         """
-        while not self.exited:
-                
-                self.HandlingStruct.current_time = self.StructTiming.elapsed_times["handle_events"]
-                self.HandlingStruct.delta_time += (self.handling.HandlingStruct.current_time - self.handling.HandlingStruct.last_tick_time) / self.handling.polling_tick_time
-                self.HandlingStruct.last_tick_time = self.handling.HandlingStruct.current_time
-              
-                if self.HandlingStruct.do_first_tick:
-                    self.__handle_key_events()
-                    self.HandlingStruct.do_first_tick = False
-
-                while self.HandlingStruct.delta_time >= 1:
-                    self.__handle_key_events()
-                    self.HandlingStruct.delta_time -= 1
-                
-                if self.HandlingStruct.current_time > self.HandlingStruct.poll_counter_last_cleared + 1:
-                    self.__get_polling_rate()
-                    self.HandlingStruct.poll_tick_counter = 0
-                    self.HandlingStruct.poll_counter_last_cleared += 1
-            
-                await asyncio.sleep(0)
+        self.HandlingStruct.current_time = self.StructTiming.elapsed_times["handle_events"]
+        self.__handle_key_events()
+        
+        if self.HandlingStruct.current_time > self.HandlingStruct.poll_counter_last_cleared + 1:
+            self.__get_polling_rate()
+            self.HandlingStruct.poll_tick_counter = 0
+            self.HandlingStruct.poll_counter_last_cleared += 1
     
     def __handle_key_events(self):
         self.HandlingStruct.poll_tick_counter += 1
+        self.HandlingStruct.current_tick = self.timeline.next_tick() # the inputs of this poll are performed on the next tick to run
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -164,61 +151,50 @@ class Core():
             elif event.type == pygame.KEYUP:
                 self.handling.on_key_release(event.key)
     
-    async def __game_loop(self, four):
+    def __game_loop(self, four):
         """
-        The main game loop, updates at a fixed tick rate
+        The main game loop, runs the ticks that are due on the timeline, up to the catch up limit, 
+        and returns the time the next tick is due to the scheduler
         
         args:
         (Four) four: the instance of the game
         """
-        while not self.exited:
-         
-            self.StructTiming.current_time = self.StructTiming.elapsed_times["game_loop"]
-            self.StructTiming.delta_time += (self.StructTiming.current_time - self.StructTiming.last_tick_time) / self.time_per_tick
-            self.StructTiming.last_tick_time = self.StructTiming.current_time
-             
-            if self.StructTiming.do_first_tick:
-                self.__do_tick(four)
-                self.StructTiming.do_first_tick = False
-            
-            while self.StructTiming.delta_time >= 1:
-                self.__do_tick(four)
-                self.StructTiming.delta_time -= 1
-                
-            if self.StructTiming.current_time > self.StructTiming.tick_counter_last_cleared + 1:
-                self.__get_tps()
-                self.StructTiming.tick_counter = 0
-                self.StructTiming.tick_counter_last_cleared += 1
+        self.StructTiming.current_time = self.StructTiming.elapsed_times["game_loop"]
+        
+        for _ in range(self.timeline.due()):
+            self.__do_tick(four)
+            self.StructTiming.tick += 1
             
-            await asyncio.sleep(0)
+        if self.StructTiming.current_time > self.StructTiming.tick_counter_last_cleared + 1:
+            self.__get_tps()
+            self.StructTiming.tick_counter = 0
+            self.StructTiming.tick_counter_last_cleared += 1
+        
+        return self.timeline.deadline() / NS_PER_SECOND
 
-    async def __render_loop(self):
+    def __render_loop(self):
         """
-        The main render loop, updates at a fixed or uncapped frame rate
+        The main render loop, renders at a fixed or uncapped frame rate
         """
-        while not self.exited:
+        if self.Config.UNCAPPED_FPS:
             
-            if self.Config.UNCAPPED_FPS:
-                
-                self.__do_render()
-                
-            else:
-                self.StructTiming.current_frame_time = self.StructTiming.elapsed_times["render_loop"]
-                self.StructTiming.delta_frame_time += (self.StructTiming.current_frame_time - self.StructTiming.last_frame_time) / self.frame_time
-                self.StructTiming.last_frame_time = self.StructTiming.current_frame_time
-                
-                if self.StructTiming.draw_first_frame:
-                    self.__do_render()
-                    self.StructTiming.draw_first_frame = False
-                
-                if self.StructTiming.delta_frame_time >= 1:
-                    self.__do_render()
-                    self.StructTiming.delta_frame_time -= 1
-         
-            self.__get_fps()
+            self.__do_render()
             
-            await asyncio.sleep(0)
+        else:
+            self.StructTiming.current_frame_time = self.StructTiming.elapsed_times["render_loop"]
+            self.StructTiming.delta_frame_time += (self.StructTiming.current_frame_time - self.StructTiming.last_frame_time) / self.frame_time
+            self.StructTiming.last_frame_time = self.StructTiming.current_frame_time
+            
+            if self.StructTiming.draw_first_frame:
+                self.__do_render()
+                self.StructTiming.draw_first_frame = False
             
+            if self.StructTiming.delta_frame_time >= 1:
+                self.__do_render()
+                self.StructTiming.delta_frame_time -= 1
+
+        self.__get_fps()
+
     def __do_tick(self, four):
         """
         Peform one tick of the game logic
@@ -234,8 +210,7 @@ class Core():
         """
         Render a single frame of the game
         """
-        self.__get_key_dict()
-        self.render.render_frame(self.key_dict, self.StructDebug.debug_dict)
+        self.render.render_frame(self.handling.key_dict, self.StructDebug.debug_dict)
         self.render_clock.tick()
                
     def __exit(self):
@@ -243,6 +218,7 @@ class Core():
         Exit the game
         """
         self.exited = True
+        self.scheduler.stop()
         pygame.quit()
         
     def __get_tps(self):
@@ -408,110 +384,96 @@ class Core():
         """
         self.StructDebug.DEBUG = not self.StructDebug.DEBUG
     
-    async def __get_debug_info(self):
+    def __get_debug_info(self):
         """
         Fetch the debug information for the debug menu
         """
-        while not self.exited:
-            if self.StructDebug.DEBUG:
-                    self.__calc_average_FPS()
-                    self.__calc_render_time_avg()
+        if self.StructDebug.DEBUG:
+                self.__calc_average_FPS()
+                self.__calc_render_time_avg()
+                
+                self.__calc_average_TPS()
+                self.__calc_exe_time_avg()
+                
+                self.__calc_average_polling()
+                self.__calc_average_polling_t()
+                
+                self.StructDebug.debug_dict = {
+                    # fps debug
+                    'FPS': self.StructDebug.average_FPS,
+                    'FPS_RAW': self.FPS,
+                    'BEST_FPS': self.StructDebug.best_fps,
+                    'WORST_FPS': self.StructDebug.worst_fps,
                     
-                    self.__calc_average_TPS()
-                    self.__calc_exe_time_avg()
+                    # render time debug
+                    'REN_T': self.render_time_avg,
+                    'REN_T_RAW': self.StructTiming.iter_times["render_loop"],
+                    'BEST_REN_T': self.StructDebug.best_render_time,
+                    'WORST_REN_T': self.StructDebug.worst_render_time,
                     
-                    self.__calc_average_polling()
-                    self.__calc_average_polling_t()
+                    # tps debug
+                    'TPS': self.StructDebug.average_TPS,
+                    'TPS_RAW': self.TPS,
+                    'BEST_TPS': self.StructDebug.best_tps,
+                    'WORST_TPS': self.StructDebug.worst_tps,
                     
-                    self.StructDebug.debug_dict = {
-                        # fps debug
-                        'FPS': self.StructDebug.average_FPS,
-                        'FPS_RAW': self.FPS,
-                        'BEST_FPS': self.StructDebug.best_fps,
-                        'WORST_FPS': self.StructDebug.worst_fps,
-                        
-                        # render time debug
-                        'REN_T': self.render_time_avg,
-                        'REN_T_RAW': self.StructTiming.iter_times["render_loop"],
-                        'BEST_REN_T': self.StructDebug.best_render_time,
-                        'WORST_REN_T': self.StructDebug.worst_render_time,
-                        
-                        # tps debug
-                        'TPS': self.StructDebug.average_TPS,
-                        'TPS_RAW': self.TPS,
-                        'BEST_TPS': self.StructDebug.best_tps,
-                        'WORST_TPS': self.StructDebug.worst_tps,
-                        
-                        # tick time debug
-                        'SIM_T': self.StructDebug.tick_time,
-                        'SIM_T_RAW': self.StructTiming.iter_times["game_loop"],
-                        'BEST_SIM_T': self.StructDebug.best_tick_time,
-                        'WORST_SIM_T': self.StructDebug.worst_tick_time,
-                        
-                        # delta frame debug
-                        'DF': self.StructDebug.average_df,
-                        'DF_RAW': self.StructDebug.delta_tick,
-                        'BEST_DF': self.StructDebug.best_df,
-                        'WORST_DF': self.StructDebug.worst_df,
-                        
-                        # tick counter
-                        'TICKCOUNT': self.StructTiming.tick_counter,
+                    # tick time debug
+                    'SIM_T': self.StructDebug.tick_time,
+                    'SIM_T_RAW': self.StructTiming.iter_times["game_loop"],
+                    'BEST_SIM_T': self.StructDebug.best_tick_time,
+                    'WORST_SIM_T': self.StructDebug.worst_tick_time,
+                    
+                    # delta frame debug
+                    'DF': self.StructDebug.average_df,
+                    'DF_RAW': self.StructDebug.delta_tick,
+                    'BEST_DF': self.StructDebug.best_df,
+                    'WORST_DF': self.StructDebug.worst_df,
+                    
+                    # tick counter
+                    'TICKCOUNT': self.StructTiming.tick_counter,
+
+                    'POLLING_RATE': self.StructDebug.average_polling,
+                    'POLLING_RATE_RAW': self.StructDebug.POLLING_RATE,
+                    'BEST_POLLING_RATE': self.StructDebug.best_polling,
+                    'WORST_POLLING_RATE': self.StructDebug.worst_polling,
+                    
+                    'POLLING_T': self.StructDebug.average_polling_t,
+                    'POLLING_T_RAW': self.StructTiming.iter_times["handle_events"],
+                    'BEST_POLLING_T': self.StructDebug.best_polling_t,
+                    'WORST_POLLING_T': self.StructDebug.worst_polling_t,
+                    
+                    'DAS_LEFT_COUNTER': self.handling.HandlingStruct.DAS_LEFT_COUNTER,
+                    'DAS_RIGHT_COUNTER': self.handling.HandlingStruct.DAS_RIGHT_COUNTER,
+                    'DAS': self.handling.Config.HANDLING_SETTINGS['DAS'],
+                    
+                    'ARR_LEFT_COUNTER': self.handling.HandlingStruct.ARR_LEFT_COUNTER,
+                    'ARR_RIGHT_COUNTER': self.handling.HandlingStruct.ARR_RIGHT_COUNTER,
+                    'ARR': self.handling.Config.HANDLING_SETTINGS['ARR'],
+                    
+                    'DCD': self.handling.Config.HANDLING_SETTINGS['DCD'],
+                    'SDF': self.handling.Config.HANDLING_SETTINGS['SDF'],
+                    
+                    'DAS_CANCEL': self.handling.Config.HANDLING_SETTINGS['DASCancel'],
+                    'PREVHD': self.handling.Config.HANDLING_SETTINGS['PrevAccHD'],
+                    'PREFSD': self.handling.Config.HANDLING_SETTINGS['PrefSD'],
+                    
+                    'PRIORIDIR': self.handling.Config.HANDLING_SETTINGS['PrioriDir'],
+                    'DIR': self.handling.HandlingStruct.dir_priority,
+                    
+                    'GRAVITY': self.GameInstanceStruct.gravity,
+                    'GRAV_COUNTER': self.GameInstanceStruct.gravity_counter,
+                    'G_IN_TICKS': self.GameInstanceStruct.G_units_in_ticks,
+                    'ON_FLOOR': self.GameInstanceStruct.current_tetromino.is_on_floor() if self.GameInstanceStruct.current_tetromino else False,
+                    'G_MULTI': self.GameInstanceStruct.soft_drop_factor,
+                    'LOCK_DELAY': self.GameInstanceStruct.lock_delay,
+                    'LOCK_DELAY_COUNTER': self.GameInstanceStruct.current_tetromino.lock_delay_counter if self.GameInstanceStruct.current_tetromino else 0,
+                    'LOCK_DELAY_TICKS': self.GameInstanceStruct.lock_delay_in_ticks,
+                    'MAX_MOVES': self.GameInstanceStruct.current_tetromino.max_moves_before_lock if self.GameInstanceStruct.current_tetromino else 0,
+                    'LOWEST_PIVOT': self.GameInstanceStruct.current_tetromino.lowest_pivot_position if self.GameInstanceStruct.current_tetromino else 0,
+                }
+        else:
+            self.StructDebug.debug_dict = None
 
-                        'POLLING_RATE': self.StructDebug.average_polling,
-                        'POLLING_RATE_RAW': self.StructDebug.POLLING_RATE,
-                        'BEST_POLLING_RATE': self.StructDebug.best_polling,
-                        'WORST_POLLING_RATE': self.StructDebug.worst_polling,
-                        
-                        'POLLING_T': self.StructDebug.average_polling_t,
-                        'POLLING_T_RAW': self.StructTiming.iter_times["handle_events"],
-                        'BEST_POLLING_T': self.StructDebug.best_polling_t,
-                        'WORST_POLLING_T': self.StructDebug.worst_polling_t,
-                        
-                        'DAS_LEFT_COUNTER': self.handling.HandlingStruct.DAS_LEFT_COUNTER,
-                        'DAS_RIGHT_COUNTER': self.handling.HandlingStruct.DAS_RIGHT_COUNTER,
-                        'DAS': self.handling.Config.HANDLING_SETTINGS['DAS'],
-                        
-                        'ARR_LEFT_COUNTER': self.handling.HandlingStruct.ARR_LEFT_COUNTER,
-                        'ARR_RIGHT_COUNTER': self.handling.HandlingStruct.ARR_RIGHT_COUNTER,
-                        'ARR': self.handling.Config.HANDLING_SETTINGS['ARR'],
-                        
-                        'DCD': self.handling.Config.HANDLING_SETTINGS['DCD'],
-                        'SDF': self.handling.Config.HANDLING_SETTINGS['SDF'],
-                        
-                        'DAS_CANCEL': self.handling.Config.HANDLING_SETTINGS['DASCancel'],
-                        'PREVHD': self.handling.Config.HANDLING_SETTINGS['PrevAccHD'],
-                        'PREFSD': self.handling.Config.HANDLING_SETTINGS['PrefSD'],
-                        
-                        'PRIORIDIR': self.handling.Config.HANDLING_SETTINGS['PrioriDir'],
-                        'DIR': self.handling.HandlingStruct.dir_priority,
-                        
-                        'GRAVITY': self.GameInstanceStruct.gravity,
-                        'GRAV_COUNTER': self.GameInstanceStruct.gravity_counter,
-                        'G_IN_TICKS': self.GameInstanceStruct.G_units_in_ticks,
-                        'ON_FLOOR': self.GameInstanceStruct.current_tetromino.is_on_floor() if self.GameInstanceStruct.current_tetromino else False,
-                        'G_MULTI': self.GameInstanceStruct.soft_drop_factor,
-                        'LOCK_DELAY': self.GameInstanceStruct.lock_delay,
-                        'LOCK_DELAY_COUNTER': self.GameInstanceStruct.current_tetromino.lock_delay_counter if self.GameInstanceStruct.current_tetromino else 0,
-                        'LOCK_DELAY_TICKS': self.GameInstanceStruct.lock_delay_in_ticks,
-                        'MAX_MOVES': self.GameInstanceStruct.current_tetromino.max_moves_before_lock if self.GameInstanceStruct.current_tetromino else 0,
-                        'LOWEST_PIVOT': self.GameInstanceStruct.current_tetromino.lowest_pivot_position if self.GameInstanceStruct.current_tetromino else 0,
-                    }
-            else:
-                self.StructDebug.debug_dict = None
-        
-            await asyncio.sleep(0)
-        
-    def __get_key_dict(self):
-        self.key_dict = {
-            'KEY_LEFT': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.MOVE_LEFT]),
-            'KEY_RIGHT': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.MOVE_RIGHT]),
-            'KEY_CLOCKWISE': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.ROTATE_CLOCKWISE]),
-            'KEY_COUNTERCLOCKWISE': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.ROTATE_COUNTERCLOCKWISE]),
-            'KEY_180': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.ROTATE_180]),
-            'KEY_HARD_DROP' : all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.HARD_DROP]),
-            'KEY_SOFT_DROP': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.SOFT_DROP]),
-            'KEY_HOLD': all(self.handling.key_states[key]['current'] for key in self.handling.Config.key_bindings[Action.HOLD]),
-        }
 class Clock:
     def __init__(self, max_entries = 10):
         """
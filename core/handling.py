@@ -1,35 +1,22 @@
-from enum import Enum, auto
 import pygame as pygame
-from collections import deque
+from instance.action import Action
+from core.action_buffer import ActionBuffer
+
+KEY_DICT_ACTIONS = { # the actions of the keys drawn by the renderer
+    'KEY_LEFT': Action.MOVE_LEFT,
+    'KEY_RIGHT': Action.MOVE_RIGHT,
+    'KEY_CLOCKWISE': Action.ROTATE_CLOCKWISE,
+    'KEY_COUNTERCLOCKWISE': Action.ROTATE_COUNTERCLOCKWISE,
+    'KEY_180': Action.ROTATE_180,
+    'KEY_HARD_DROP': Action.HARD_DROP,
+    'KEY_SOFT_DROP': Action.SOFT_DROP,
+    'KEY_HOLD': Action.HOLD,
+}
 
-class Action(Enum):
-    """
-    Actions that can be performed
-    """
-    MOVE_LEFT = auto()
-    MOVE_RIGHT = auto()
-    ROTATE_CLOCKWISE = auto()
-    ROTATE_COUNTERCLOCKWISE = auto()
-    ROTATE_180 = auto()
-    HARD_DROP = auto()
-    SOFT_DROP = auto()
-    HOLD = auto()
-    
-    # ARR == 0 behaviour
-    SONIC_LEFT = auto()
-    SONIC_RIGHT = auto()
-    
-    # inf SDF behaviour
-    SONIC_DROP = auto()
-    
-    # ARR == 0 & inf SDF behaviour
-    SONIC_LEFT_DROP = auto()
-    SONIC_RIGHT_DROP = auto()
-    
 class Handling():
     def __init__(self, Config, HandlingStruct):
         """
-        Handle the key inputs and provide the actions to the game loop in a queue.
+        Handle the key inputs and provide the actions to the game loop in a buffer of the actions for each tick.
         
         args:	
             config (Config): The game configuration
@@ -38,7 +25,7 @@ class Handling():
             before_loop_hook(key): Hook that is called within the game loop before the tick is executed to obtain the current action states to be used in the game loop
             on_key_press(key): Handle the key press event
             on_key_release(key): Handle the key release event
-            consume_action(): Consume the oldset action in the queue
+            consume_actions(tick): Consume the actions to perform on a tick
         """
         
         self.Config = Config
@@ -46,14 +33,24 @@ class Handling():
         self.polling_tick_time = 1 / self.Config.POLLING_RATE
      
         self.actions = self.__GetEmptyActions()
-        self.action_queue = deque()
+        self.action_buffer = ActionBuffer(self.HandlingStruct.buffer_threshold)
+        
+        self.key_bits = {} # the bit of each bound key in the key states
         
-        self.key_states = {
-            key: {'current': False, 'previous': False}
+        for keys in self.Config.key_bindings.values():
+            for key in keys:
+                self.key_bits.setdefault(key, 1 << len(self.key_bits))
+        
+        self.action_masks = { # the bits of the keys bound to each action, including the derived sonic bindings
+            action: sum(set(self.key_bits[key] for key in keys))
             for action, keys in self.Config.key_bindings.items()
-            for key in keys
         }
         
+        self.current_keys = 0 # bitset of the keys that are down
+        self.previous_keys = 0 # bitset of the keys that were down when the key states were last forwarded
+        
+        self.key_dict = {name: False for name in KEY_DICT_ACTIONS} # whether the keys drawn by the renderer are down, updated as the keys change
+        
         self.direction_of_action = {
             Action.MOVE_LEFT: 'left',
             Action.MOVE_RIGHT: 'right',
@@ -68,19 +65,19 @@ class Handling():
         Return an empty actions dictionary
         """
         return {
-            Action.MOVE_LEFT:                   {'state': False, 'timestamp': 0}, 
-            Action.MOVE_RIGHT:                  {'state': False, 'timestamp': 0},
-            Action.ROTATE_CLOCKWISE:            {'state': False, 'timestamp': 0},
-            Action.ROTATE_COUNTERCLOCKWISE:     {'state': False, 'timestamp': 0},
-            Action.ROTATE_180:                  {'state': False, 'timestamp': 0},
-            Action.HARD_DROP:                   {'state': False, 'timestamp': 0},
-            Action.SOFT_DROP:                   {'state': False, 'timestamp': 0},
-            Action.HOLD:                        {'state': False, 'timestamp': 0},
-            Action.SONIC_LEFT:                  {'state': False, 'timestamp': 0},
-            Action.SONIC_RIGHT:                 {'state': False, 'timestamp': 0},
-            Action.SONIC_DROP:                  {'state': False, 'timestamp': 0},
-            Action.SONIC_LEFT_DROP:             {'state': False, 'timestamp': 0},
-            Action.SONIC_RIGHT_DROP:            {'state': False, 'timestamp': 0}
+            Action.MOVE_LEFT:                   {'state': False, 'tick': 0}, 
+            Action.MOVE_RIGHT:                  {'state': False, 'tick': 0},
+            Action.ROTATE_CLOCKWISE:            {'state': False, 'tick': 0},
+            Action.ROTATE_COUNTERCLOCKWISE:     {'state': False, 'tick': 0},
+            Action.ROTATE_180:                  {'state': False, 'tick': 0},
+            Action.HARD_DROP:                   {'state': False, 'tick': 0},
+            Action.SOFT_DROP:                   {'state': False, 'tick': 0},
+            Action.HOLD:                        {'state': False, 'tick': 0},
+            Action.SONIC_LEFT:                  {'state': False, 'tick': 0},
+            Action.SONIC_RIGHT:                 {'state': False, 'tick': 0},
+            Action.SONIC_DROP:                  {'state': False, 'tick': 0},
+            Action.SONIC_LEFT_DROP:             {'state': False, 'tick': 0},
+            Action.SONIC_RIGHT_DROP:            {'state': False, 'tick': 0}
         }
     
     def before_loop_hook(self):
@@ -89,7 +86,7 @@ class Handling():
         """
         self.__get_actions() # has to be before the key states are forwarded or toggled actions will not be detected (can't belive this took 2 hours to figure out)
         self.__forward_key_states()     
-        return self.action_queue
+        return self.action_buffer
     
     def __get_actions(self):
         """
@@ -124,8 +121,7 @@ class Handling():
         """
         Forward the key states for comaprison in the future (allows for toggle/hold detection)
         """
-        for k in self.key_states:
-            self.key_states[k]['previous'] = self.key_states[k]['current']
+        self.previous_keys = self.current_keys
     
     def __is_action_toggled(self, action:Action):
         """
@@ -134,7 +130,8 @@ class Handling():
         args:
             action (Action): The action to be performed
         """
-        return all(self.key_states[key]['current'] and not self.key_states[key]['previous'] for key in self.Config.key_bindings[action])
+        mask = self.action_masks[action]
+        return self.current_keys & ~self.previous_keys & mask == mask
     
     def __is_action_down(self, action:Action):
         """
@@ -145,7 +142,8 @@ class Handling():
         returns:
             bool: True if the action is down, False otherwise
         """
-        return all(self.key_states[key]['current'] for key in self.Config.key_bindings[action])
+        mask = self.action_masks[action]
+        return self.current_keys & mask == mask
     
     def __is_direction_down(self, direction: str) -> bool:
         """
@@ -171,7 +169,7 @@ class Handling():
             state (bool): The state of the action
         """
         self.actions[action]['state'] = state
-        self.actions[action]['timestamp'] = self.HandlingStruct.current_time
+        self.actions[action]['tick'] = self.HandlingStruct.current_tick
     
     def __do_DAS_tick(self):
         if self.Config.HANDLING_SETTINGS['DASCancel']:
@@ -265,16 +263,7 @@ class Handling():
             key (pygame.key): The key object
         """
         
-        keyinfo = self.__get_key_info(key)
-        
-        try:
-            KeyEntry = self.key_states[keyinfo]
-            if KeyEntry:
-                KeyEntry['previous'] = KeyEntry['current']
-                KeyEntry['current'] = True
-          
-        except KeyError:
-            return
+        self.__set_key_state(self.__get_key_info(key), True)
     
     def on_key_release(self, key:pygame.key):
         """
@@ -284,16 +273,27 @@ class Handling():
             key (pygame.key): The key object
         """
         
-        keyinfo = self.__get_key_info(key)
+        self.__set_key_state(self.__get_key_info(key), False)
+    
+    def __set_key_state(self, key, state:bool):
+        """
+        Set the state of a key, keeping its previous state, and update the key dict
         
-        try:
-            KeyEntry = self.key_states[keyinfo]
-            if KeyEntry:
-                KeyEntry['previous'] = KeyEntry['current']
-                KeyEntry['current'] = False
-             
-        except KeyError:
-            return  
+        args:
+            key: The key info
+            state (bool): Whether the key is down
+        """
+        bit = self.key_bits.get(key)
+        
+        if bit is None:
+            return
+        
+        self.previous_keys = self.previous_keys & ~bit | self.current_keys & bit
+        self.current_keys = self.current_keys | bit if state else self.current_keys & ~bit
+        
+        for name, action in KEY_DICT_ACTIONS.items():
+            mask = self.action_masks[action]
+            self.key_dict[name] = self.current_keys & mask == mask
         
     def __get_action_buffer(self):
         """
@@ -308,22 +308,24 @@ class Handling():
                 else:
                     self.__queue_action(action)
                                  
-    def consume_action(self):
+    def consume_actions(self, tick:int):
         """
-        Consume the oldset action from the queue
+        Consume the actions to perform on a tick
+        
+        args:
+            tick (int): The tick being performed
         """
-        if self.action_queue:
-            return self.action_queue.popleft()  
-        return None
+        return self.action_buffer.take(tick)
     
     def __queue_action(self, action:Action):
         """
-        Add an action to the queue
+        Add an action to the buffer on the tick of the current poll, the sonic actions of DAS are never given a state so 
+        are not stamped
         
         args:
-            action (Action): The action to add to the queue
+            action (Action): The action to add to the buffer
         """
-        self.action_queue.append(({'action': action, 'timestamp': self.actions[action]['timestamp']}))
+        self.action_buffer.push(self.HandlingStruct.current_tick, action)
         
     def __do_DAS_ARR_LEFT(self, action:Action):
         """
@@ -0,0 +1,99 @@
+import time
+
+OVERSLEEP_DECAY = 0.9 # the fraction of the longest oversleep kept on each wait, so a rare late wake up is soon forgotten
+
+class Scheduler():
+    def __init__(self, spin_time:float = 0.0005):
+        """
+        Run periodic tasks at their deadlines from a single loop, sleeping until the earliest deadline instead of
+        spinning
+
+        The loop sleeps until just before the next deadline, as the sleep of the OS can wake up late by a fraction of a
+        millisecond, then spins for the rest so the task starts on time. How long before the deadline it wakes up
+        follows the longest recent oversleep, up to spin_time, so little time is spent spinning where the sleep is
+        accurate.
+
+        A task that has fallen behind runs once and its next deadline is moved on from the current time, tasks that 
+        must keep a fixed rate count the time that has passed since they last ran, as the game loop does.
+
+        A task with an interval of 0 runs on every pass of the loop, so the loop does not sleep while it is added.
+
+        A task that keeps its own deadlines, as the game loop does with its Timeline, returns the time.perf_counter()
+        time to run next from its callback, which replaces the interval.
+
+        args:
+            spin_time (float): The longest time before a deadline to stop sleeping and spin, in seconds
+
+        methods:
+            add(name, interval, callback): Add a task
+            run(): Run the tasks until stop() is called
+            stop(): Stop running the tasks
+            next_deadline(): Get the time of the earliest deadline
+        """
+        self.spin_time = spin_time
+        self.oversleep = spin_time # the longest recent time a sleep woke up late by
+        self.tasks = [] # [deadline, interval, name, callback] of each task
+        self.running = False
+
+    def add(self, name:str, interval:float, callback:callable):
+        """
+        Add a task, it first runs when the scheduler starts
+
+        args:
+            name (str): The name of the task
+            interval (float): The time between runs of the task, in seconds
+            callback (callable): The function to run, with no arguments, it may return the time of its next deadline
+        """
+        self.tasks.append([0, interval, name, callback])
+
+    def next_deadline(self):
+        """
+        Get the time.perf_counter() time of the earliest deadline
+        """
+        return min(task[0] for task in self.tasks)
+
+    def run(self):
+        """
+        Run the tasks until stop() is called
+        """
+        self.running = True
+        start = time.perf_counter()
+
+        for task in self.tasks:
+            task[0] = start
+
+        while self.running and self.tasks:
+            self.__wait(self.next_deadline())
+            now = time.perf_counter()
+
+            for task in self.tasks:
+                if task[0] > now:
+                    continue
+
+                next_deadline = task[3]()
+                task[0] = max(task[0] + task[1], now) if next_deadline is None else next_deadline
+
+                if not self.running:
+                    break
+
+    def stop(self):
+        """
+        Stop running the tasks, the task that called stop() is the last to run
+        """
+        self.running = False
+
+    def __wait(self, deadline:float):
+        """
+        Sleep until just before the deadline, then spin until it is reached
+        """
+        wake = deadline - self.oversleep
+        remaining = wake - time.perf_counter()
+
+        if remaining > 0:
+            time.sleep(remaining)
+            self.oversleep = min(max(time.perf_counter() - wake, self.oversleep * OVERSLEEP_DECAY), self.spin_time)
+        else: # too close to the deadline to sleep, decay the oversleep so the loop can not get stuck spinning
+            self.oversleep *= OVERSLEEP_DECAY
+
+        while time.perf_counter() < deadline:
+            pass
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+@dataclass
+class StructGameSummary():
+
+    seed: int = 0
+    rotation_system: str = 'SRS'
+
+    pieces: int = 0      # pieces locked into the matrix
+    lines: int = 0       # lines cleared
+    ticks: int = 0       # ticks stepped before the game ended or reached the tick limit
+    wall_time: float = 0 # seconds taken to run the game
+    game_over: bool = False
+    digest: str = ''     # hash of the final matrix, for determinism checks
+    run_key: str = ''    # hash of the settings of the sweep the game was played in, see SweepRunner
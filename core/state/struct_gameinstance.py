@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from utils import Vec2
-from instance.four import Queue
+from instance.queue import Queue
 from instance.matrix import Matrix
 
 @dataclass
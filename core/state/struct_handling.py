@@ -4,10 +4,8 @@ from core.handling import Action
 @dataclass
 class StructHandling():
     current_time: float = 0
+    current_tick: int = 0 # tick the inputs of the current poll are performed on
     prev_time: float = 0
-    delta_time: float = 0
-    last_tick_time: float = 0
-    do_first_tick: bool = True
     poll_tick_counter: int = 0
     poll_counter_last_cleared: float = 0
     current_direction: Action = None
@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+from typing import Dict
+
+@dataclass
+class StructSnapshot():
+
+    tick: int = 0
+    matrix: tuple = ()       # Matrix.snapshot()
+    queue: tuple = ()        # Queue.snapshot(), includes the state of the RNG
+    current_tetromino: object = None # copy of the current Tetromino, it shares the matrix of the engine
+    game_instance: Dict[str, object] = field(default_factory = dict) # the remaining fields of the StructGameInstance
+    flags: Dict[object, bool] = field(default_factory = dict)
@@ -5,9 +5,9 @@ from typing import Dict
 class StructTiming():
 
     current_time: float = 0
-    last_tick_time: float = 0
-    delta_time: float = 0
-    do_first_tick: bool = True
+    start_ns: int = 0 # time.perf_counter_ns() time tick 0 was due, see Timeline
+    tick: int = 0 # number of ticks run
+    dropped_ticks: int = 0 # number of ticks skipped as the game loop fell too far behind
     tick_counter: int = 0
     tick_counter_last_cleared: float = 0
 
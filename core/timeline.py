@@ -0,0 +1,84 @@
+import time
+
+NS_PER_SECOND = 1_000_000_000
+
+class Timeline():
+    def __init__(self, TPS:int, max_catch_up:int, TimingStruct):
+        """
+        Fixed timestep timeline of the game loop in integer nanoseconds from time.perf_counter_ns()
+
+        Tick k is due at start_ns + (k + dropped_ticks) / TPS seconds, found with integer arithmetic so which ticks
+        are due does not depend on rounding. An input is stamped with the next tick to run when it is polled and is
+        performed on that tick, however late the tick is run. Ticks are never run before they are due, so this is the
+        first tick not yet due unless the game loop has fallen behind, in which case it is the first of the ticks
+        still to catch up on, as the actions of held keys are made again on every tick.
+
+        If the game loop falls more than max_catch_up ticks behind, the extra ticks are dropped rather than run
+        back to back, so a stall can not make the game loop fall further behind each time it wakes up. The ticks
+        after a drop are numbered on from the last tick run.
+
+        args:
+            TPS (int): The ticks per second
+            max_catch_up (int): The maximum number of ticks to run each time the game loop wakes up
+            TimingStruct (StructTiming): The timing state, start_ns, tick and dropped_ticks are kept here
+
+        methods:
+            start(now): Start the timeline with tick 0 due now
+            tick_at(now): Get the index of the last tick that is due at a time
+            next_tick(): Get the tick an input polled now is performed on
+            due(now): Get the number of ticks to run now
+            deadline(): Get the time the next tick to run is due
+        """
+        self.TPS = TPS
+        self.max_catch_up = max_catch_up
+        self.TimingStruct = TimingStruct
+
+    def start(self, now:int = None):
+        """
+        Start the timeline with tick 0 due now
+
+        args:
+            now (int): The time.perf_counter_ns() time to start at, defaults to the current time
+        """
+        self.TimingStruct.start_ns = time.perf_counter_ns() if now is None else now
+        self.TimingStruct.tick = 0
+        self.TimingStruct.dropped_ticks = 0
+
+    def tick_at(self, now:int = None):
+        """
+        Get the index of the last tick that is due at a time, -1 before the timeline starts
+
+        args:
+            now (int): The time.perf_counter_ns() time, defaults to the current time
+        """
+        now = time.perf_counter_ns() if now is None else now
+        return (now - self.TimingStruct.start_ns) * self.TPS // NS_PER_SECOND - self.TimingStruct.dropped_ticks
+
+    def next_tick(self):
+        """
+        Get the tick an input polled now is performed on, the next tick to run
+        """
+        return self.TimingStruct.tick
+
+    def due(self, now:int = None):
+        """
+        Get the number of ticks to run now, at most max_catch_up, dropping the ticks past the cap.
+        The caller runs them and adds each one to TimingStruct.tick
+
+        args:
+            now (int): The time.perf_counter_ns() time, defaults to the current time
+        """
+        behind = self.tick_at(now) + 1 - self.TimingStruct.tick
+
+        if behind > self.max_catch_up:
+            self.TimingStruct.dropped_ticks += behind - self.max_catch_up
+            behind = self.max_catch_up
+
+        return max(behind, 0)
+
+    def deadline(self):
+        """
+        Get the time.perf_counter_ns() time the next tick to run is due
+        """
+        timeline_tick = self.TimingStruct.tick + self.TimingStruct.dropped_ticks
+        return self.TimingStruct.start_ns + -(-timeline_tick * NS_PER_SECOND // self.TPS) # rounded up so the tick is due at the deadline
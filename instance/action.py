@@ -0,0 +1,25 @@
+from enum import Enum, auto
+
+class Action(Enum):
+    """
+    Actions that can be performed
+    """
+    MOVE_LEFT = auto()
+    MOVE_RIGHT = auto()
+    ROTATE_CLOCKWISE = auto()
+    ROTATE_COUNTERCLOCKWISE = auto()
+    ROTATE_180 = auto()
+    HARD_DROP = auto()
+    SOFT_DROP = auto()
+    HOLD = auto()
+    
+    # ARR == 0 behaviour
+    SONIC_LEFT = auto()
+    SONIC_RIGHT = auto()
+    
+    # inf SDF behaviour
+    SONIC_DROP = auto()
+    
+    # ARR == 0 & inf SDF behaviour
+    SONIC_LEFT_DROP = auto()
+    SONIC_RIGHT_DROP = auto()
@@ -0,0 +1,526 @@
+import numpy as np
+from instance.action import Action
+from instance.rotation import RotationSystem, PIECE_CLASSES
+from instance.shape import PIECE_TABLE
+from instance.queue import Queue, BAG
+from core.state.struct_engine_config import StructEngineConfig
+from core.state.struct_gameinstance import StructGameInstance
+
+PIECE_TYPES = tuple(PIECE_TABLE.keys()) # piece index -> piece type, the colour value of a piece is its index + 1
+PIECE_INDEX = {type: idx for idx, type in enumerate(PIECE_TYPES)}
+PIECE_CELLS = np.array([[shape.cells for shape in PIECE_TABLE[type]] for type in PIECE_TYPES], dtype = np.int64) # [piece, state, cell, (dx, dy)]
+PIECE_VALUES = np.array([PIECE_TABLE[type][0].value for type in PIECE_TYPES], dtype = np.uint8)
+PIECE_KICK_CLASSES = np.array([PIECE_CLASSES[type] for type in PIECE_TYPES], dtype = np.int64)
+BAG_PIECES = np.array([PIECE_INDEX[type] for type in BAG], dtype = np.int64) # index in BAG -> piece index
+QUEUE_PIECES = 256 # the pieces of each queue made at first, doubled whenever a game reaches the end of its queue
+MAX_MOVES_BEFORE_LOCK = 15 # as Tetromino.max_moves_before_lock
+
+class BatchFour():
+    def __init__(self, seeds:list, config:StructEngineConfig = None, rotation_system:str = 'SRS', gravity:float = None, lock_delay:int = None):
+        """
+        Many games of Four stepped in lockstep, with the boards and pieces of every game held in NumPy arrays
+
+        The games follow the same rules as the Engine, with a gravity counter, a lock delay counter, the moves left
+        before the piece locks and the lowest row reached by the piece kept for each game. Given the same seeds,
+        actions, gravity and lock delay, every game matches an Engine with those GameInstanceStruct.gravity and
+        GameInstanceStruct.lock_delay. The queue of every game is made at once with Queue.sequences().
+
+        As with the Engine, the first piece spawns at the end of the first step, so the actions of the first step are ignored.
+
+        args:
+            seeds (list): The seed of the queue of each game
+            config (StructEngineConfig): The game configuration, the soft drop factor must be 'inf'
+            rotation_system (str): The rotation system to use
+            gravity (float): The gravity in blocks per 1/60th of a second, defaults to StructGameInstance.gravity
+            lock_delay (int): The lock delay in 1/60ths of a second or 'inf', defaults to StructGameInstance.lock_delay
+
+        methods:
+            step(actions): Advance every game by one tick
+            preview(count): Get the next pieces in the queue of each game
+        """
+        self.Config = config if config is not None else StructEngineConfig()
+
+        if self.Config.HANDLING_SETTINGS['SDF'] != 'inf':
+            raise ValueError(f"\033[31mBatchFour only supports an infinite soft drop factor!: {self.Config.HANDLING_SETTINGS['SDF']} \033[31m\033[0m")
+
+        self.gravity = StructGameInstance.gravity if gravity is None else gravity
+        self.lock_delay = StructGameInstance.lock_delay if lock_delay is None else lock_delay
+
+        if isinstance(self.gravity, str) or self.gravity < 0:
+            raise ValueError(f"\033[31mGravity must be a number of blocks per 1/60th of a second!: {self.gravity} \033[31m\033[0m")
+
+        if self.lock_delay != 'inf' and (isinstance(self.lock_delay, str) or self.lock_delay < 0):
+            raise ValueError(f"\033[31mLock delay must be a number of 1/60ths of a second or 'inf'!: {self.lock_delay} \033[31m\033[0m")
+
+        # converted to ticks the same way as Engine.__apply_gravity and Engine.__do_lock_delay
+        self.G_units_in_ticks = int(self.Config.TPS/(self.gravity * 60)) if 0 < self.gravity < 20 else None
+        self.lock_delay_in_ticks = 'inf' if self.lock_delay == 'inf' else int(self.lock_delay/60 * self.Config.TPS)
+
+        self.N = len(seeds)
+        self.WIDTH = self.Config.MATRIX_WIDTH
+        self.HEIGHT = self.Config.MATRIX_HEIGHT
+        self.PrefSD = self.Config.HANDLING_SETTINGS['PrefSD']
+
+        self.rotation_system = RotationSystem(rotation_system)
+        self.kicks, self.kick_counts = self.__compile_kicks(self.rotation_system.kicks)
+        self.spawn_pos = StructGameInstance.spawn_pos
+
+        self.seeds = np.asarray(seeds, dtype = np.int64)
+        self.queues = Queue.sequences(self.seeds, QUEUE_PIECES) # [game, piece] index in BAG of each piece of the queue
+        self.queue_position = np.zeros(self.N, dtype = np.int64) # the next piece of each queue
+
+        self.boards = np.zeros((self.N, self.HEIGHT, self.WIDTH), dtype = np.uint8)
+        self.piece = np.full(self.N, -1, dtype = np.int64) # piece index of the current piece of each game, -1 if there is no piece
+        self.state = np.zeros(self.N, dtype = np.int64)
+        self.x = np.zeros(self.N, dtype = np.int64)
+        self.y = np.zeros(self.N, dtype = np.int64)
+
+        self.gravity_counter = np.zeros(self.N, dtype = np.int64)
+        self.soft_dropping = np.full(self.N, StructGameInstance.soft_dropping, dtype = bool)
+        self.lock_delay_counter = np.zeros(self.N, dtype = np.int64)
+        self.max_moves_before_lock = np.full(self.N, MAX_MOVES_BEFORE_LOCK, dtype = np.int64)
+        self.lowest_y = np.zeros(self.N, dtype = np.int64) # the lowest row the piece has reached, lower rows have higher y
+
+        self.held = np.full(self.N, -1, dtype = np.int64)
+        self.can_hold = np.ones(self.N, dtype = bool)
+        self.game_over = np.zeros(self.N, dtype = bool)
+        self.lines_cleared = np.zeros(self.N, dtype = np.int64) # lines cleared on the last step
+
+        self.tick = 0
+
+    def __compile_kicks(self, kicks:tuple):
+        """
+        Pad the compiled kicks of the rotation system into an array
+
+        args:
+            kicks (tuple): The compiled kicks, kicks[piece_class][from_state][to_state] = ((x, y), ...)
+
+        returns:
+            kick_array (np.ndarray): [piece_class, from_state, to_state, kick, (x, y)]
+            kick_counts (np.ndarray): [piece_class, from_state, to_state] number of kicks of each rotation
+        """
+        max_kicks = max(len(to_kicks) for piece_class in kicks for from_kicks in piece_class for to_kicks in from_kicks)
+        kick_array = np.zeros((len(kicks), 4, 4, max_kicks, 2), dtype = np.int64)
+        kick_counts = np.zeros((len(kicks), 4, 4), dtype = np.int64)
+
+        for piece_class, class_kicks in enumerate(kicks):
+            for from_state in range(4):
+                for to_state in range(4):
+                    rotation_kicks = class_kicks[from_state][to_state]
+                    kick_counts[piece_class, from_state, to_state] = len(rotation_kicks)
+
+                    if rotation_kicks:
+                        kick_array[piece_class, from_state, to_state, :len(rotation_kicks)] = rotation_kicks
+
+        return kick_array, kick_counts
+
+    def step(self, actions):
+        """
+        Advance every game by one tick, games that are over are not changed
+
+        args:
+            actions (np.ndarray): The Action value to perform in each game, 0 for no action
+
+        returns:
+            lines_cleared (np.ndarray): The number of lines cleared in each game
+        """
+        actions = np.asarray(actions)
+        alive = ~self.game_over
+        active = (self.piece >= 0) & alive
+        self.lines_cleared[:] = 0
+
+        for action in (Action.MOVE_LEFT, Action.MOVE_RIGHT):
+            idx = np.flatnonzero(active & (actions == action.value))
+            self.__shift(idx, -1 if action is Action.MOVE_LEFT else 1, repeat = False)
+
+        for action in (Action.SONIC_LEFT, Action.SONIC_RIGHT):
+            idx = np.flatnonzero(active & (actions == action.value))
+            self.__shift(idx, -1 if action is Action.SONIC_LEFT else 1, repeat = True)
+
+        for action, turns in ((Action.ROTATE_CLOCKWISE, 1), (Action.ROTATE_COUNTERCLOCKWISE, 3), (Action.ROTATE_180, 2)):
+            idx = np.flatnonzero(active & (actions == action.value))
+            self.__rotate(idx, turns)
+
+        for action in (Action.SONIC_LEFT_DROP, Action.SONIC_RIGHT_DROP):
+            idx = np.flatnonzero(active & (actions == action.value))
+            self.__shift_and_drop(idx, -1 if action is Action.SONIC_LEFT_DROP else 1)
+
+        idx = np.flatnonzero(active & np.isin(actions, (Action.SONIC_DROP.value, Action.HARD_DROP.value)))
+        self.y[idx] += self.__drop_distance(idx)
+
+        hard_dropped = np.flatnonzero(active & (actions == Action.HARD_DROP.value))
+        self.__lock(hard_dropped)
+
+        idx = np.flatnonzero(active & (actions == Action.HOLD.value) & self.can_hold)
+        self.__hold(idx)
+
+        if self.gravity == 20: # the Engine moves the piece to the floor after each action at 20G
+            idx = np.flatnonzero(active & (actions != 0) & (self.piece >= 0))
+            self.y[idx] += self.__drop_distance(idx)
+
+        idx = np.flatnonzero(active & (self.piece >= 0)) # a game that topped out when holding keeps its piece for the rest of the tick, as with the Engine
+        self.__apply_gravity(idx, actions[idx] == Action.SOFT_DROP.value)
+        self.__reset_lock_delay_lower(idx)
+
+        locked = self.__do_lock_delay(idx)
+        self.__clear_lines(np.concatenate((hard_dropped, locked)))
+
+        self.__spawn(np.flatnonzero(alive & (self.piece < 0)), self.__next_pieces)
+        self.tick += 1
+
+        return self.lines_cleared
+
+    def preview(self, count:int = None):
+        """
+        Get the next pieces in the queue of each game
+
+        args:
+            count (int): The number of pieces, defaults to the length of the preview
+
+        returns:
+            pieces (np.ndarray): [game, piece] piece index of each of the next pieces
+        """
+        count = self.Config.QUEUE_LENGTH if count is None else count
+        positions = self.queue_position[:, None] + np.arange(count)
+        self.__extend_queues(positions.max(initial = -1))
+
+        return BAG_PIECES[np.take_along_axis(self.queues, positions, axis = 1)]
+
+    def __cells(self, idx, state, x, y):
+        """
+        Get the matrix coordinates of the cells of the current piece of each game in a pose
+
+        args:
+            idx (np.ndarray): The games
+            state (np.ndarray): The rotation state of the piece of each game
+            x (np.ndarray): The x position of the piece of each game
+            y (np.ndarray): The y position of the piece of each game
+
+        returns:
+            cx, cy (np.ndarray, np.ndarray): [game, cell] x and y coordinates of the cells
+        """
+        cells = PIECE_CELLS[self.piece[idx], state]
+        return x[:, None] + cells[..., 0], y[:, None] + cells[..., 1]
+
+    def __collides(self, idx, state, x, y):
+        """
+        Test if the current piece of each game collides with the matrix bounds or the placed blocks in a pose,
+        matching Matrix.collides (row 0 is treated as out of bounds)
+
+        args:
+            idx (np.ndarray): The games
+            state (np.ndarray): The rotation state of the piece of each game
+            x (np.ndarray): The x position of the piece of each game
+            y (np.ndarray): The y position of the piece of each game
+
+        returns:
+            (np.ndarray): True for the games where the piece collides
+        """
+        cx, cy = self.__cells(idx, state, x, y)
+        out_of_bounds = (cx < 0) | (cx >= self.WIDTH) | (cy <= 0) | (cy >= self.HEIGHT)
+        occupied = self.boards[idx[:, None], np.clip(cy, 0, self.HEIGHT - 1), np.clip(cx, 0, self.WIDTH - 1)] != 0
+
+        return (out_of_bounds | occupied).any(axis = 1)
+
+    def __drop_distance(self, idx):
+        """
+        Get the number of rows the current piece of each game can fall before it lands
+
+        args:
+            idx (np.ndarray): The games
+
+        returns:
+            (np.ndarray): The drop distance of each game
+        """
+        if idx.size == 0:
+            return np.zeros(0, dtype = np.int64)
+
+        cx, cy = self.__cells(idx, self.state[idx], self.x[idx], self.y[idx])
+        columns = self.boards[idx[:, None], :, cx] != 0 # [game, cell, row] occupancy of the column of each cell
+        below = columns & (np.arange(self.HEIGHT) > cy[..., None])
+        landing = np.where(below.any(axis = 2), below.argmax(axis = 2), self.HEIGHT)
+
+        return (landing - cy - 1).min(axis = 1)
+
+    def __on_floor(self, idx):
+        """
+        Test if the current piece of each game is resting on the floor or the placed blocks
+
+        args:
+            idx (np.ndarray): The games
+
+        returns:
+            (np.ndarray): True for the games where the piece can not move down
+        """
+        return self.__collides(idx, self.state[idx], self.x[idx], self.y[idx] + 1)
+
+    def __shift(self, idx, dx:int, repeat:bool):
+        """
+        Move the current piece of each game sideways by one column, or as far as it can go
+
+        args:
+            idx (np.ndarray): The games
+            dx (int): The direction to move in
+            repeat (bool): Keep moving until the piece is blocked
+        """
+        while idx.size:
+            blocked = self.__collides(idx, self.state[idx], self.x[idx] + dx, self.y[idx])
+            idx = idx[~blocked]
+
+            if not repeat:
+                self.__reset_lock_delay_valid_movement(idx, self.__on_floor(idx)) # a move tests the floor before moving, a sonic move after each step
+                self.x[idx] += dx
+                return
+
+            self.x[idx] += dx
+            self.__reset_lock_delay_valid_movement(idx, self.__on_floor(idx))
+
+    def __shift_and_drop(self, idx, dx:int):
+        """
+        Move the current piece of each game sideways and down as far as it can go, in the order given by PrefSD
+
+        args:
+            idx (np.ndarray): The games
+            dx (int): The direction to move in
+        """
+        while idx.size:
+            if self.PrefSD:
+                distance = self.__drop_distance(idx)
+                self.y[idx] += distance
+
+                blocked = self.__collides(idx, self.state[idx], self.x[idx] + dx, self.y[idx])
+                moved = idx[~blocked]
+                self.__reset_lock_delay_valid_movement(moved, np.ones(moved.size, dtype = bool))
+                self.x[moved] += dx
+                idx = idx[(distance > 0) | ~blocked]
+            else:
+                blocked = self.__collides(idx, self.state[idx], self.x[idx] + dx, self.y[idx])
+                moved = idx[~blocked]
+                self.__reset_lock_delay_valid_movement(moved, self.__on_floor(moved))
+                self.x[moved] += dx
+
+                falling = idx[blocked]
+                falling = falling[~self.__collides(falling, self.state[falling], self.x[falling], self.y[falling] + 1)]
+                self.y[falling] += 1
+                idx = np.concatenate((idx[~blocked], falling))
+
+    def __rotate(self, idx, turns:int):
+        """
+        Rotate the current piece of each game, trying each kick of the rotation system in order
+
+        args:
+            idx (np.ndarray): The games
+            turns (int): The number of clockwise quarter turns
+        """
+        desired_state = (self.state[idx] + turns) % 4
+        rotation = (PIECE_KICK_CLASSES[self.piece[idx]], self.state[idx], desired_state)
+        kicks = self.kicks[rotation]
+        kick_counts = self.kick_counts[rotation]
+
+        pending = np.ones(idx.size, dtype = bool)
+
+        for k in range(self.kicks.shape[3]):
+            test = np.flatnonzero(pending & (kick_counts > k))
+
+            if test.size == 0:
+                break
+
+            games = idx[test]
+            x = self.x[games] + kicks[test, k, 0]
+            y = self.y[games] + kicks[test, k, 1]
+            fits = ~self.__collides(games, desired_state[test], x, y)
+
+            fit = test[fits]
+            self.__reset_lock_delay_valid_movement(idx[fit], self.__on_floor(idx[fit]))
+            self.state[idx[fit]] = desired_state[fit]
+            self.x[idx[fit]] = x[fits]
+            self.y[idx[fit]] = y[fits]
+            pending[fit] = False
+
+    def __apply_gravity(self, idx, soft_drop):
+        """
+        Move the current piece of each game down by gravity, or to the floor if it is soft dropped, as Engine.__apply_gravity
+
+        args:
+            idx (np.ndarray): The games
+            soft_drop (np.ndarray): True for the games that soft drop on this tick
+        """
+        self.soft_dropping[idx[soft_drop]] = True
+
+        on_floor = self.__on_floor(idx)
+        self.gravity_counter[idx[on_floor]] = 0
+        idx, soft_drop = idx[~on_floor], soft_drop[~on_floor]
+
+        self.gravity_counter[idx[self.soft_dropping[idx] & ~soft_drop]] = 0 # no time is left on the gravity counter after a soft drop
+        self.soft_dropping[idx] = False
+
+        instant = idx if self.gravity == 20 else idx[soft_drop]
+        self.y[instant] += self.__drop_distance(instant)
+
+        if self.G_units_in_ticks is None:
+            return
+
+        idx = idx[~soft_drop]
+        due = self.gravity_counter[idx] >= self.G_units_in_ticks
+        self.y[idx[due]] += 1
+        self.gravity_counter[idx[due]] = 0
+        self.gravity_counter[idx[~due]] += 1
+
+    def __do_lock_delay(self, idx):
+        """
+        Count the lock delay of the current piece of each game that is on the floor, and lock the piece when the
+        counter reaches the lock delay or when it lands with no moves left, as Engine.__do_lock_delay
+
+        args:
+            idx (np.ndarray): The games
+
+        returns:
+            locked (np.ndarray): The games where the piece locked
+        """
+        if self.lock_delay_in_ticks == 'inf':
+            return np.zeros(0, dtype = np.int64)
+
+        on_floor = self.__on_floor(idx)
+        self.lock_delay_counter[idx[on_floor]] += 1
+
+        locked = (self.lock_delay_counter[idx] >= self.lock_delay_in_ticks) | on_floor & (self.max_moves_before_lock[idx] == 0)
+        self.lock_delay_counter[idx[~on_floor]] = 0
+
+        locked = idx[locked]
+        self.__lock(locked)
+        return locked
+
+    def __reset_lock_delay_valid_movement(self, idx, on_floor):
+        """
+        Reset the lock delay of the current piece of each game after it moves or rotates, using up a move if it was on the floor
+
+        args:
+            idx (np.ndarray): The games
+            on_floor (np.ndarray): True for the games where the piece was on the floor
+        """
+        self.lock_delay_counter[idx] = 0
+        self.max_moves_before_lock[idx[on_floor]] -= 1
+
+    def __reset_lock_delay_lower(self, idx):
+        """
+        Reset the lock delay and the moves of the current piece of each game if it is lower than it has been before
+
+        args:
+            idx (np.ndarray): The games
+        """
+        idx = idx[self.y[idx] > self.lowest_y[idx]]
+        self.lowest_y[idx] = self.y[idx]
+        self.lock_delay_counter[idx] = 0
+        self.max_moves_before_lock[idx] = MAX_MOVES_BEFORE_LOCK
+
+    def __lock(self, idx):
+        """
+        Place the current piece of each game into its board
+
+        args:
+            idx (np.ndarray): The games
+        """
+        cx, cy = self.__cells(idx, self.state[idx], self.x[idx], self.y[idx])
+        self.boards[idx[:, None], cy, cx] = PIECE_VALUES[self.piece[idx]][:, None]
+        self.piece[idx] = -1
+
+    def __clear_lines(self, idx):
+        """
+        Remove the full lines of each board and move the rows above them down
+
+        args:
+            idx (np.ndarray): The games
+        """
+        full = (self.boards[idx] != 0).all(axis = 2)
+        cleared = full.sum(axis = 1)
+        idx, full, cleared = idx[cleared > 0], full[cleared > 0], cleared[cleared > 0]
+
+        if idx.size == 0:
+            return
+
+        order = np.argsort(~full, axis = 1, kind = 'stable') # cleared rows first, then the remaining rows in order
+        boards = self.boards[idx[:, None], order]
+        boards[np.arange(self.HEIGHT) < cleared[:, None]] = 0
+
+        self.boards[idx] = boards
+        self.lines_cleared[idx] = cleared
+
+    def __hold(self, idx):
+        """
+        Hold the current piece of each game and spawn the held piece, or the next piece if nothing is held
+
+        args:
+            idx (np.ndarray): The games
+        """
+        held = self.held[idx]
+        self.held[idx] = self.piece[idx]
+
+        def next_pieces(games):
+            pieces = held[np.searchsorted(idx, games)]
+            empty = pieces < 0
+            pieces[empty] = self.__next_pieces(games[empty])
+            return pieces
+
+        self.__spawn(idx, next_pieces)
+        self.can_hold[idx] = False
+
+    def __next_pieces(self, idx):
+        """
+        Take the next piece from the queue of each game
+
+        args:
+            idx (np.ndarray): The games
+        """
+        positions = self.queue_position[idx]
+        self.__extend_queues(positions.max(initial = -1))
+        self.queue_position[idx] += 1
+
+        return BAG_PIECES[self.queues[idx, positions]]
+
+    def __extend_queues(self, position:int):
+        """
+        Make the queues long enough to hold a piece, doubling their length until they do
+
+        args:
+            position (int): The position of the piece in the queue
+        """
+        pieces = self.queues.shape[1]
+
+        while pieces <= position:
+            pieces *= 2
+
+        if pieces > self.queues.shape[1]:
+            self.queues = Queue.sequences(self.seeds, pieces)
+
+    def __spawn(self, idx, next_pieces:callable):
+        """
+        Spawn the next piece of each game, the game is over if the piece collides when it spawns
+
+        args:
+            idx (np.ndarray): The games
+            next_pieces (callable): Get the piece index to spawn in each game
+        """
+        if idx.size == 0:
+            return
+
+        pieces = next_pieces(idx)
+        current = self.piece[idx]
+
+        self.piece[idx] = pieces
+        self.can_hold[idx] = True
+
+        x = np.where(pieces == PIECE_INDEX['O'], self.spawn_pos.x, self.spawn_pos.x - 1)
+        y = np.full(idx.size, self.spawn_pos.y - 1, dtype = np.int64)
+        state = np.zeros(idx.size, dtype = np.int64)
+        collides = self.__collides(idx, state, x, y)
+
+        spawned = idx[~collides]
+        self.state[spawned] = 0
+        self.x[spawned] = x[~collides]
+        self.y[spawned] = y[~collides]
+        self.lowest_y[spawned] = y[~collides]
+        self.lock_delay_counter[spawned] = 0
+        self.max_moves_before_lock[spawned] = MAX_MOVES_BEFORE_LOCK
+
+        self.piece[idx[collides]] = current[collides] # the piece that could not spawn is not kept, as with the Engine
+        self.game_over[idx[collides]] = True
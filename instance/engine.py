@@ -0,0 +1,698 @@
+import copy
+from enum import Enum, auto
+from instance.tetromino import Tetromino
+from instance.matrix import Matrix
+from instance.action import Action
+from instance.movegen import MoveGenerator
+from instance.zobrist import STATE_KEYS, POSITION_OFFSET, position_keys, queue_keys, piece_hash
+from instance.rotation import RotationSystem
+from instance.queue import Queue, RNG
+from core.state.struct_engine_config import StructEngineConfig
+from core.state.struct_gameinstance import StructGameInstance
+from core.state.struct_flags import StructFlags, set_flag_attr
+from core.state.struct_snapshot import StructSnapshot
+
+SNAPSHOT_OBJECTS = ('queue', 'matrix', 'current_tetromino') # fields of the game state that are snapshotted by their own objects
+
+class Event(Enum):
+    """
+    Events that can happen during a tick of the engine
+    """
+    SPAWN = auto()
+    HOLD = auto()
+    LOCK = auto()
+    LINE_CLEAR = auto()
+    ALL_CLEAR = auto()
+    GAME_OVER = auto()
+
+class Engine():
+    def __init__(self, seed:int = None, config:StructEngineConfig = None, rotation_system:str = 'SRS', GameInstanceStruct:StructGameInstance = None, FlagStruct:StructFlags = None, matrix_buffer = None):
+        """
+        The rules of the game of Four, independent of any window, timing or input handling.
+        
+        The engine owns the matrix, the queue and the current piece and advances them one tick at a time with the 
+        actions performed on that tick, as fast as the caller steps it.
+        
+        args:
+            seed (int): The seed of the queue, defaults to config.SEED
+            config (StructEngineConfig): The game configuration
+            rotation_system (str): The rotation system to use
+            GameInstanceStruct (StructGameInstance): The game state to use, a new one is created if not given
+            FlagStruct (StructFlags): The game flags to use, new ones are created if not given
+            matrix_buffer (buffer): A buffer to store the colour plane of the matrix in, see Matrix
+            
+        methods:
+            step(actions): Advance the game by one tick
+            step_idle(ticks): Advance the game by a number of ticks with no actions
+            snapshot(): Get a copy of the state of the game
+            restore(snapshot): Return the game to a state from snapshot()
+            placements(hold): Get every distinct resting placement of the current piece
+            hash(): Get the Zobrist hash of the game state
+        """
+        set_flag_attr()
+        
+        self.Config = config if config is not None else StructEngineConfig()
+        self.GameInstanceStruct = GameInstanceStruct if GameInstanceStruct is not None else StructGameInstance()
+        self.FlagStruct = FlagStruct if FlagStruct is not None else StructFlags()
+        self.seed = seed if seed is not None else self.Config.SEED
+       
+        self.rotation_system = RotationSystem(rotation_system)
+        self.kicks = self.rotation_system.kicks
+        self.move_generator = MoveGenerator(self.kicks)
+        self.rng = self.__init_rng()
+        self.matrix_buffer = matrix_buffer
+        
+        self.GameInstanceStruct.queue = self.__init_queue()
+        self.GameInstanceStruct.matrix = self.__init_matrix()
+        
+        self.tick = 0
+        self.actions_this_tick = []
+        self.events = []
+        self.cleared_lines = ()
+        
+        self.__queue_keys = queue_keys(self.Config.QUEUE_LENGTH)
+        self.__x_keys, self.__y_keys = position_keys(self.Config.MATRIX_WIDTH, self.Config.MATRIX_HEIGHT)
+        self.__update_piece_hash()
+        
+    def step(self, actions:list = ()):
+        """
+        Advance the game by one tick
+        
+        args:
+            actions (list): The actions to perform on this tick, in order
+            
+        returns:
+            events (list): The events that happened during the tick, in order
+        """
+        self.GameInstanceStruct.soft_drop_factor = 1
+        self.actions_this_tick = actions
+        self.events = []
+        self.cleared_lines = ()
+        
+        self.__get_next_state()
+        self.tick += 1
+        
+        return self.events
+    
+    def step_idle(self, ticks:int):
+        """
+        Advance the game by a number of ticks with no actions, giving the same result as calling step() for each tick.
+        
+        Runs of ticks where only the gravity or lock delay counter of the current piece changes are skipped by 
+        advancing the counter directly, every other tick is stepped normally.
+        
+        args:
+            ticks (int): The number of ticks to advance by
+            
+        returns:
+            events (list): The events that happened during the ticks, in order
+        """
+        events = []
+        end = self.tick + ticks
+        
+        while self.tick < end:
+            skip = self.__idle_ticks(end - self.tick)
+            
+            if skip > 0:
+                self.GameInstanceStruct.soft_drop_factor = 1
+                self.events = []
+                self.cleared_lines = ()
+                self.tick += skip
+            else:
+                events += self.step(())
+                
+        return events
+    
+    def snapshot(self):
+        """
+        Get a copy of the state of the game between two ticks: the matrix, the queue and its random number generator, 
+        the current piece, the hold piece, the gravity and lock delay counters and the flags
+        
+        returns:
+            snapshot (StructSnapshot): The state of the game
+        """
+        game_instance = {name: value for name, value in vars(self.GameInstanceStruct).items() if name not in SNAPSHOT_OBJECTS}
+        
+        return StructSnapshot(
+            tick = self.tick,
+            matrix = self.GameInstanceStruct.matrix.snapshot(),
+            queue = self.GameInstanceStruct.queue.snapshot(),
+            current_tetromino = copy.copy(self.GameInstanceStruct.current_tetromino),
+            game_instance = game_instance,
+            flags = dict(self.FlagStruct.FLAGS)
+        )
+    
+    def restore(self, snapshot:StructSnapshot):
+        """
+        Return the game to a state from snapshot(), the game state and flags are updated in place so anything 
+        sharing them sees the restored state
+        
+        args:
+            snapshot (StructSnapshot): The state of the game
+        """
+        self.GameInstanceStruct.matrix.restore(snapshot.matrix)
+        self.GameInstanceStruct.queue.restore(snapshot.queue)
+        self.GameInstanceStruct.current_tetromino = copy.copy(snapshot.current_tetromino) # copied so the snapshot can be restored again
+        
+        game_instance = vars(self.GameInstanceStruct)
+        
+        for name in [name for name in game_instance if name not in SNAPSHOT_OBJECTS]: # fields set after the snapshot fall back to their defaults
+            del game_instance[name]
+            
+        game_instance.update(snapshot.game_instance)
+        self.FlagStruct.FLAGS.update(snapshot.flags)
+        
+        self.tick = snapshot.tick
+        self.actions_this_tick = []
+        self.events = []
+        self.cleared_lines = ()
+        self.__update_piece_hash()
+    
+    def hash(self):
+        """
+        Get the Zobrist hash of the game state: the occupied cells of the matrix, the current piece and its pose, 
+        the hold piece and whether it can be used, and the pieces in the queue. The hash of the matrix and the pieces
+        are kept up to date as the game is played, only the pose of the current piece is added here.
+        
+        returns:
+            hash (int): 64 bit hash of the game state
+        """
+        hash = self.GameInstanceStruct.matrix.hash ^ self.piece_hash
+        tetromino = self.GameInstanceStruct.current_tetromino
+        
+        if tetromino is not None:
+            x, y = tetromino.position
+            hash ^= STATE_KEYS[tetromino.type][tetromino.state] ^ self.__x_keys[x + POSITION_OFFSET] ^ self.__y_keys[y + POSITION_OFFSET]
+            
+        return hash
+    
+    def __update_piece_hash(self):
+        """
+        Update the hash of the current piece type, the hold piece and the queue, these only change when a piece is 
+        taken from the queue or held
+        """
+        tetromino = self.GameInstanceStruct.current_tetromino
+        
+        self.piece_hash = piece_hash(
+            tetromino.type if tetromino is not None else None,
+            self.GameInstanceStruct.held_tetromino,
+            self.GameInstanceStruct.can_hold,
+            self.GameInstanceStruct.queue.preview(),
+            self.__queue_keys
+        )
+    
+    def placements(self, hold:bool = False):
+        """
+        Get every distinct resting placement of the current piece and the shortest sequence of actions that reaches it,
+        see MoveGenerator
+        
+        args:
+            hold (bool): Whether to also include the placements of the piece that would be spawned by holding
+            
+        returns:
+            placements (list): The Placement of each resting position
+        """
+        tetromino = self.GameInstanceStruct.current_tetromino
+        
+        if tetromino is None or self.FlagStruct.GAME_OVER:
+            return []
+        
+        matrix = self.GameInstanceStruct.matrix
+        x, y = tetromino.position
+        placements = self.move_generator.placements(matrix, tetromino.type, tetromino.state, x, y)
+        
+        if hold and self.GameInstanceStruct.can_hold:
+            held = self.GameInstanceStruct.held_tetromino
+            next_piece = held if held is not None else self.GameInstanceStruct.queue.view_queue(idx = 0)
+            
+            spawned = Tetromino(next_piece, 0, self.GameInstanceStruct.spawn_pos.x, self.GameInstanceStruct.spawn_pos.y, matrix)
+            x, y = spawned.position
+            placements += self.move_generator.placements(matrix, spawned.type, spawned.state, x, y, prefix = (Action.HOLD,), hold = True)
+            
+        return placements
+    
+    def __idle_ticks(self, limit:int):
+        """
+        Skip up to limit ticks with no actions where the only change to the game would be a counter of the current piece,
+        the tick that moves the piece down or locks it is never skipped
+        
+        args:
+            limit (int): The maximum number of ticks to skip
+            
+        returns:
+            skipped (int): The number of ticks skipped
+        """
+        tetromino = self.GameInstanceStruct.current_tetromino
+        
+        if self.FlagStruct.GAME_OVER: # nothing changes once the game is over
+            return limit
+        
+        if tetromino is None or self.GameInstanceStruct.soft_dropping:
+            return 0
+        
+        G = self.GameInstanceStruct.gravity
+        lock_delay = self.GameInstanceStruct.lock_delay
+        
+        lock_delay_in_ticks = 'inf' if lock_delay == 'inf' else int(lock_delay/60 * self.Config.TPS)
+        
+        if G == 20 or lock_delay_in_ticks != 'inf' and lock_delay_in_ticks <= 0:
+            return 0
+        
+        if tetromino.is_on_floor(): # only the lock delay counter counts up until the piece locks
+            if lock_delay == 'inf':
+                skip = limit
+            elif tetromino.max_moves_before_lock == 0:
+                return 0
+            else:
+                skip = min(limit, lock_delay_in_ticks - tetromino.lock_delay_counter - 1)
+            
+                if skip > 0:
+                    tetromino.lock_delay_counter += skip
+            
+            if skip > 0:
+                self.GameInstanceStruct.gravity_counter = 0
+                self.GameInstanceStruct.lock_delay_in_ticks = lock_delay_in_ticks
+                
+            return max(skip, 0)
+        
+        # only the gravity counter counts up until the piece moves down
+        if lock_delay_in_ticks != 'inf' and tetromino.lock_delay_counter >= lock_delay_in_ticks: # the piece locks on this tick
+            return 0
+        
+        G_units_in_ticks = 'inf' if G == 0 else int(self.Config.TPS/(G * 60))
+        
+        if G == 0:
+            skip = limit
+        else:
+            skip = min(limit, G_units_in_ticks - self.GameInstanceStruct.gravity_counter)
+            
+        if skip <= 0:
+            return 0
+        
+        if G != 0:
+            self.GameInstanceStruct.gravity_counter += skip
+            
+        if lock_delay != 'inf':
+            tetromino.lock_delay_counter = 0
+        
+        self.GameInstanceStruct.G_units_in_ticks = G_units_in_ticks
+        self.GameInstanceStruct.lock_delay_in_ticks = lock_delay_in_ticks
+            
+        return skip
+        
+    def __get_next_state(self):
+        """
+        Get the next state of the game
+        """
+        if not self.FlagStruct.GAME_OVER:
+        
+            self.__perform_actions()
+            self.__perform_gravity()
+            self.__do_lock_delay()
+            self.__clear_lines()
+            
+            if self.GameInstanceStruct.current_tetromino is None:
+                self.__get_next_piece(hold = False)
+            
+            if self.__is_row_17_empty():
+                self.__event_danger(False)
+            else:
+                self.__top_out_warn()
+                self.__event_danger(True)
+                
+    def __init_rng(self):
+        """
+        Create a random number generator
+        """
+        return RNG(self.seed)
+    
+    def __init_queue(self):
+        """
+        Create a queue of tetrominos
+        """
+        return Queue(self.rng, self.Config.QUEUE_LENGTH)
+    
+    def __init_matrix(self):
+        """
+        Create the game field
+        """
+        return Matrix(self.Config.MATRIX_WIDTH, self.Config.MATRIX_HEIGHT, self.matrix_buffer)
+    
+    def __update_current_tetromino(self):
+        """
+        Update the current tetromino in the matrix
+        """
+        
+        if self.GameInstanceStruct.current_tetromino is not None:
+            self.GameInstanceStruct.matrix.piece.set(self.GameInstanceStruct.current_tetromino.shape, self.GameInstanceStruct.current_tetromino.position.x, self.GameInstanceStruct.current_tetromino.position.y)
+            self.GameInstanceStruct.current_tetromino.ghost()
+            self.GameInstanceStruct.current_tetromino.reset_lock_delay_lower_pivot()
+            
+    def __get_next_piece(self, hold:bool):
+        """
+        Get the next piece from the queue and spawn it
+        
+        args:
+            hold (bool): Whether to hold the current piece
+        """
+        self.GameInstanceStruct.can_hold = True
+        
+        if hold is False:
+            next_piece = self.GameInstanceStruct.queue.get_next_piece()
+        else:
+            if self.GameInstanceStruct.held_tetromino is not None:
+                next_piece = self.GameInstanceStruct.held_tetromino
+                self.GameInstanceStruct.held_tetromino = self.GameInstanceStruct.current_tetromino.type
+                self.GameInstanceStruct.can_hold = False
+            else:
+                next_piece = self.GameInstanceStruct.queue.get_next_piece()
+                self.GameInstanceStruct.held_tetromino = self.GameInstanceStruct.current_tetromino.type
+                self.GameInstanceStruct.can_hold = False
+                
+        self.__spawn_piece(next_piece)
+        self.__update_piece_hash()
+            
+    def __spawn_piece(self, next_piece:str):
+        """
+        Spawn a new tetromino
+        
+        args:
+            next_piece (str): The type of the next tetromino
+        """
+        spawning_tetromino = Tetromino(next_piece, 0, self.GameInstanceStruct.spawn_pos.x, self.GameInstanceStruct.spawn_pos.y, self.GameInstanceStruct.matrix)
+        self.GameInstanceStruct.lock_delay_counter = 0
+        
+        if self.__check_spawn(spawning_tetromino):
+            self.GameInstanceStruct.current_tetromino = spawning_tetromino
+            self.__update_current_tetromino()
+            self.events.append(Event.SPAWN)
+        else:
+            self.FlagStruct.GAME_OVER = True
+            self.events.append(Event.GAME_OVER)
+        
+        self.__update_current_tetromino()
+    
+    def __check_spawn(self, spawning_tetromino):
+        """
+        Check if the tetromino can spawn in the matrix
+        """
+        if not spawning_tetromino.collision(spawning_tetromino.shape, spawning_tetromino.position):
+            return True
+    
+    def __clear_lines(self):
+        """
+        Clear full lines from the matrix
+        """
+        cleared_lines = self.GameInstanceStruct.matrix.clear_lines()
+        
+        if cleared_lines:
+            self.cleared_lines = cleared_lines
+            self.events.append(Event.LINE_CLEAR)
+            self.FlagStruct.ALL_CLEAR = self.GameInstanceStruct.matrix.is_perfect_clear()
+            
+            if self.FlagStruct.ALL_CLEAR:
+                self.events.append(Event.ALL_CLEAR)
+        # TODO: Implement scoring logic / t spin line clear detection
+    
+    def __move(self, action):
+        """
+        Move the current tetromino left or right
+        
+        args:
+            action (Action): The action to perform
+        """
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        self.GameInstanceStruct.current_tetromino.move(action)
+        self.__update_current_tetromino()
+        
+    def __rotate90(self, action):
+        """
+        Rotate the current tetromino by 90 degrees
+        
+        args:
+            action (Action): The action to perform
+        """
+        self.GameInstanceStruct.current_tetromino.rotate(action, self.kicks)
+        self.__update_current_tetromino()
+        
+    def __rotate180(self, action):
+        """
+        Rotate the current tetromino by 180 degrees
+        
+        args:
+            action (Action): The action to perform
+        """
+        self.GameInstanceStruct.current_tetromino.rotate(action, self.kicks)
+        self.__update_current_tetromino()
+        
+    def __hard_drop(self):
+        """
+        Hard drop the current tetromino
+        """
+        self.__move_to_floor()
+        self.__lock()
+        
+    def __soft_drop(self):
+        """
+        Soft drop the current tetromino
+        """
+        self.GameInstanceStruct.soft_dropping = True
+        self.GameInstanceStruct.soft_drop_factor = self.Config.HANDLING_SETTINGS['SDF']
+        self.__update_current_tetromino()
+    
+    def __sonic_move(self, action):
+        """
+        Move the current tetromino left or right with no lock delay
+        
+        args:
+            action (Action): The action to perform
+        """
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        self.GameInstanceStruct.current_tetromino.sonic_move(action)
+        self.__update_current_tetromino()
+        
+    def __sonic_drop(self):
+        """
+        Perform a sonic drop
+        """
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        self.__move_to_floor()
+        self.__update_current_tetromino()
+        
+    def __sonic_move_and_drop(self, action):
+        """
+        Move the current tetromino left or right with no lock delay and then hard drop
+        
+        args:
+            action (Action): The action to perform
+        """
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        self.GameInstanceStruct.current_tetromino.sonic_move_and_drop(action, self.Config.HANDLING_SETTINGS['PrefSD'])
+        self.__update_current_tetromino()
+    
+    def __hold(self):
+        """
+        Hold the current tetromino
+        """
+        if self.GameInstanceStruct.can_hold:
+            self.events.append(Event.HOLD)
+            self.__get_next_piece(hold = True)
+    
+    def __lock(self):
+        """
+        Lock the current tetromino
+        """
+        if self.GameInstanceStruct.current_tetromino is not None:
+            self.GameInstanceStruct.matrix.insert_blocks(self.GameInstanceStruct.current_tetromino.shape, self.GameInstanceStruct.current_tetromino.position, self.GameInstanceStruct.matrix.matrix)
+            self.GameInstanceStruct.matrix.clear_piece()
+            self.GameInstanceStruct.current_tetromino = None
+            self.events.append(Event.LOCK)
+    
+    def __perform_gravity(self):
+    
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        for action in self.actions_this_tick:
+            if action == Action.SOFT_DROP:
+                self.__soft_drop()
+            
+        self.__apply_gravity(self.GameInstanceStruct.gravity, self.GameInstanceStruct.soft_drop_factor)
+        self.__update_current_tetromino()
+           
+    def __perform_actions(self):
+        
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        for action in self.actions_this_tick:
+            match action:
+                case Action.MOVE_LEFT | Action.MOVE_RIGHT:
+                    self.__move(action)
+                
+                case Action.SONIC_LEFT | Action.SONIC_RIGHT:
+                    self.__sonic_move(action)
+                    
+                case Action.ROTATE_CLOCKWISE | Action.ROTATE_COUNTERCLOCKWISE:
+                    self.__rotate90(action)
+                        
+                case Action.ROTATE_180:
+                    self.__rotate180(action)
+                        
+                case Action.HARD_DROP:
+                    self.__hard_drop()
+                    
+                case Action.HOLD:
+                    self.__hold()
+                
+                case Action.SONIC_DROP:
+                    self.__sonic_drop()
+                
+                case Action.SONIC_LEFT_DROP | Action.SONIC_RIGHT_DROP:
+                    self.__sonic_move_and_drop(action)
+            
+            # if gravity is 20G gravity should be applied after every action, otherwise ARR of zero ignores gravity when moving over holes
+            if self.GameInstanceStruct.gravity == 20:
+                self.__move_to_floor()
+                   
+    def __is_row_17_empty(self):
+        """
+        Test if the 17th row is empty for top out warning
+        """
+        return self.GameInstanceStruct.matrix.row_counts[22] == 0
+                         
+    def __top_out_warn(self):
+        """
+        Activate the top out warning
+        """
+        if self.FlagStruct.GAME_OVER:
+            return
+        
+        next_piece = self.GameInstanceStruct.queue.view_queue(idx = 0)
+        
+        if self.GameInstanceStruct.matrix.danger.shape is not None and self.GameInstanceStruct.matrix.danger.shape.type == next_piece: # danger overlay already shows the next piece
+            return
+        
+        danger = Tetromino(next_piece, 0, 4, 18, self.GameInstanceStruct.matrix)
+        self.GameInstanceStruct.matrix.danger.set(danger.shape, danger.position.x, danger.position.y)
+        
+    def __event_danger(self, val:bool):
+        """
+        Toggle the danger flag
+        
+        args:
+            val (bool): The value to set the danger flag to
+        """
+        if val:
+            self.FlagStruct.DANGER = True
+        else:
+            self.FlagStruct.DANGER = False
+            
+    def __apply_gravity(self, G, soft_drop_factor = 1):
+        """
+        Apply gravity to the current tetromino
+        
+        args:
+            G (int): The gravity value in blocks per fractions of 1/60th of a second, i.e 1G = 1 block per 1/60th of a second
+            soft_drop_factor (int): The factor to scale the gravity by when soft dropping
+        """
+        if self.GameInstanceStruct.current_tetromino is None or self.GameInstanceStruct.current_tetromino.is_on_floor():
+            self.GameInstanceStruct.gravity_counter = 0
+            return
+        
+        if self.GameInstanceStruct.soft_dropping:
+            self.__reset_gravity_after_soft_drop()
+            
+        if soft_drop_factor == 'inf' or G == 20: # instant gravity
+            self.__move_to_floor()
+            return
+        
+        elif G == 0 and soft_drop_factor == 1: # do not pefrom gravity
+            self.GameInstanceStruct.G_units_in_ticks = 'inf'
+            return
+        else:
+            if G == 0 and soft_drop_factor != 1: # if G = 0 and soft dropping do gravity at level 1 speed
+                G = 1/60
+                
+            # convert G from units of blocks per 1/60 seconds to units of blocks per no. of ticks 
+            self.GameInstanceStruct.G_units_in_ticks = int(self.Config.TPS/((G * soft_drop_factor) * 60))
+            
+            if self.GameInstanceStruct.gravity_counter >= self.GameInstanceStruct.G_units_in_ticks:
+                self.__do_gravity()
+            else:
+                self.GameInstanceStruct.gravity_counter += 1
+            
+    def __do_gravity(self):
+        """
+        Do gravity on the current tetromino
+        """
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        self.GameInstanceStruct.current_tetromino.attempt_to_move_downwards()
+        self.GameInstanceStruct.gravity_counter = 0
+        
+    def __move_to_floor(self):
+        """
+        Move the current tetromino to the floor
+        """
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        self.GameInstanceStruct.current_tetromino.move_to_floor()
+            
+    def __reset_gravity_after_soft_drop(self):
+        """
+        Reset the gravity counter after a soft drop so there is no extra time left on the gravity counter
+        """
+        self.GameInstanceStruct.soft_dropping = False
+        if Action.SOFT_DROP not in self.actions_this_tick:
+            self.GameInstanceStruct.gravity_counter = 0
+    
+    def __do_lock_delay(self):
+        """
+        Increment the lock delay counter when the current tetromino is on the floor and lock it when the counter reaches the lock delay
+        
+        - Lock delay is reset every time a piece is moved or rotated (successfully) (the maximum amount of resets is 15 and every reset subtracts 1 from the total resets)
+        - If 15 resets are reached, the piece locks instantly on contact with the floor
+        - The move resets are replenished if the piece falls below its lowest position (given by the y coord of the center of rotation of the piece)
+        - Each ARR move counts as a reset (this is a bit weird when using 0 ARR but makes sense)
+        """
+        
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        if self.GameInstanceStruct.lock_delay == 'inf':
+            self.GameInstanceStruct.lock_delay_in_ticks = 'inf'
+            return
+        else: 
+            self.GameInstanceStruct.lock_delay_in_ticks = int(self.GameInstanceStruct.lock_delay/60 * self.Config.TPS) # convert from frames in 1/60th of a second to ticks in 1/self.config.TPS of a second
+        
+            if self.GameInstanceStruct.current_tetromino.is_on_floor():
+                self.GameInstanceStruct.current_tetromino.lock_delay_counter += 1
+                
+            if self.GameInstanceStruct.current_tetromino.lock_delay_counter >= self.GameInstanceStruct.lock_delay_in_ticks:
+                self.__lock()
+            
+            self.__do_lock_delay_reset()
+    
+    def __do_lock_delay_reset(self):
+        """
+        Reset the lock delay counter
+        """    
+        if self.GameInstanceStruct.current_tetromino is None:
+            return
+        
+        if not self.GameInstanceStruct.current_tetromino.is_on_floor(): # if the piece is not on the floor reset the lock delay counter
+            self.GameInstanceStruct.current_tetromino.lock_delay_counter = 0
+        
+        if self.GameInstanceStruct.current_tetromino.max_moves_before_lock == 0 and self.GameInstanceStruct.current_tetromino.is_on_floor(): # if the piece has reached the maximum amount of moves lock it on contact with the floor
+            self.__lock()
@@ -0,0 +1,337 @@
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from instance.action import Action
+from instance.engine import Engine
+from instance.matrix import Matrix
+from instance.batch import PIECE_INDEX, PIECE_VALUES
+from core.state.struct_engine_config import StructEngineConfig
+
+ACTIONS = (None,) + tuple(Action) # action index -> Action, 0 performs no action
+PIECE_CODES = {type: int(PIECE_VALUES[index]) for type, index in PIECE_INDEX.items()} # the colour value of each piece type, 0 is no piece
+
+def env_layout(num_envs:int, WIDTH:int, HEIGHT:int, queue_length:int):
+    """
+    Get where each array of a VectorEnv is stored in its buffer
+
+    args:
+        num_envs (int): The number of environments
+        WIDTH (int): The width of the matrix
+        HEIGHT (int): The height of the matrix
+        queue_length (int): The number of pieces in the queue
+
+    returns:
+        layout (dict): The (offset, dtype, shape) of each array
+        size (int): The size of the buffer in bytes
+    """
+    fields = (
+        ('matrix', np.uint8, (num_envs, Matrix.buffer_size(WIDTH, HEIGHT))), # the buffer of each Matrix
+        ('queue', np.uint8, (num_envs, queue_length)),
+        ('hold', np.uint8, (num_envs,)),
+        ('can_hold', np.bool_, (num_envs,)),
+        ('piece', np.int16, (num_envs, 4)), # colour value, rotation state, x and y of the current piece
+        ('actions', np.int16, (num_envs,)),
+        ('rewards', np.float32, (num_envs,)),
+        ('terminated', np.bool_, (num_envs,)),
+        ('truncated', np.bool_, (num_envs,)),
+    )
+
+    layout = {}
+    size = 0
+
+    for name, dtype, shape in fields:
+        size = -(-size // 8) * 8 # align every array to 8 bytes
+        layout[name] = (size, dtype, shape)
+        size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+    return layout, size
+
+def env_arrays(buffer, layout:dict):
+    """
+    Get the arrays of a VectorEnv as views of its buffer
+    """
+    return {name: np.ndarray(shape, dtype = dtype, buffer = buffer, offset = offset) for name, (offset, dtype, shape) in layout.items()}
+
+class EnvGroup():
+    def __init__(self, arrays:dict, start:int, stop:int, num_envs:int, config:StructEngineConfig, rotation_system:str, max_ticks:int):
+        """
+        The engines of a slice of the environments of a VectorEnv, run in a worker process or in the VectorEnv itself
+
+        The matrix of each engine is stored in the shared buffer, the rest of the observation is written to the
+        buffer after every step.
+
+        args:
+            arrays (dict): The arrays of every environment, from env_arrays()
+            start (int): The index of the first environment of the group
+            stop (int): The index after the last environment of the group
+            num_envs (int): The total number of environments
+            config (StructEngineConfig): The game configuration
+            rotation_system (str): The rotation system to use
+            max_ticks (int): The number of ticks a game is truncated at, or None
+
+        methods:
+            reset(seeds): Start a new game in every environment of the group
+            step(): Perform the action of each environment for one tick
+        """
+        self.arrays = {name: array[start:stop] for name, array in arrays.items()}
+        self.num_envs = num_envs
+        self.Config = config
+        self.rotation_system = rotation_system
+        self.max_ticks = max_ticks
+        self.engines = [None] * (stop - start)
+        self.seeds = [0] * (stop - start)
+
+    def reset(self, seeds:list):
+        """
+        Start a new game in every environment of the group
+
+        args:
+            seeds (list): The seed of each game
+        """
+        for idx, seed in enumerate(seeds):
+            self.__reset(idx, seed)
+
+        self.arrays['rewards'][:] = 0
+        self.arrays['terminated'][:] = False
+        self.arrays['truncated'][:] = False
+
+    def step(self):
+        """
+        Perform the action of each environment for one tick, a game that ends is reset with its seed + num_envs
+        """
+        actions, rewards, terminated, truncated = self.arrays['actions'], self.arrays['rewards'], self.arrays['terminated'], self.arrays['truncated']
+
+        for idx, engine in enumerate(self.engines):
+            action = ACTIONS[actions[idx]]
+            engine.step((action,) if action is not None else ())
+
+            rewards[idx] = len(engine.cleared_lines)
+            terminated[idx] = engine.FlagStruct.GAME_OVER
+            truncated[idx] = self.max_ticks is not None and engine.tick >= self.max_ticks and not terminated[idx]
+
+            if terminated[idx] or truncated[idx]:
+                self.__reset(idx, self.seeds[idx] + self.num_envs)
+            else:
+                self.__observe(idx)
+
+    def __reset(self, idx:int, seed:int):
+        """
+        Start a new game in an environment, the first piece is spawned before it is observed
+        """
+        engine = Engine(seed, self.Config, self.rotation_system, matrix_buffer = self.arrays['matrix'][idx])
+        engine.step()
+
+        self.engines[idx] = engine
+        self.seeds[idx] = seed
+        self.__observe(idx)
+
+    def __observe(self, idx:int):
+        """
+        Write the pieces of an environment to its observation, its matrix is already in the buffer
+        """
+        GameInstanceStruct = self.engines[idx].GameInstanceStruct
+        tetromino = GameInstanceStruct.current_tetromino
+
+        self.arrays['queue'][idx] = [PIECE_CODES[type] for type in GameInstanceStruct.queue.preview()]
+        self.arrays['hold'][idx] = PIECE_CODES.get(GameInstanceStruct.held_tetromino, 0)
+        self.arrays['can_hold'][idx] = GameInstanceStruct.can_hold
+
+        if tetromino is None:
+            self.arrays['piece'][idx] = 0
+        else:
+            self.arrays['piece'][idx] = (PIECE_CODES[tetromino.type], tetromino.state, tetromino.position.x, tetromino.position.y)
+
+def env_worker(connection, shared_name:str, layout:dict, start:int, stop:int, num_envs:int, config:StructEngineConfig, rotation_system:str, max_ticks:int):
+    """
+    Run an EnvGroup in a worker process, performing the commands sent by the VectorEnv until it is closed
+    """
+    shared = shared_memory.SharedMemory(name = shared_name)
+    group = EnvGroup(env_arrays(shared.buf, layout), start, stop, num_envs, config, rotation_system, max_ticks)
+
+    try:
+        while True:
+            command, args = connection.recv()
+
+            if command == 'close':
+                break
+
+            getattr(group, command)(*args)
+            connection.send(None)
+    finally:
+        del group # release the views of the buffer so it can be closed
+        shared.close()
+        connection.close()
+
+class VectorEnv():
+    def __init__(self, num_envs:int, seed:int = 0, workers:int = 0, config:StructEngineConfig = None, rotation_system:str = 'SRS', max_ticks:int = None):
+        """
+        Many games of Four on the engine with a reset/step interface for reinforcement learning
+
+        Every step performs one action in each game for one tick. The observation is a dict of NumPy arrays that are
+        views of one buffer, with the first axis indexing the environment, and are updated in place by each step:
+
+            plane (num_envs, HEIGHT, WIDTH) uint8: The colour plane of each matrix, stored by physical row
+            row_index (num_envs, HEIGHT) uint16: The physical row of each row of the matrix, see Matrix
+            queue (num_envs, QUEUE_LENGTH) uint8: The colour value of the next pieces
+            hold (num_envs,) uint8: The colour value of the hold piece, 0 if there is none
+            can_hold (num_envs,) bool: Whether the current piece can be held
+            piece (num_envs, 4) int16: The colour value, rotation state, x and y of the current piece
+
+        The engines store their matrices in the buffer, so the boards are never copied out of the engines. The rows
+        of the matrix in order are plane[env, row_index[env]], or boards() for every environment at once.
+
+        With workers the environments are split between worker processes and the buffer is shared memory, the
+        actions are written to the buffer and only a command to step is sent to each worker.
+
+        A game that ends is reset in the same step with its seed + num_envs, the observation is of the new game.
+
+        args:
+            num_envs (int): The number of environments
+            seed (int): The seed of the first environment, environment i uses seed + i
+            workers (int): The number of worker processes, 0 runs the environments in the calling process
+            config (StructEngineConfig): The game configuration
+            rotation_system (str): The rotation system to use
+            max_ticks (int): The number of ticks a game is truncated at, not truncated by default
+
+        methods:
+            reset(seed): Start a new game in every environment
+            step(actions): Perform an action in every environment for one tick
+            boards(): Get the rows of every matrix in order
+            close(): Stop the worker processes and free the buffer
+        """
+        if num_envs < 1:
+            raise ValueError(f"\033[31mInvalid number of environments!: {num_envs} \033[31m\033[0m")
+
+        self.Config = config if config is not None else StructEngineConfig()
+        self.num_envs = num_envs
+        self.seed = seed
+        self.workers = min(workers, num_envs)
+        self.WIDTH = self.Config.MATRIX_WIDTH
+        self.HEIGHT = self.Config.MATRIX_HEIGHT
+
+        layout, size = env_layout(num_envs, self.WIDTH, self.HEIGHT, self.Config.QUEUE_LENGTH)
+
+        if self.workers > 0:
+            self.shared = shared_memory.SharedMemory(create = True, size = size)
+            self.arrays = env_arrays(self.shared.buf, layout)
+        else:
+            self.shared = None
+            self.arrays = env_arrays(bytearray(size), layout)
+
+        plane_size = self.WIDTH * self.HEIGHT
+        self.observation = {
+            'plane': self.arrays['matrix'][:, :plane_size].reshape(num_envs, self.HEIGHT, self.WIDTH),
+            'row_index': self.arrays['matrix'][:, plane_size:].view(np.uint16),
+            'queue': self.arrays['queue'],
+            'hold': self.arrays['hold'],
+            'can_hold': self.arrays['can_hold'],
+            'piece': self.arrays['piece'],
+        }
+
+        bounds = np.linspace(0, num_envs, max(self.workers, 1) + 1).astype(int)
+        self.bounds = list(zip(bounds[:-1], bounds[1:]))
+        self.connections = []
+        self.processes = []
+
+        if self.workers > 0:
+            for start, stop in self.bounds:
+                connection, child_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target = env_worker, args = (child_connection, self.shared.name, layout, start, stop, num_envs, self.Config, rotation_system, max_ticks), daemon = True)
+                process.start()
+                child_connection.close()
+
+                self.connections.append(connection)
+                self.processes.append(process)
+        else:
+            self.group = EnvGroup(self.arrays, 0, num_envs, num_envs, self.Config, rotation_system, max_ticks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def reset(self, seed:int = None):
+        """
+        Start a new game in every environment
+
+        args:
+            seed (int): The seed of the first environment, defaults to the seed the VectorEnv was created with
+
+        returns:
+            observation (dict): The observation of every environment
+            info (dict): Empty, for compatibility with gym
+        """
+        seed = self.seed if seed is None else seed
+        seeds = [seed + idx for idx in range(self.num_envs)]
+
+        self.__run('reset', [(seeds[start:stop],) for start, stop in self.bounds])
+
+        return self.observation, {}
+
+    def step(self, actions):
+        """
+        Perform an action in every environment for one tick
+
+        args:
+            actions (array): The index in ACTIONS of the action of each environment, 0 performs no action
+
+        returns:
+            observation (dict): The observation of every environment
+            rewards (np.ndarray): The number of lines cleared in each environment
+            terminated (np.ndarray): Whether the game of each environment ended
+            truncated (np.ndarray): Whether the game of each environment reached max_ticks
+            info (dict): Empty, for compatibility with gym
+        """
+        self.arrays['actions'][:] = actions
+        self.__run('step', [() for _ in self.bounds])
+
+        return self.observation, self.arrays['rewards'], self.arrays['terminated'], self.arrays['truncated'], {}
+
+    def boards(self):
+        """
+        Get the rows of every matrix in order, as a copy
+
+        returns:
+            boards (np.ndarray): (num_envs, HEIGHT, WIDTH) uint8 array of colour values
+        """
+        return np.take_along_axis(self.observation['plane'], self.observation['row_index'][:, :, np.newaxis].astype(np.intp), axis = 1)
+
+    def close(self):
+        """
+        Stop the worker processes and free the buffer, the observation can not be used after the VectorEnv is closed
+        """
+        for connection in self.connections:
+            connection.send(('close', ()))
+            connection.close()
+
+        for process in self.processes:
+            process.join()
+
+        self.connections = []
+        self.processes = []
+
+        if self.shared is not None:
+            self.arrays = self.observation = None
+            self.shared.unlink()
+
+            try:
+                self.shared.close()
+            except BufferError: # the caller still holds a view of the observation, the memory is freed with the view
+                pass
+
+            self.shared = None
+
+    def __run(self, command:str, args:list):
+        """
+        Run a command on every group of environments, with workers the groups run in parallel
+        """
+        if not self.connections:
+            getattr(self.group, command)(*args[0])
+            return
+
+        for connection, group_args in zip(self.connections, args):
+            connection.send((command, group_args))
+
+        for connection in self.connections:
+            connection.recv()
@@ -1,30 +1,163 @@
 import os
+import hashlib
+from array import array
 from  utils import Vec2
+from instance.shape import PieceShape
+from instance.zobrist import cell_keys
+
+OCCUPIED = bytes([ord('0')]) + bytes([ord('1')]) * 255 # translation of colour codes to '0' for empty and '1' for occupied
+
+class Overlay():
+    def __init__(self, value:int = None):
+        """
+        A sparse layer drawn over the matrix, such as the active piece, the ghost piece or the danger piece.
+        
+        Holds the shape and position of a single piece rather than a full matrix, so moving the piece only updates 
+        its position.
+        
+        args:
+            value (int): The value of the cells instead of the colour of the piece
+            
+        methods:
+            set(shape, x, y): Place the overlay piece
+            clear(): Remove the overlay piece
+            cells(): Iterate over the (x, y, value) of the occupied cells
+        """
+        self.value = value
+        self.shape = None
+        self.x = 0
+        self.y = 0
+    
+    def set(self, shape:PieceShape, x:int, y:int):
+        """
+        Place the overlay piece
+        
+        args:
+            shape (PieceShape): The shape of the piece
+            x (int): The x position of the piece
+            y (int): The y position of the piece
+        """
+        self.shape = shape
+        self.x = x
+        self.y = y
+        
+    def clear(self):
+        """
+        Remove the overlay piece
+        """
+        self.shape = None
+    
+    def cells(self):
+        """
+        Iterate over the (x, y, value) of the occupied cells
+        """
+        if self.shape is None:
+            return
+        
+        value = self.shape.value if self.value is None else self.value
+        
+        for dx, dy in self.shape.cells:
+            yield self.x + dx, self.y + dy, value
 
 class Matrix():
-    def __init__(self, WIDTH:int, HEIGHT:int):
+    def __init__(self, WIDTH:int, HEIGHT:int, buffer = None):
         """
         Represents the game matrix (or board) where the tetrominoes are placed and interact.
         
         Manages the state of the game matrix, including the static blocks, active piece, and the ghost piece.
         
+        The static blocks are stored as a bitboard: one integer bitmask per row (bit x set if column x is occupied),
+        alongside a colour plane holding the piece code of each cell. The colour plane is exposed through the matrix 
+        attribute so it can still be indexed as matrix[y][x].
+        
+        The surface height of each column, the number of blocks in each row and the full rows are kept up to date
+        as blocks are placed and lines are cleared, so they can be read without rescanning the matrix. Each column 
+        is also stored as a bitmask (bit y set if row y is occupied) so drop distances can be found without 
+        stepping the piece down row by row. version is incremented whenever the placed blocks change.
+        
+        hash is the Zobrist hash of the occupied cells, updated as blocks are placed and as rows are moved by clearing 
+        lines. The colours are not part of the hash as they do not change how the game plays.
+        
+        The colour plane is a single buffer of HEIGHT physical rows, row_index maps each row of the matrix to the
+        physical row that stores it. Clearing lines only permutes row_index and recycles the cleared physical rows,
+        no rows are allocated or copied.
+        
+        The colour plane and row_index can be stored in a buffer owned by the caller, such as a block of shared memory,
+        so they can be read as arrays by another process without copying. The buffer holds the WIDTH * HEIGHT colour 
+        plane followed by the HEIGHT uint16 row_index, see buffer_size(), and is cleared when the matrix is created.
+        
         args:
             WIDTH (int): The width of the matrix
             HEIGHT (int): The height of the matrix
+            buffer (buffer): A writable buffer of buffer_size(WIDTH, HEIGHT) bytes to store the colour plane in
             
         methods:
+            buffer_size(WIDTH, HEIGHT): Get the size of the buffer of a matrix
             empty_matrix(): Create a matrix filled with zeros
-            insert_blocks(blocks, position, target_matrix): Insert the piece blocks into the target matrix
+            insert_blocks(shape, position, target_matrix): Insert the piece blocks into the target matrix
+            is_occupied(x, y): Test if a cell is out of bounds or occupied by a placed block
+            collides(shape, x, y): Test if a piece collides with the matrix bounds or the placed blocks
+            fit_mask(shape, y): Get the x positions a piece fits at on a row as a bitmask
+            drop_distance(shape, x, y): Get the number of rows a piece can fall before it lands
             clear_piece(): Remove the piece from the matrix
             clear_lines(): Remove full lines from the matrix
+            is_perfect_clear(): Test if there are no blocks left in the matrix
+            digest(): Get a hash of the placed blocks and their colours
+            load(colours): Replace the placed blocks with a colour plane
+            snapshot(): Get a copy of the state of the matrix
+            restore(snapshot): Return the matrix to a state from snapshot()
             __str__(): String representation of the matrix
         """
         self.WIDTH = WIDTH
         self.HEIGHT = HEIGHT
-        self.matrix = self.empty_matrix() # blocks that are already placed
-        self.piece = self.empty_matrix() 
-        self.ghost = self.empty_matrix()
-        self.danger = self.empty_matrix()
+        self.FULL_ROW = (1 << self.WIDTH) - 1
+        
+        self.rows = [0 for _ in range(self.HEIGHT)] # bitmask of the blocks that are already placed
+        
+        if buffer is None:
+            self.plane = bytearray(self.WIDTH * self.HEIGHT) # colour of the blocks that are already placed, stored by physical row
+            self.row_index = array('H', range(self.HEIGHT)) # physical row of each row of the matrix
+        else:
+            buffer = memoryview(buffer).cast('B')
+            
+            if len(buffer) != self.buffer_size(self.WIDTH, self.HEIGHT):
+                raise ValueError(f"\033[31mInvalid matrix buffer size!: {len(buffer)} \033[31m\033[0m")
+            
+            self.plane = buffer[:self.WIDTH * self.HEIGHT]
+            self.plane[:] = bytes(self.WIDTH * self.HEIGHT)
+            self.row_index = buffer[self.WIDTH * self.HEIGHT:].cast('H')
+            self.row_index[:] = array('H', range(self.HEIGHT))
+        
+        self.__physical_rows = [memoryview(self.plane)[p * self.WIDTH:(p + 1) * self.WIDTH] for p in range(self.HEIGHT)]
+        self.__empty_row = bytes(self.WIDTH)
+        self.colours = [self.__physical_rows[p] for p in self.row_index] # colour of each row of the matrix
+        
+        self.columns = [0 for _ in range(self.WIDTH)] # bitmask of the blocks that are already placed in each column
+        self.heights = [0 for _ in range(self.WIDTH)] # surface height of each column, measured from the bottom of the matrix
+        self.row_counts = [0 for _ in range(self.HEIGHT)] # number of blocks in each row
+        self.block_count = 0
+        self.full_lines = set()
+        self.version = 0
+        self.__cell_keys = cell_keys(self.WIDTH, self.HEIGHT)
+        self.hash = 0
+        
+        self.piece = Overlay()
+        self.ghost = Overlay()
+        self.danger = Overlay(value = -1)
+    
+    @staticmethod
+    def buffer_size(WIDTH:int, HEIGHT:int):
+        """
+        Get the size in bytes of the buffer of a matrix, the colour plane followed by row_index
+        """
+        return WIDTH * HEIGHT + 2 * HEIGHT
+    
+    @property
+    def matrix(self):
+        """
+        Colour view of the blocks that are already placed, indexed as matrix[y][x]
+        """
+        return self.colours
 
     def empty_matrix(self):
         """
@@ -32,39 +165,307 @@ class Matrix():
         """
         return [[0 for _ in range(self.WIDTH)] for _ in range(self.HEIGHT)]
     
-    def insert_blocks(self, blocks:list, position:Vec2, target_matrix:list):
+    def insert_blocks(self, shape:PieceShape, position:Vec2, target_matrix:list, value:int = None):
         """
         Insert the piece blocks into the target matrix
         
         args:
-            blocks (list): The piece blocks
-            position (Vec2): The position of the piece
+            shape (PieceShape): The shape of the piece
+            position (Vec2): The position of the piece, or a plain (x, y) pair
             target_matrix (list): The matrix to insert the piece blocks into
+            value (int): The value to insert instead of the colour of the piece
         """
-        [
-            target_matrix[position.y + y].__setitem__(position.x + x, val)
+        if value is None:
+            value = shape.value
+        
+        x, y = position
             
-            for y, row in enumerate(blocks)
-            for x, val in enumerate(row)
-            if val != 0
-        ]
+        for dx, dy in shape.cells:
+            target_matrix[y + dy][x + dx] = value
+                    
+        if target_matrix is self.colours:
+            left = x + shape.min_x
+            
+            for dy, mask in shape.row_masks:
+                row = y + dy
+                self.rows[row] |= mask << left
+                
+                count = self.rows[row].bit_count()
+                self.block_count += count - self.row_counts[row]
+                self.row_counts[row] = count
+                
+                if count == self.WIDTH:
+                    self.full_lines.add(row)
+            
+            for dx, dy in shape.cells:
+                self.columns[x + dx] |= 1 << (y + dy)
+                self.heights[x + dx] = max(self.heights[x + dx], self.HEIGHT - (y + dy))
+                self.hash ^= self.__cell_keys[y + dy][x + dx]
+                
+            self.version += 1
+    
+    def is_occupied(self, x:int, y:int):
+        """
+        Test if a cell is outside of the matrix or occupied by a block that is already placed
+        
+        args:
+            x (int): The x position of the cell
+            y (int): The y position of the cell
+        """
+        if x < 0 or x >= self.WIDTH or y < 0 or y >= self.HEIGHT:
+            return True
+        
+        return self.rows[y] >> x & 1 == 1
+    
+    def collides(self, shape:PieceShape, x:int, y:int):
+        """
+        Test if a piece collides with the matrix bounds or the blocks that are already placed
+        
+        args:
+            shape (PieceShape): The shape of the piece
+            x (int): The x position of the piece
+            y (int): The y position of the piece
+            
+        returns:
+            (bool): True if the piece collides, False otherwise
+        """
+        left = x + shape.min_x
+        
+        if left < 0 or x + shape.max_x >= self.WIDTH or y + shape.min_y <= 0 or y + shape.max_y >= self.HEIGHT:
+            return True
+        
+        rows = self.rows
+        
+        for dy, mask in shape.row_masks:
+            if rows[y + dy] & (mask << left):
+                return True
+            
+        return False
+        
+    def fit_mask(self, shape:PieceShape, y:int):
+        """
+        Get the x positions a piece fits at on a row, without colliding with the matrix bounds or the placed blocks
+        
+        args:
+            shape (PieceShape): The shape of the piece
+            y (int): The y position of the piece
+            
+        returns:
+            mask (int): Bit x + shape.min_x is set if the piece fits at x
+        """
+        if y + shape.min_y <= 0 or y + shape.max_y >= self.HEIGHT:
+            return 0
+        
+        rows = self.rows
+        blocked = 0
+        
+        for dx, dy in shape.cells: # the cell blocks every position that puts it over a placed block
+            blocked |= rows[y + dy] >> (dx - shape.min_x)
+        
+        return ~blocked & ((1 << (self.WIDTH - shape.max_x + shape.min_x)) - 1)
         
     def clear_piece(self):
         """
         Remove the piece from the matrix
         """
-        self.piece = self.empty_matrix()
+        self.piece.clear()
         
     def clear_lines(self):
         """
         Remove full lines from the matrix
+        
+        The rows above the lowest full line are shifted down in place and the physical rows of the cleared lines 
+        are emptied and reused as the new top rows of the matrix.
+        
+        returns:
+            cleared_lines (tuple): The indices of the rows that were cleared, from top to bottom
         """
-        full_lines = [row for row in self.matrix if all(val != 0 for val in row)]
+        if not self.full_lines: # nothing has been placed that completed a line
+            return ()
         
-        [self.matrix.insert(0, [0 for _ in range(self.WIDTH)]) for row in full_lines if self.matrix.remove(row) is None]
-
-        if len(full_lines) > 0:
-            return len(full_lines)
+        full_lines = tuple(sorted(self.full_lines))
+        self.full_lines.clear()
+        
+        rows, row_counts, colours, row_index = self.rows, self.row_counts, self.colours, self.row_index
+        cleared = []
+        write = full_lines[-1]
+        
+        for read in range(full_lines[-1], -1, -1):
+            if rows[read] == self.FULL_ROW:
+                self.hash ^= self.__row_hash(read, rows[read])
+                cleared.append(row_index[read])
+                continue
+            
+            if rows[read]: # move the cells of the row in the hash
+                self.hash ^= self.__row_hash(read, rows[read]) ^ self.__row_hash(write, rows[read])
+            
+            rows[write] = rows[read]
+            row_counts[write] = row_counts[read]
+            colours[write] = colours[read]
+            row_index[write] = row_index[read]
+            write -= 1
+        
+        for y, physical_row in enumerate(cleared):
+            self.plane[physical_row * self.WIDTH:(physical_row + 1) * self.WIDTH] = self.__empty_row
+            rows[y] = 0
+            row_counts[y] = 0
+            colours[y] = self.__physical_rows[physical_row]
+            row_index[y] = physical_row
+        
+        for y in full_lines: # remove the cleared rows from each column, shifting the rows above down by one
+            above = (1 << y) - 1
+            below = ~((1 << (y + 1)) - 1)
+            
+            for x, column in enumerate(self.columns):
+                self.columns[x] = (column & above) << 1 | (column & below)
+        
+        self.block_count -= len(full_lines) * self.WIDTH
+        self.__update_heights()
+        self.version += 1
+        
+        return full_lines
+    
+    def __row_hash(self, y:int, row:int):
+        """
+        Get the Zobrist hash of the occupied cells of a row
+        
+        args:
+            y (int): The row of the matrix
+            row (int): The bitmask of the occupied cells
+        """
+        keys = self.__cell_keys[y]
+        hash = 0
+        
+        while row:
+            lowest = row & -row
+            hash ^= keys[lowest.bit_length() - 1]
+            row ^= lowest
+        
+        return hash
+    
+    def __update_heights(self):
+        """
+        Recalculate the surface height of each column from the top most block in each column
+        """
+        for x, column in enumerate(self.columns):
+            self.heights[x] = self.HEIGHT - ((column & -column).bit_length() - 1) if column else 0
+    
+    def drop_distance(self, shape:PieceShape, x:int, y:int):
+        """
+        Get the number of rows a piece can fall before it lands, the piece must not collide at its current position.
+        
+        For each column of the piece the gap below its lowest block is read from the column height, or from the 
+        column bitmask if the block is below the surface of the column (e.g. tucked under an overhang).
+        
+        args:
+            shape (PieceShape): The shape of the piece
+            x (int): The x position of the piece
+            y (int): The y position of the piece
+        
+        returns:
+            distance (int): The number of rows the piece can fall
+        """
+        distance = self.HEIGHT
+        
+        for dx, dy in shape.bottom:
+            row = y + dy
+            surface = self.HEIGHT - self.heights[x + dx]
+            
+            if row < surface:
+                gap = surface - row - 1
+            else:
+                below = self.columns[x + dx] >> (row + 1)
+                gap = (below & -below).bit_length() - 1 if below else self.HEIGHT - row - 1
+                
+            if gap < distance:
+                distance = gap
+                
+        return distance
+    
+    def digest(self):
+        """
+        Get a hash of the placed blocks and their colours, used to check that two games reached the same matrix
+        
+        returns:
+            digest (bytes): 8 byte hash of the matrix
+        """
+        return hashlib.blake2b(b''.join(self.colours), digest_size = 8).digest()
+    
+    def load(self, colours:bytes):
+        """
+        Replace the placed blocks with a colour plane, e.g. b''.join(matrix.colours) of another matrix, and 
+        recalculate the bitmasks, counts and hash of the blocks
+        
+        args:
+            colours (bytes): WIDTH * HEIGHT colour codes in row order, 0 is empty
+        """
+        self.plane[:] = colours
+        self.row_index[:] = array('H', range(self.HEIGHT))
+        self.colours[:] = self.__physical_rows
+        self.hash = 0
+        self.columns[:] = [0] * self.WIDTH
+        keys = self.__cell_keys
+        
+        for y, row in enumerate(self.colours):
+            mask = int(bytes(row).translate(OCCUPIED)[::-1], 2) # bit x set if the cell is occupied
+            self.rows[y] = mask
+            self.row_counts[y] = mask.bit_count()
+            
+            while mask:
+                lowest = mask & -mask
+                x = lowest.bit_length() - 1
+                self.columns[x] |= 1 << y
+                self.hash ^= keys[y][x]
+                mask ^= lowest
+        
+        self.block_count = sum(self.row_counts)
+        self.full_lines = {y for y, row in enumerate(self.rows) if row == self.FULL_ROW}
+        self.__update_heights()
+        self.version += 1
+        
+        for overlay in (self.piece, self.ghost, self.danger):
+            overlay.clear()
+    
+    def snapshot(self):
+        """
+        Get a copy of the placed blocks, their colours and the overlays, the heights of the columns are not stored 
+        as they are found from the column bitmasks
+        
+        returns:
+            snapshot (tuple): The state of the matrix
+        """
+        return (
+            tuple(self.rows), bytes(self.plane), self.row_index.tobytes(), tuple(self.columns), tuple(self.row_counts),
+            self.block_count, frozenset(self.full_lines), self.version, self.hash,
+            tuple((overlay.shape, overlay.x, overlay.y) for overlay in (self.piece, self.ghost, self.danger))
+        )
+    
+    def restore(self, snapshot:tuple):
+        """
+        Return the matrix to a state from snapshot(), in place so the views of the colour plane stay valid
+        
+        args:
+            snapshot (tuple): The state of the matrix
+        """
+        rows, plane, row_index, columns, row_counts, self.block_count, full_lines, self.version, self.hash, overlays = snapshot
+        
+        self.rows[:] = rows
+        self.plane[:] = plane
+        self.row_index[:] = array('H', row_index)
+        self.colours[:] = [self.__physical_rows[p] for p in self.row_index]
+        self.columns[:] = columns
+        self.row_counts[:] = row_counts
+        self.full_lines = set(full_lines)
+        self.__update_heights()
+        
+        for overlay, (shape, x, y) in zip((self.piece, self.ghost, self.danger), overlays):
+            overlay.set(shape, x, y)
+    
+    def is_perfect_clear(self):
+        """
+        Test if there are no blocks left in the matrix
+        """
+        return self.block_count == 0
     
     def __str__(self):
         """
@@ -83,23 +484,13 @@ class Matrix():
             7: "\033[36m",  # cyan
         }
 
-        display_matrix = [row[:] for row in self.matrix]
+        display_matrix = [list(row) for row in self.matrix]
             
-        [
-            display_matrix[y].__setitem__(x, -val)
-            
-            for y, row in enumerate(self.piece)
-            for x, val in enumerate(row)
-            if val != 0
-        ]
+        for x, y, val in self.piece.cells():
+            display_matrix[y][x] = -val
                     
-        [
-            display_matrix[y].__setitem__(x, val)
-            
-            for y, row in enumerate(self.ghost)
-            for x, val in enumerate(row)
-            if val != 0
-        ]
+        for x, y, val in self.ghost.cells():
+            display_matrix[y][x] = val
                     
         rows = [
             "| " + " ".join(
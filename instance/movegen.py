@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from instance.action import Action
+from instance.matrix import Matrix
+from instance.shape import PieceShape, PIECE_TABLE
+from instance.rotation import PIECE_CLASSES
+
+ROTATIONS = ((Action.ROTATE_CLOCKWISE, 1), (Action.ROTATE_COUNTERCLOCKWISE, 3), (Action.ROTATE_180, 2))
+Y_PADDING = 4 # rows of the search above and below the matrix that a kick can reach
+
+@dataclass(frozen = True)
+class Placement():
+    """
+    A final resting placement of a piece and the inputs that reach it
+
+    args:
+        type (str): Type of the piece
+        state (int): Rotation state of the piece
+        x (int): The x position of the piece
+        y (int): The y position of the piece
+        shape (PieceShape): The shape of the piece in its rotation state
+        actions (tuple): The shortest sequence of actions from the spawn position that places the piece, ending with a hard drop
+        hold (bool): True if the piece is placed after holding the current piece
+    """
+    type: str
+    state: int
+    x: int
+    y: int
+    shape: PieceShape
+    actions: tuple
+    hold: bool = False
+
+    @property
+    def cells(self):
+        """
+        The (x, y) positions of the blocks of the placed piece
+        """
+        return tuple((self.x + dx, self.y + dy) for dx, dy in self.shape.cells)
+
+def build_symmetry_table():
+    """
+    Find the rotation states of each piece that occupy the same cells as a lower state, e.g. states 0 and 2 of the S piece.
+
+    returns:
+        table (dict): table[type][state] = (canonical_state, dx, dy), the piece at (x, y) in state occupies the same
+        cells as the piece at (x + dx, y + dy) in canonical_state
+    """
+    table = {}
+
+    for type, shapes in PIECE_TABLE.items():
+        table[type] = []
+
+        for shape in shapes:
+            cells = {(x - shape.min_x, y - shape.min_y) for x, y in shape.cells}
+
+            for canonical in shapes[:shape.state + 1]:
+                if cells == {(x - canonical.min_x, y - canonical.min_y) for x, y in canonical.cells}:
+                    table[type].append((canonical.state, shape.min_x - canonical.min_x, shape.min_y - canonical.min_y))
+                    break
+
+        table[type] = tuple(table[type])
+
+    return table
+
+SYMMETRY_TABLE = build_symmetry_table()
+
+class MoveGenerator():
+    def __init__(self, kicks:tuple):
+        """
+        Find every distinct resting placement of a piece and the shortest sequence of actions that reaches it.
+
+        Searches breadth first over the (x, y, state) poses reachable with MOVE_LEFT, MOVE_RIGHT, the rotations (using
+        the kicks of the rotation system, so kicks and spins are found) and SONIC_DROP, so a placement is found first by
+        the shortest sequence. Each pose ends with a HARD_DROP onto the pose below it, poses that occupy the same cells
+        in a different rotation state (e.g. the O, S, Z and I pieces) are the same placement.
+
+        Whether a pose is free is read from a bitmask of the x positions the piece fits at on its row (Matrix.fit_mask),
+        found once per (state, y) the search reaches, so testing a move or a kick is a single bit test. The visited
+        poses are kept as a bitset of x positions per (state, y) in the same way.
+
+        Gravity, the lock delay and the limit on moves before locking are not simulated between the actions.
+
+        args:
+            kicks (tuple): The compiled kicks of the rotation system, kicks[piece_class][from_state][to_state]
+
+        methods:
+            placements(matrix, type, state, x, y, prefix, hold): Find every distinct resting placement of a piece
+        """
+        self.kicks = kicks
+        self.transitions = {type: self.__build_transitions(type) for type in PIECE_TABLE}
+
+    def __build_transitions(self, type:str):
+        """
+        Get the rotations of a piece from each state with their kicks as offsets of the search row and x position
+
+        returns:
+            transitions (tuple): transitions[state] = ((action, desired_state, ((kick_x, kick_y, row offset, left offset), ...)), ...)
+        """
+        shapes = PIECE_TABLE[type]
+        piece_kicks = self.kicks[PIECE_CLASSES[type]]
+        transitions = []
+
+        for state in range(4):
+            rotations = []
+
+            for action, turn in ROTATIONS:
+                desired_state = (state + turn) % 4
+                offsets = tuple(
+                    (kick_x, kick_y, 4 * kick_y + desired_state - state, kick_x + shapes[desired_state].min_x - shapes[state].min_x)
+                    for kick_x, kick_y in piece_kicks[state][desired_state]
+                )
+                rotations.append((action, desired_state, offsets))
+
+            transitions.append(tuple(rotations))
+
+        return tuple(transitions)
+
+    def placements(self, matrix:Matrix, type:str, state:int, x:int, y:int, prefix:tuple = (), hold:bool = False):
+        """
+        Find every distinct resting placement of a piece that can be reached from its position
+
+        args:
+            matrix (Matrix): The matrix to place the piece in
+            type (str): Type of the piece
+            state (int): Rotation state of the piece
+            x (int): The x position of the piece
+            y (int): The y position of the piece
+            prefix (tuple): Actions performed before the search starts, added to the front of every sequence
+            hold (bool): Whether the placements are of the held piece
+
+        returns:
+            placements (list): The Placement of each distinct resting position, in order of their number of actions
+        """
+        shapes = PIECE_TABLE[type]
+
+        if matrix.collides(shapes[state], x, y):
+            return []
+
+        matrix_fit_mask = matrix.fit_mask
+        drop_distance = matrix.drop_distance
+        symmetry = SYMMETRY_TABLE[type]
+        transitions = self.transitions[type]
+        min_xs = [shape.min_x for shape in shapes]
+
+        # a piece that fits in the matrix has HEIGHT - 1 + Y_PADDING > y >= -Y_PADDING after a kick, each (state, y) is row 4 * (y + Y_PADDING) + state
+        rows = 4 * (matrix.HEIGHT + 2 * Y_PADDING)
+        fit_masks = [-1] * rows # the x positions the piece fits at on each row, found as they are needed
+        visited = [0] * rows # bitset of the visited x positions on each row, bit x + min_x
+
+        row = 4 * (y + Y_PADDING) + state
+        fit_masks[row] = matrix_fit_mask(shapes[state], y)
+        visited[row] = 1 << (x + min_xs[state])
+
+        frontier = [(state, x, y)]
+        parents = {(state, x, y): None} # the pose and action each pose was first reached from
+        placed = set()
+        placements = []
+
+        for pose in frontier:
+            state, x, y = pose
+            shape = shapes[state]
+            distance = drop_distance(shape, x, y)
+
+            canonical, dx, dy = symmetry[state]
+            key = (canonical, x + dx, y + distance + dy)
+
+            if key not in placed:
+                placed.add(key)
+                placements.append(Placement(type, state, x, y + distance, shape, trace_actions(parents, pose, prefix), hold))
+
+            row = 4 * (y + Y_PADDING) + state
+            left = x + min_xs[state]
+            mask = fit_masks[row]
+            seen = visited[row]
+
+            # each move is tested against the fit mask of the row it ends on, then visited if it is new
+            if left > 0 and mask >> (left - 1) & 1 and not seen >> (left - 1) & 1:
+                visited[row] |= 1 << (left - 1)
+                parents[state, x - 1, y] = (pose, Action.MOVE_LEFT)
+                frontier.append((state, x - 1, y))
+
+            if mask >> (left + 1) & 1 and not seen >> (left + 1) & 1:
+                visited[row] |= 1 << (left + 1)
+                parents[state, x + 1, y] = (pose, Action.MOVE_RIGHT)
+                frontier.append((state, x + 1, y))
+
+            for action, desired_state, offsets in transitions[state]:
+                for kick_x, kick_y, kick_row, kick_left in offsets:
+                    kicked_left = left + kick_left
+
+                    if kicked_left < 0:
+                        continue
+
+                    kicked_row = row + kick_row
+                    kicked_mask = fit_masks[kicked_row]
+
+                    if kicked_mask < 0:
+                        kicked_mask = fit_masks[kicked_row] = matrix_fit_mask(shapes[desired_state], y + kick_y)
+
+                    if kicked_mask >> kicked_left & 1:
+                        if not visited[kicked_row] >> kicked_left & 1:
+                            visited[kicked_row] |= 1 << kicked_left
+                            parents[desired_state, x + kick_x, y + kick_y] = (pose, action)
+                            frontier.append((desired_state, x + kick_x, y + kick_y))
+                        break
+
+            if distance > 0:
+                dropped_row = row + 4 * distance
+
+                if not visited[dropped_row] >> left & 1:
+                    if fit_masks[dropped_row] < 0:
+                        fit_masks[dropped_row] = matrix_fit_mask(shape, y + distance)
+
+                    visited[dropped_row] |= 1 << left
+                    parents[state, x, y + distance] = (pose, Action.SONIC_DROP)
+                    frontier.append((state, x, y + distance))
+
+        return placements
+
+def trace_actions(parents:dict, pose:tuple, prefix:tuple):
+    """
+    Follow the parents of a pose back to the start of the search to find the actions that reach it, then hard drop
+    """
+    actions = [Action.HARD_DROP]
+
+    while parents[pose] is not None:
+        pose, action = parents[pose]
+        actions.append(action)
+
+    actions.extend(reversed(prefix))
+    actions.reverse()
+
+    return tuple(actions)
@@ -0,0 +1,251 @@
+import numpy as np
+from collections import deque
+from itertools import islice
+from functools import lru_cache
+from math import factorial
+
+BAG = ('I', 'O', 'T', 'S', 'Z', 'J', 'L') # the pieces of a bag before it is shuffled
+RNG_MODULUS = 2147483647
+RNG_MULTIPLIER = 16807
+BULK_CHUNK_SIZE = 1 << 23 # the number of random numbers drawn at once by shuffled_bags(), bounds its temporary arrays
+
+class Queue():
+    def __init__(self, rng, length = 5):
+        """
+        Queue of next tetrominos
+        
+        The pieces are held in a deque that is filled from the bags as it is read, so the queue can be looked into to 
+        any depth without changing the order the bags are drawn in. length is the number of pieces shown in the 
+        preview, the queue always holds at least that many.
+        
+        args:
+            rng (RNG): The random number generator to use
+            length (int): The number of pieces in the preview
+            
+        methods:
+            get_bag(): Create a bag of tetrominos
+            get_queue(count): Fill the queue with tetrominos
+            get_next_piece(): Get the next piece from the queue
+            view_queue(idx): See a piece in the queue at any depth
+            preview(count): Get the next pieces in the queue
+            snapshot(): Get a copy of the state of the queue and its random number generator
+            restore(snapshot): Return the queue to a state from snapshot()
+            sequences(seeds, pieces): Get the first pieces of the queues of many seeds at once
+        """
+        self.rng = rng
+        self.length = length
+        self.bag = self.get_bag()
+        self.queue = deque()
+        self.get_queue()
+ 
+    def get_bag(self):
+        """
+        Create a bag of seven tetrominos
+        
+        args:
+            bag (list): The bag to fill with tetrominos
+        """
+        bag = list(BAG)
+        self.rng.shuffle_array(bag)
+        
+        return bag
+    
+    def get_queue(self, count:int = None):
+        """
+        Take pieces from the bag without replacement and add them to the queue until it holds count pieces, if the bag
+        is empty refill the bag
+        
+        args:
+            count (int): The number of pieces the queue should hold, defaults to the length of the preview
+        """
+        count = self.length if count is None else count
+        
+        while len(self.queue) < count:
+            
+            if len(self.bag) == 0:
+                self.bag = self.get_bag()
+                
+            self.queue.append(self.bag.pop())
+            
+    def get_next_piece(self):
+        """
+        Get the next piece from the queue
+        """
+        next_piece = self.queue.popleft()
+        
+        if len(self.queue) < self.length:
+            self.get_queue()
+            
+        return next_piece
+    
+    def view_queue(self, idx = 0):
+        """
+        See a piece in the queue at any depth, the pieces up to it are drawn from the bags if they are not in the queue yet
+        
+        args:
+            idx (int): The depth of the piece, 0 is the next piece
+        """
+        if idx >= len(self.queue):
+            self.get_queue(idx + 1)
+        
+        return self.queue[idx]
+    
+    def preview(self, count:int = None):
+        """
+        Get the next pieces in the queue, drawing them from the bags if they are not in the queue yet
+        
+        args:
+            count (int): The number of pieces, defaults to the length of the preview
+            
+        returns:
+            pieces (tuple): The next pieces, in order
+        """
+        count = self.length if count is None else count
+        self.get_queue(count)
+        
+        return tuple(islice(self.queue, count))
+
+    def snapshot(self):
+        """
+        Get a copy of the state of the queue and its random number generator
+        """
+        return tuple(self.bag), tuple(self.queue), self.rng.t
+    
+    def restore(self, snapshot:tuple):
+        """
+        Return the queue to a state from snapshot()
+        
+        args:
+            snapshot (tuple): The state of the queue
+        """
+        bag, queue, self.rng.t = snapshot
+        self.bag = list(bag)
+        self.queue = deque(queue)
+    
+    @staticmethod
+    def sequences(seeds, pieces:int):
+        """
+        Get the first pieces of the queues of many seeds at once, the same pieces as calling get_next_piece() on a
+        new Queue(RNG(seed)) for each seed
+        
+        args:
+            seeds (array): The seeds
+            pieces (int): The number of pieces of each seed
+            
+        returns:
+            sequences (np.ndarray): (len(seeds), pieces) uint8 array of the index of each piece in BAG
+        """
+        states = np.asarray(seeds, dtype = np.int64) % RNG_MODULUS
+        states[states <= 0] += RNG_MODULUS - 1
+        
+        bags = shuffled_bags(states, -(-pieces // len(BAG)))
+        
+        return bags[:, :, ::-1].reshape(len(states), -1)[:, :pieces] # the pieces are taken from the end of each bag
+
+@lru_cache(maxsize = None)
+def bag_shuffles():
+    """
+    Get every bag that RNG.shuffle_array can make, indexed by the swaps of the shuffle as a mixed radix number: the
+    swap with position i adds r * i! for r from 0 to i
+    
+    returns:
+        shuffles (np.ndarray): (len(BAG)!, len(BAG)) uint8 array of the index of each piece in BAG
+    """
+    shuffles = np.empty((factorial(len(BAG)), len(BAG)), dtype = np.uint8)
+    
+    for index in range(len(shuffles)):
+        bag = list(range(len(BAG)))
+        
+        for i in range(len(BAG) - 1, 0, -1):
+            r = index // factorial(i) % (i + 1)
+            bag[i], bag[r] = bag[r], bag[i]
+        
+        shuffles[index] = bag
+    
+    return shuffles
+
+def shuffled_bags(states:np.ndarray, count:int):
+    """
+    Shuffle bags for many random number generators at once, the same bags as calling Queue.get_bag() count times on 
+    each generator
+    
+    Each shuffle draws len(BAG) - 1 numbers, so the draws of every bag are found at once by jumping each generator 
+    ahead. The swaps of a shuffle are combined into an index of bag_shuffles() rather than done in order.
+    
+    args:
+        states (np.ndarray): The state t of each RNG
+        count (int): The number of bags of each generator
+        
+    returns:
+        bags (np.ndarray): (len(states), count, len(BAG)) uint8 array of the index of each piece in BAG
+    """
+    swaps = len(BAG) - 1
+    draws = count * swaps
+    multipliers = np.empty(draws, dtype = np.int64) # multipliers[k] jumps a generator ahead by k + 1 draws
+    multiplier = 1
+    
+    for k in range(draws):
+        multiplier = multiplier * RNG_MULTIPLIER % RNG_MODULUS
+        multipliers[k] = multiplier
+    
+    shuffles = bag_shuffles()
+    multipliers = multipliers.reshape(count, swaps).T.copy() # [draw of the shuffle, bag], so each draw of every bag is contiguous
+    bags = np.empty((len(states), count, len(BAG)), dtype = np.uint8)
+    chunk_size = max(BULK_CHUNK_SIZE // max(draws, 1), 1)
+    
+    for start in range(0, len(states), chunk_size):
+        stop = min(start + chunk_size, len(states))
+        index = np.zeros((stop - start, count), dtype = np.intp)
+        
+        for draw, i in enumerate(range(swaps, 0, -1)): # the swaps of RNG.shuffle_array, in order
+            numbers = states[start:stop, np.newaxis] * multipliers[draw] # both factors are below 2^31 so the product fits in an int64
+            numbers %= RNG_MODULUS
+            
+            floats = numbers.astype(np.float64) # the same operations as int(next_float() * (i + 1))
+            floats -= 1
+            floats /= RNG_MODULUS - 1
+            floats *= i + 1
+            
+            index += floats.astype(np.intp) * factorial(i)
+        
+        bags[start:stop] = shuffles[index]
+    
+    return bags
+
+class RNG:
+    def __init__(self, seed):
+        self.t = seed % RNG_MODULUS
+        if self.t <= 0:
+            self.t += RNG_MODULUS - 1
+
+    def next(self):
+        self.t = (RNG_MULTIPLIER * self.t) % RNG_MODULUS
+        return self.t
+
+    def next_float(self):
+        return (self.next() - 1) / (RNG_MODULUS - 1)
+
+    def jump(self, n:int):
+        """
+        Skip ahead by n draws, the same as calling next() n times
+        
+        args:
+            n (int): The number of draws to skip
+            
+        returns:
+            t (int): The state after the last skipped draw
+        """
+        self.t = pow(RNG_MULTIPLIER, n, RNG_MODULUS) * self.t % RNG_MODULUS
+        return self.t
+
+    def shuffle_array(self, array):
+        if len(array) == 0:
+            return array
+
+        for i in range(len(array) - 1, 0, -1):
+            r = int(self.next_float() * (i + 1))
+            array[i], array[r] = array[r], array[i]
+
+        return array
+        
+      
\ No newline at end of file
@@ -0,0 +1,315 @@
+import json
+from bisect import bisect_left
+from dataclasses import fields
+from instance.action import Action
+from instance.engine import Engine
+from core.state.struct_engine_config import StructEngineConfig
+from core.state.struct_gameinstance import StructGameInstance
+
+MAGIC = b'FOUR'
+VERSION = 1
+ACTION_BITS = 4 # each entry is packed as (tick delta << ACTION_BITS) | action value
+
+if max(action.value for action in Action) >= 1 << ACTION_BITS:
+    raise ValueError(f"\033[31mAction values do not fit in {ACTION_BITS} bits of a replay entry! \033[31m\033[0m")
+
+def write_varint(buffer:bytearray, value:int):
+    """
+    Append an unsigned integer to the buffer as a LEB128 varint
+
+    args:
+        buffer (bytearray): The buffer to append to
+        value (int): The value to write
+    """
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+def read_varint(data:bytes, offset:int):
+    """
+    Read a LEB128 varint from the data
+
+    args:
+        data (bytes): The data to read from
+        offset (int): The position of the varint in the data
+
+    returns:
+        value (int): The value that was read
+        offset (int): The position after the varint
+    """
+    value = 0
+    shift = 0
+
+    while True:
+        if offset >= len(data):
+            raise ValueError("\033[31mReplay ended in the middle of a varint! \033[31m\033[0m")
+
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+
+        if byte < 0x80:
+            return value, offset
+
+class ReplayRecorder():
+    def __init__(self, engine:Engine):
+        """
+        Record the actions performed on an engine in the replay format
+
+        The replay is made up of:
+            MAGIC, VERSION, varint header length, header JSON (seed, rotation system, config, gravity and lock delay),
+            varint entry count, one varint per action of (tick delta << ACTION_BITS) | action value,
+            varint tick count, 8 byte digest of the final matrix
+
+        args:
+            engine (Engine): The engine to record, actions must be recorded before the tick they are performed on is stepped
+
+        methods:
+            record(actions): Record the actions performed on the next tick
+            to_bytes(): Encode the replay up to the current tick of the engine
+            save(path): Write the replay to a file
+        """
+        self.engine = engine
+        self.header = {
+            'seed': engine.seed,
+            'rotation_system': engine.rotation_system.type,
+            'config': {field.name: getattr(engine.Config, field.name) for field in fields(StructEngineConfig)},
+            'gravity': engine.GameInstanceStruct.gravity,
+            'lock_delay': engine.GameInstanceStruct.lock_delay,
+        }
+
+        self.entries = bytearray()
+        self.entry_count = 0
+        self.last_tick = 0
+
+    def record(self, actions:list):
+        """
+        Record the actions performed on the next tick of the engine
+
+        args:
+            actions (list): The actions that will be performed
+        """
+        for action in actions:
+            write_varint(self.entries, (self.engine.tick - self.last_tick) << ACTION_BITS | action.value)
+            self.entry_count += 1
+            self.last_tick = self.engine.tick
+
+    def to_bytes(self):
+        """
+        Encode the replay up to the current tick of the engine
+
+        returns:
+            replay (bytes): The encoded replay
+        """
+        header = json.dumps(self.header, separators = (',', ':')).encode()
+        data = bytearray(MAGIC)
+        data.append(VERSION)
+
+        write_varint(data, len(header))
+        data += header
+        write_varint(data, self.entry_count)
+        data += self.entries
+        write_varint(data, self.engine.tick)
+        data += self.engine.GameInstanceStruct.matrix.digest()
+
+        return bytes(data)
+
+    def save(self, path:str):
+        """
+        Write the replay to a file
+
+        args:
+            path (str): The path to write to
+        """
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+class Replay():
+    def __init__(self, header:dict, actions:list, ticks:int, digest:bytes):
+        """
+        A recorded game that can be played back on the engine
+
+        args:
+            header (dict): The seed, rotation system, config, gravity and lock delay of the game
+            actions (list): The (tick, Action) pairs that were performed, in order
+            ticks (int): The number of ticks the game was recorded for
+            digest (bytes): The digest of the final matrix
+
+        methods:
+            from_bytes(data): Decode a replay
+            load(path): Read a replay from a file
+            create_engine(): Create a new engine set up as the recorded game was
+            advance(engine, tick): Play the replay on an engine up to a tick
+            play(): Play the replay back on a new engine
+            validate(): Test if playing the replay back reaches the recorded matrix
+        """
+        self.header = header
+        self.actions = actions
+        self.action_ticks = [tick for tick, _ in actions]
+        self.ticks = ticks
+        self.digest = digest
+
+    @classmethod
+    def from_bytes(cls, data:bytes):
+        """
+        Decode a replay
+
+        args:
+            data (bytes): The encoded replay
+
+        returns:
+            replay (Replay): The decoded replay
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("\033[31mNot a replay! \033[31m\033[0m")
+
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f"\033[31mUnsupported replay version!: {data[len(MAGIC)]} \033[31m\033[0m")
+
+        length, offset = read_varint(data, len(MAGIC) + 1)
+        header = json.loads(data[offset:offset + length])
+        offset += length
+
+        entry_count, offset = read_varint(data, offset)
+        actions = []
+        tick = 0
+
+        for _ in range(entry_count):
+            entry, offset = read_varint(data, offset)
+            tick += entry >> ACTION_BITS
+            actions.append((tick, Action(entry & ((1 << ACTION_BITS) - 1))))
+
+        ticks, offset = read_varint(data, offset)
+        digest = bytes(data[offset:offset + 8])
+
+        return cls(header, actions, ticks, digest)
+
+    @classmethod
+    def load(cls, path:str):
+        """
+        Read a replay from a file
+
+        args:
+            path (str): The path to read from
+        """
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+    def create_engine(self):
+        """
+        Create a new engine set up as the recorded game was
+        """
+        GameInstanceStruct = StructGameInstance()
+        GameInstanceStruct.gravity = self.header['gravity']
+        GameInstanceStruct.lock_delay = self.header['lock_delay']
+
+        return Engine(self.header['seed'], StructEngineConfig(**self.header['config']), self.header['rotation_system'], GameInstanceStruct)
+
+    def advance(self, engine:Engine, tick:int):
+        """
+        Play the replay on an engine from its current tick up to a tick, ticks with no actions are skipped with Engine.step_idle
+        
+        args:
+            engine (Engine): An engine created by create_engine() that is at or before the tick
+            tick (int): The tick to stop at, the actions on this tick are not performed
+            
+        returns:
+            engine (Engine): The engine at the tick
+        """
+        actions = self.actions
+        i = bisect_left(self.action_ticks, engine.tick)
+
+        while i < len(actions) and actions[i][0] < tick:
+            action_tick = actions[i][0]
+            engine.step_idle(action_tick - engine.tick)
+
+            tick_actions = []
+            while i < len(actions) and actions[i][0] == action_tick:
+                tick_actions.append(actions[i][1])
+                i += 1
+
+            engine.step(tick_actions)
+
+        engine.step_idle(tick - engine.tick)
+
+        return engine
+
+    def play(self):
+        """
+        Play the replay back on a new engine as fast as possible
+
+        returns:
+            engine (Engine): The engine at the end of the replay
+        """
+        return self.advance(self.create_engine(), self.ticks)
+
+    def validate(self):
+        """
+        Test if playing the replay back reaches the recorded matrix
+
+        returns:
+            (bool): True if the final matrix matches the recorded digest
+        """
+        return self.play().GameInstanceStruct.matrix.digest() == self.digest
+
+class ReplayPlayer():
+    def __init__(self, replay:Replay, keyframe_interval:int = 256):
+        """
+        Play a replay back with seeking to any tick
+
+        A snapshot of the engine is kept as a keyframe every keyframe_interval ticks, the keyframes are taken the first
+        time playback passes them. Seeking restores the nearest keyframe at or before the tick and re-simulates at most
+        keyframe_interval ticks from it, or carries on from the current tick when seeking forward within the interval.
+        A smaller interval makes seeking faster at the cost of memory.
+
+        args:
+            replay (Replay): The replay to play
+            keyframe_interval (int): The number of ticks between keyframes
+
+        methods:
+            seek(tick): Move the playback to a tick
+        """
+        if keyframe_interval < 1:
+            raise ValueError(f"\033[31mInvalid keyframe interval!: {keyframe_interval} \033[31m\033[0m")
+
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.engine = replay.create_engine()
+        self.keyframes = [self.engine.snapshot()] # keyframe k is the state at tick k * keyframe_interval
+
+    @property
+    def tick(self):
+        """
+        The current tick of the playback
+        """
+        return self.engine.tick
+
+    def seek(self, tick:int):
+        """
+        Move the playback to a tick
+
+        args:
+            tick (int): The tick to move to, from 0 to the number of ticks in the replay
+
+        returns:
+            engine (Engine): The engine at the tick
+        """
+        if tick < 0 or tick > self.replay.ticks:
+            raise ValueError(f"\033[31mTick is outside of the replay!: {tick} \033[31m\033[0m")
+
+        keyframe = min(tick // self.keyframe_interval, len(self.keyframes) - 1)
+
+        if not keyframe * self.keyframe_interval <= self.engine.tick <= tick: # the current tick is not on the way to the tick
+            self.engine.restore(self.keyframes[keyframe])
+
+        while self.engine.tick < tick:
+            next_keyframe = (self.engine.tick // self.keyframe_interval + 1) * self.keyframe_interval
+            self.replay.advance(self.engine, min(tick, next_keyframe))
+
+            if self.engine.tick == next_keyframe and next_keyframe // self.keyframe_interval == len(self.keyframes):
+                self.keyframes.append(self.engine.snapshot())
+
+        return self.engine
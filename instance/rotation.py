@@ -1,12 +1,22 @@
 from utils import Vec2
 
+PIECE_CLASSES = {'T': 0, 'S': 0, 'Z': 0, 'L': 0, 'J': 0, 'I': 1, 'O': 2} # index of the kick table each piece type uses
+KICK_TABLE_NAMES = ('TSZLJ_KICKS', 'I_KICKS', 'O_KICKS') # kick table name of each piece class
+
 class RotationSystem():
     def __init__(self, type):
         """
         Rotation system for the game, kick tables for each piece type and rotation type
         
+        The kick tables are compiled into kicks[piece_class][from_state][to_state], a tuple of (x, y) translations
+        with y already inverted for the matrix, as the top left of the matrix is (0, 0). Transitions that have 
+        no kicks (e.g. 0->0) are empty tuples.
+        
         args:
             type (str): The type of rotation system to use
+        
+        methods:
+            get_kicks(piece_type, from_state, to_state): Get the compiled kicks of a rotation
         """
         self.type = type
         
@@ -83,4 +93,68 @@ class RotationSystem():
                 '180': {'TSZLJ_KICKS': self.TSZLJ_180_KICKS, 'I_KICKS': self.I_180_KICKS, 'O_KICKS': self.O_180_KICKS}
             }
             
-    
\ No newline at end of file
+        else:
+            raise ValueError(f"\033[31mInvalid rotation system provided!: {self.type} \033[31m\033[0m")
+        
+        self.__validate_kick_table()
+        self.kicks = self.__compile_kick_table()
+    
+    def __validate_kick_table(self):
+        """
+        Check that every piece class has kicks for every 90 and 180 degree rotation, and that every kick is an integer translation
+        """
+        transitions = {
+            '90': {f'{state}->{(state + 1) % 4}' for state in range(4)} | {f'{(state + 1) % 4}->{state}' for state in range(4)},
+            '180': {f'{state}->{(state + 2) % 4}' for state in range(4)}
+        }
+        
+        for rotation, expected in transitions.items():
+            for name in KICK_TABLE_NAMES:
+                table = self.kick_table[rotation][name]
+                
+                if set(table.keys()) != expected:
+                    raise ValueError(f"\033[31mInvalid kick table {self.type} {rotation} {name}: expected transitions {sorted(expected)}, got {sorted(table.keys())} \033[31m\033[0m")
+                
+                for transition, kicks in table.items():
+                    if len(kicks) == 0:
+                        raise ValueError(f"\033[31mInvalid kick table {self.type} {rotation} {name}: {transition} has no kicks \033[31m\033[0m")
+                    
+                    for kick in kicks:
+                        if not isinstance(kick.x, int) or not isinstance(kick.y, int):
+                            raise ValueError(f"\033[31mInvalid kick table {self.type} {rotation} {name}: {transition} has a non integer kick {kick} \033[31m\033[0m")
+    
+    def __compile_kick_table(self):
+        """
+        Compile the kick tables into flat tuples indexed by piece class, initial state and desired state
+        
+        returns:
+            kicks (tuple): The compiled kicks, kicks[piece_class][from_state][to_state] = ((x, y), ...)
+        """
+        compiled = []
+        
+        for name in KICK_TABLE_NAMES:
+            table = {**self.kick_table['90'][name], **self.kick_table['180'][name]}
+            
+            compiled.append(tuple(
+                tuple(
+                    tuple((kick.x, -kick.y) for kick in table.get(f'{from_state}->{to_state}', ()))
+                    for to_state in range(4)
+                )
+                for from_state in range(4)
+            ))
+        
+        return tuple(compiled)
+    
+    def get_kicks(self, piece_type:str, from_state:int, to_state:int):
+        """
+        Get the compiled kicks of a rotation
+        
+        args:
+            piece_type (str): Type of the piece: ['T', 'S', 'Z', 'L', 'J', 'I', 'O']
+            from_state (int): Initial rotation state of the piece: [0, 1, 2, 3]
+            to_state (int): Desired rotation state of the piece: [0, 1, 2, 3]
+        
+        returns:
+            kicks (tuple): The (x, y) kick translations to try in order
+        """
+        return self.kicks[PIECE_CLASSES[piece_type]][from_state][to_state]
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from utils import get_tetromino_blocks
+
+@dataclass(frozen = True)
+class PieceShape():
+    """
+    The geometry of a tetromino in a single rotation state, relative to the top left of its bounding box
+
+    args:
+        type (str): Type of the piece: ['T', 'S', 'Z', 'L', 'J', 'I', 'O']
+        state (int): Rotation state of the piece: [0, 1, 2, 3]
+        value (int): The colour code of the piece blocks
+        size (int): The width and height of the bounding box of the piece
+        blocks (tuple): The rotated piece blocks
+        cells (tuple): The (dx, dy) offsets of the occupied cells
+        row_masks (tuple): The (dy, mask) pairs of the occupied rows, bit 0 of a mask is column min_x
+        bottom (tuple): The (dx, dy) offsets of the lowest occupied cell in each occupied column
+        min_x (int): The smallest dx of the occupied cells
+        max_x (int): The largest dx of the occupied cells
+        min_y (int): The smallest dy of the occupied cells
+        max_y (int): The largest dy of the occupied cells
+    """
+    type: str
+    state: int
+    value: int
+    size: int
+    blocks: tuple
+    cells: tuple
+    row_masks: tuple
+    bottom: tuple
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+
+def rotate_blocks_cw(blocks:tuple):
+    """
+    Rotate the piece blocks clockwise
+
+    args:
+        blocks (tuple): The piece blocks
+    """
+    return tuple(tuple(reversed(col)) for col in zip(*blocks))
+
+def build_piece_shape(type:str, state:int, blocks:tuple):
+    """
+    Precompute the occupied cells, row bitmasks and extents of a piece in a rotation state
+
+    args:
+        type (str): Type of the piece
+        state (int): Rotation state of the piece
+        blocks (tuple): The piece blocks rotated into the given state
+    """
+    cells = tuple((x, y) for y, row in enumerate(blocks) for x, val in enumerate(row) if val != 0)
+
+    min_x = min(x for x, _ in cells)
+    max_x = max(x for x, _ in cells)
+    min_y = min(y for _, y in cells)
+    max_y = max(y for _, y in cells)
+
+    row_masks = tuple(
+        (y, sum(1 << (x - min_x) for x, cell_y in cells if cell_y == y))
+        for y in range(min_y, max_y + 1)
+    )
+
+    bottom = tuple(
+        (x, max(y for cell_x, y in cells if cell_x == x))
+        for x in sorted({x for x, _ in cells})
+    )
+
+    return PieceShape(
+        type = type,
+        state = state,
+        value = blocks[cells[0][1]][cells[0][0]],
+        size = len(blocks),
+        blocks = blocks,
+        cells = cells,
+        row_masks = row_masks,
+        bottom = bottom,
+        min_x = min_x,
+        max_x = max_x,
+        min_y = min_y,
+        max_y = max_y,
+    )
+
+def build_piece_table():
+    """
+    Build the shapes of every piece in every rotation state, indexed as table[type][state]
+    """
+    table = {}
+
+    for type in ['T', 'S', 'Z', 'L', 'J', 'O', 'I']:
+        blocks = tuple(tuple(row) for row in get_tetromino_blocks(type))
+        table[type] = []
+
+        for state in range(4):
+            table[type].append(build_piece_shape(type, state, blocks))
+            blocks = rotate_blocks_cw(blocks)
+
+        table[type] = tuple(table[type])
+
+    return table
+
+PIECE_TABLE = build_piece_table()
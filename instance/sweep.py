@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import asdict
+from instance.action import Action
+from instance.engine import Engine, Event
+from core.state.struct_engine_config import StructEngineConfig
+from core.state.struct_game_summary import StructGameSummary
+
+class RandomPolicy():
+    def __init__(self, action_rate:float = 0.5, weights:dict = None):
+        """
+        Input policy that performs a random action on some ticks
+
+        A policy is reset with the seed of each game and then called once per tick with the engine, returning the
+        actions to perform on that tick. Policies are pickled to the worker processes, so they must be defined at
+        the top level of a module. The repr of a policy is part of the run key of a sweep, so it should show every
+        setting of the policy.
+
+        args:
+            action_rate (float): The chance of performing an action on a tick
+            weights (dict): The relative weight of each Action, defaults to equal weights
+
+        methods:
+            reset(seed): Prepare the policy for a new game
+        """
+        self.action_rate = action_rate
+        self.actions = list(weights.keys()) if weights else list(Action)
+        self.weights = list(weights.values()) if weights else None
+        self.rng = random.Random(0)
+
+    def __repr__(self):
+        weights = dict(zip(self.actions, self.weights)) if self.weights else None
+        return f"RandomPolicy(action_rate = {self.action_rate!r}, weights = {weights!r})"
+
+    def reset(self, seed:int):
+        self.rng = random.Random(seed)
+
+    def __call__(self, engine:Engine):
+        if self.rng.random() < self.action_rate:
+            return self.rng.choices(self.actions, self.weights)
+        return []
+
+def run_game(seed:int, rotation_system:str = 'SRS', policy = None, config:StructEngineConfig = None, max_ticks:int = 100_000):
+    """
+    Play a single game on the engine until it is over or reaches the tick limit
+
+    args:
+        seed (int): The seed of the game
+        rotation_system (str): The rotation system to use
+        policy (callable): The input policy, the game is played with no input if not given
+        config (StructEngineConfig): The game configuration
+        max_ticks (int): The maximum number of ticks to run the game for
+
+    returns:
+        summary (StructGameSummary): The summary of the game
+    """
+    start = time.perf_counter()
+    engine = Engine(seed, config, rotation_system)
+    summary = StructGameSummary(seed = seed, rotation_system = rotation_system)
+
+    if policy is not None:
+        policy.reset(seed)
+
+    while engine.tick < max_ticks and not engine.FlagStruct.GAME_OVER:
+        events = engine.step(policy(engine) if policy is not None else ())
+
+        if Event.LOCK in events:
+            summary.pieces += 1
+
+        summary.lines += len(engine.cleared_lines)
+
+    summary.ticks = engine.tick
+    summary.game_over = engine.FlagStruct.GAME_OVER
+    summary.digest = engine.GameInstanceStruct.matrix.digest().hex()
+    summary.wall_time = time.perf_counter() - start
+
+    return summary
+
+def run_chunk(seeds:list, rotation_system:str, policy, config:StructEngineConfig, max_ticks:int):
+    """
+    Play a chunk of games in a worker process, closing the policy afterwards if it has a close() method, as each
+    chunk gets its own copy of the policy
+
+    args:
+        seeds (list): The seeds of the games to play
+        rotation_system (str): The rotation system to use
+        policy (callable): The input policy
+        config (StructEngineConfig): The game configuration
+        max_ticks (int): The maximum number of ticks to run each game for
+
+    returns:
+        summaries (list): The summary of each game as a dict
+    """
+    try:
+        return [asdict(run_game(seed, rotation_system, policy, config, max_ticks)) for seed in seeds]
+    finally:
+        if hasattr(policy, 'close'):
+            policy.close()
+
+class SweepRunner():
+    def __init__(self, rotation_system:str = 'SRS', policy = None, config:StructEngineConfig = None, workers:int = None, chunk_size:int = 64, max_pending:int = None, max_ticks:int = 100_000, results_path:str = None):
+        """
+        Play games over many seeds in parallel on a process pool, one worker per core by default
+
+        Seeds are sent to the workers in chunks and at most max_pending chunks are in flight at once, so a large sweep
+        does not queue every seed up front. Each summary is appended to the results file as a JSON line as soon as its
+        chunk finishes, and seeds that already have a result in the file are skipped, so an interrupted sweep can be
+        resumed by running it again with the same results file.
+
+        Each result is written with the run key of the sweep, a hash of the rotation system, the policy repr, the tick
+        limit and the configuration. Only results with the same run key count as done, so a sweep with different
+        settings plays every seed again rather than resuming from results it would not have produced.
+
+        args:
+            rotation_system (str): The rotation system to use
+            policy (callable): The input policy, see RandomPolicy
+            config (StructEngineConfig): The game configuration, each game uses its own seed instead of config.SEED
+            workers (int): The number of worker processes, defaults to the number of cores
+            chunk_size (int): The number of seeds sent to a worker at once
+            max_pending (int): The maximum number of chunks in flight, defaults to twice the number of workers
+            max_ticks (int): The maximum number of ticks to run each game for
+            results_path (str): The JSON lines file to write results to and resume from
+
+        methods:
+            run(seeds): Play a game for each seed, yielding the summaries as they complete
+            run_key(): Get the hash of the settings of the sweep
+        """
+        self.rotation_system = rotation_system
+        self.policy = policy
+        self.config = config if config is not None else StructEngineConfig()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or self.workers * 2
+        self.max_ticks = max_ticks
+        self.results_path = results_path
+
+    def run_key(self):
+        """
+        Get the hash of the settings of the sweep that results are written with and resumed from
+        """
+        settings = {
+            'rotation_system': self.rotation_system,
+            'policy': repr(self.policy),
+            'max_ticks': self.max_ticks,
+            'config': asdict(self.config),
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys = True, default = repr).encode()).hexdigest()[:16]
+
+    def __completed_seeds(self):
+        """
+        Get the seeds that already have a result in the results file from a sweep with the same run key
+        """
+        completed = set()
+        run_key = self.run_key()
+
+        if self.results_path is None or not os.path.exists(self.results_path):
+            return completed
+
+        with open(self.results_path) as file:
+            for line in file:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError: # the last line may be cut short if the sweep was interrupted
+                    continue
+
+                if result.get('run_key') == run_key:
+                    completed.add(result['seed'])
+
+        return completed
+
+    def __chunks(self, seeds):
+        """
+        Split the seeds that have not been completed into chunks
+        """
+        completed = self.__completed_seeds()
+        chunk = []
+
+        for seed in seeds:
+            if seed in completed:
+                continue
+
+            chunk.append(seed)
+
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def run(self, seeds):
+        """
+        Play a game for each seed, yielding the summaries as they complete (not in seed order)
+
+        args:
+            seeds (iterable): The seeds to play
+
+        returns:
+            (generator): StructGameSummary for each game that was played
+        """
+        results_file = open(self.results_path, 'a+') if self.results_path is not None else None
+        
+        if results_file is not None and results_file.tell() > 0: # finish a line that was cut short by an interruption
+            results_file.seek(results_file.tell() - 1)
+            
+            if results_file.read(1) != '\n':
+                results_file.write('\n')
+        chunks = self.__chunks(seeds)
+        run_key = self.run_key()
+        pending = set()
+
+        try:
+            with ProcessPoolExecutor(max_workers = self.workers) as executor:
+                while True:
+                    while len(pending) < self.max_pending:
+                        chunk = next(chunks, None)
+
+                        if chunk is None:
+                            break
+
+                        pending.add(executor.submit(run_chunk, chunk, self.rotation_system, self.policy, self.config, self.max_ticks))
+
+                    if not pending:
+                        break
+
+                    done, pending = wait(pending, return_when = FIRST_COMPLETED)
+
+                    for future in done:
+                        for result in future.result():
+                            result['run_key'] = run_key
+
+                            if results_file is not None:
+                                results_file.write(json.dumps(result) + '\n')
+
+                            yield StructGameSummary(**result)
+
+                        if results_file is not None:
+                            results_file.flush()
+        finally:
+            if results_file is not None:
+                results_file.close()
+
+def parse_seeds(seeds:str):
+    """
+    Parse a seed range given as start:stop or a comma separated list of seeds
+    """
+    if ':' in seeds:
+        start, stop = seeds.split(':')
+        return range(int(start), int(stop))
+
+    return [int(seed) for seed in seeds.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Play a sweep of seeded games in parallel')
+    parser.add_argument('--seeds', type = parse_seeds, default = range(0, 1000), help = 'start:stop or a comma separated list')
+    parser.add_argument('--rotation-system', default = 'SRS')
+    parser.add_argument('--workers', type = int, default = None)
+    parser.add_argument('--chunk-size', type = int, default = 64)
+    parser.add_argument('--max-ticks', type = int, default = 100_000)
+    parser.add_argument('--action-rate', type = float, default = 0.5)
+    parser.add_argument('--out', default = 'sweep.jsonl', help = 'results file, an existing file is resumed')
+    args = parser.parse_args()
+
+    runner = SweepRunner(args.rotation_system, RandomPolicy(args.action_rate), workers = args.workers, chunk_size = args.chunk_size, max_ticks = args.max_ticks, results_path = args.out)
+
+    start = time.perf_counter()
+    games = pieces = lines = 0
+
+    for summary in runner.run(args.seeds):
+        games += 1
+        pieces += summary.pieces
+        lines += summary.lines
+
+    print(f"{games} games, {pieces} pieces, {lines} lines in {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,16 @@
-from utils import Vec2, get_tetromino_blocks
+from utils import Vec2
 from instance.matrix import Matrix
-from core.handling import Action
+from instance.shape import PieceShape, PIECE_TABLE
+from instance.rotation import PIECE_CLASSES
+from instance.action import Action
+
+T_CORNERS = ((0, 0), (2, 0), (0, 2), (2, 2)) # corners of the T piece bounding box
+T_CORNER_PAIRS = ( # the corners the T piece faces in each rotation state
+    ((0, 0), (2, 0)),
+    ((2, 0), (2, 2)),
+    ((2, 2), (0, 2)),
+    ((0, 2), (0, 0)),
+)
 
 class Tetromino():
     def __init__(self, type:str, state:int, x:int, y:int, matrix:Matrix):
@@ -19,24 +29,26 @@ class Tetromino():
         
         self.type = type
         self.state = state
-        self.blocks = get_tetromino_blocks(self.type)
+        self.shape = PIECE_TABLE[self.type][self.state] # default state is 0, but this is allows for pre-rotation
         self.position = self.__get_origin(x, y)
         self.pivot = self.__get_pivot()
         
-        self.ghost_position = Vec2(self.position.x, self.position.y)
+        self.ghost_position = self.position
         self.matrix = matrix
         
+        self.__drop_key = None # the board version and piece pose the cached drop distance was found for
+        self.__drop_distance = 0
+        
         self.lowest_pivot_position = self.matrix.HEIGHT - (self.pivot.y + self.position.y)
         self.lock_delay_counter = 0
         self.max_moves_before_lock = 15
-        
-        # default state is 0, but this is allows for pre-rotation
-        if self.state == 1:
-            self.blocks = self.__rotate_cw()
-        elif self.state == 2:
-            self.blocks = self.__rotate_180()
-        elif self.state == 3:
-            self.blocks = self.__rotate_ccw()
+    
+    @property
+    def blocks(self):
+        """
+        The blocks of the piece in its current rotation state
+        """
+        return self.shape.blocks
     
     def __get_origin(self, x:int, y:int):
         """
@@ -65,33 +77,27 @@ class Tetromino():
         """
         Get the geometric center of the piece
         """
-        return Vec2(len(self.blocks) / 2, len(self.blocks) / 2)
+        return Vec2(self.shape.size / 2, self.shape.size / 2)
             
-    def rotate(self, action:Action, kick_table:dict):
+    def rotate(self, action:Action, kicks:tuple):
         """
         Rotate the piece in the given direction
         
         args:
             action (Action): The action to perform
-            kick_table (dict): The kick table to use for the piece
+            kicks (tuple): The compiled kicks of the rotation system, kicks[piece_class][from_state][to_state]
         """
-        
-        kick_table = self.__get_piece_kick_table(kick_table)
-            
         match action:
             case Action.ROTATE_CLOCKWISE:    
                 desired_state = (self.state + 1) % 4
-                rotated_piece = self.__rotate_cw()
         
             case Action.ROTATE_COUNTERCLOCKWISE:
                 desired_state = (self.state - 1) % 4
-                rotated_piece = self.__rotate_ccw()
 
             case Action.ROTATE_180:
                 desired_state = (self.state + 2) % 4
-                rotated_piece = self.__rotate_180()
         
-        self.__do_kick_tests(rotated_piece, desired_state, kick_table, offset = 0)
+        self.__do_kick_tests(PIECE_TABLE[self.type][desired_state], desired_state, kicks[PIECE_CLASSES[self.type]][self.state][desired_state])
         
     def move(self, action:Action):
         """
@@ -102,20 +108,21 @@ class Tetromino():
         """
         match action:
             case Action.MOVE_LEFT:
-                vector = Vec2(-1, 0)
+                dx = -1
             
             case Action.MOVE_RIGHT:
-                vector = Vec2(1, 0)
+                dx = 1
     
             case _:
-                vector = Vec2(0, 0)
                 raise ValueError(f"\033[31mInvalid movement action provided!: {action} \033[31m\033[0m")
+        
+        x, y = self.position
             
-        if self.collision(self.blocks, vector + self.position): # validate movement
+        if self.matrix.collides(self.shape, x + dx, y): # validate movement
             return
 
         self.__reset_lock_delay_valid_movement()
-        self.position += vector
+        self.position = Vec2(x + dx, y)
        
     def sonic_move(self, action:Action):
         """
@@ -126,17 +133,19 @@ class Tetromino():
         """
         match action:
             case Action.SONIC_LEFT:
-                vector = Vec2(-1, 0)
+                dx = -1
             
             case Action.SONIC_RIGHT:
-                vector = Vec2(1, 0)
+                dx = 1
     
             case _:
-                vector = Vec2(0, 0)
                 raise ValueError(f"\033[31mInvalid movement action provided!: {action} \033[31m\033[0m")
         
-        while not self.collision(self.blocks, vector + self.position):    
-            self.position += vector
+        x, y = self.position
+        
+        while not self.matrix.collides(self.shape, x + dx, y):    
+            x += dx
+            self.position = Vec2(x, y)
             self.__reset_lock_delay_valid_movement()
         
     def sonic_move_and_drop(self, action:Action, PrefSD:bool):
@@ -152,160 +161,99 @@ class Tetromino():
         """
         match action:
             case Action.SONIC_LEFT_DROP:
-                horizontal_vector = Vec2(-1, 0)
+                dx = -1
             case Action.SONIC_RIGHT_DROP:
-                horizontal_vector = Vec2(1, 0)
+                dx = 1
             case _:
                 raise ValueError(f"\033[31mInvalid movement action provided!: {action} \033[31m\033[0m")
 
+        x, y = self.position
+        
         if PrefSD:
-            if not self.collision(self.blocks, self.position + Vec2(0, 1)):
-                self.position += Vec2(0, 1)
+            if not self.is_on_floor():
+                self.move_to_floor()
                 self.sonic_move_and_drop(action, PrefSD)
             else:
-                if not self.collision(self.blocks, self.position + horizontal_vector):
+                if not self.matrix.collides(self.shape, x + dx, y):
                     self.__reset_lock_delay_valid_movement()
-                    self.position += horizontal_vector
+                    self.position = Vec2(x + dx, y)
                     self.sonic_move_and_drop(action, PrefSD)
                 else:
                     return
         else:
-            if not self.collision(self.blocks, self.position + horizontal_vector): 
+            if not self.matrix.collides(self.shape, x + dx, y): 
                 self.__reset_lock_delay_valid_movement()
-                self.position += horizontal_vector
+                self.position = Vec2(x + dx, y)
                 self.sonic_move_and_drop(action, PrefSD) 
             else:
-                if not self.collision(self.blocks, self.position + Vec2(0, 1)):
-                    self.position += Vec2(0, 1)
+                if not self.is_on_floor():
+                    self.position = Vec2(x, y + 1)
                     self.sonic_move_and_drop(action, PrefSD) 
                 else:
                     return
                 
-    def collision(self, desired_piece_blocks:list, desired_position:Vec2):
+    def collision(self, desired_shape:PieceShape, desired_position:Vec2):
         """
         Check if the piece at the desired position will collide with the matrix bounds or other blocks
         
         args:
-            desired_piece_blocks (list): The blocks of the piece at the desired position
-            desired_position (Vec2): The desired position of the piece
-            matrix (Matrix): The matrix object that contains the blocks that are already placed
+            desired_shape (PieceShape): The shape of the piece at the desired position
+            desired_position (Vec2): The desired position of the piece, or a plain (x, y) pair
         
         returns
             (bool): True if the piece will collide, False otherwise
         """
-        if any (
-            val != 0 and (
-                desired_position.x + x < 0 or desired_position.x + x >= self.matrix.WIDTH or 
-                desired_position.y + y <= 0 or desired_position.y + y >= self.matrix.HEIGHT or 
-                self.matrix.matrix[desired_position.y + y][desired_position.x + x] != 0
-            )
-            for y, row in enumerate(desired_piece_blocks)
-            for x, val in enumerate(row)
-        ):
-            return True         
-        else:
-            return False
-        
-    def __rotate_cw(self):
-        """
-        Rotate the piece clockwise
-        """
-        return [list(reversed(col)) for col in zip(*self.blocks)]
+        x, y = desired_position
+        return self.matrix.collides(desired_shape, x, y)
     
-    def __rotate_ccw(self):
+    def __do_kick_tests(self, rotated_shape:PieceShape, desired_state:int, kicks:tuple):
         """
-        Rotate the piece counter clockwise
-        """
-        return [list(col) for col in reversed(list(zip(*self.blocks)))]
-    
-    def __rotate_180(self):
-        """
-        Rotate the piece 180 degrees
-        """
-        return [row[::-1] for row in reversed(self.blocks)]
-    
-    def __get_piece_kick_table(self, kick_table):
-        match self.type:
-            case 'T' | 'S' | 'Z' | 'L' | 'J':
-                kick_table = kick_table['TSZLJ_KICKS']
-                
-            case 'I':
-                kick_table = kick_table['I_KICKS']
-                
-            case 'O':
-                kick_table = kick_table['O_KICKS']
-                
-        return kick_table
-               
-    def __do_kick_tests(self, rotated_piece:list, desired_state:int, kick_table, offset:int):
-        """
-        Find a valid rotation of the piece by recursively applying kick translations to it
-        until a valid rotation is found or no more offsets are available (rotation is invalid).
+        Find a valid rotation of the piece by applying each kick translation in order
+        until a valid rotation is found or no more kicks are available (rotation is invalid).
         
         args:
-            rotated_piece (list): The rotated piece
+            rotated_shape (PieceShape): The shape of the rotated piece
             desired_state (int): Desired rotation state of the piece [0, 1, 2, 3]
-            kick_table (dict): The kick table containing the kicks to apply to the piece for the given rotation type
-            offset (int): The kick translation to try from the kick table
-            
-        returns:
-            (None): if the rotation is invalid
+            kicks (tuple): The (x, y) kick translations to try, with y already inverted for the matrix
         """
-        kick = self.__get_kick(kick_table, desired_state, offset)
+        x = self.position.x
+        y = self.position.y
         
-        if kick is None: # no more offsets to try => rotation is invalid
-            return
-
-        kick = Vec2(kick.x, -kick.y) # have to invert y as top left of the matrix is (0, 0)
-         
-        if self.collision(rotated_piece, self.position + kick): 
-            self.__do_kick_tests(rotated_piece, desired_state, kick_table, offset + 1) 
-        else:
+        for offset, (kick_x, kick_y) in enumerate(kicks):
+            if self.matrix.collides(rotated_shape, x + kick_x, y + kick_y):
+                continue
+            
             if self.type == 'T':
-                self.__Is_T_Spin(offset, desired_state, kick)
+                self.__Is_T_Spin(offset, desired_state, kick_x, kick_y)
                 
             else: # all other pieces use immobility test for spin detection
-                self.__is_spin(rotated_piece, kick)
+                self.__is_spin(rotated_shape, kick_x, kick_y)
             
             self.__reset_lock_delay_valid_movement() 
             self.state = desired_state
-            self.blocks = rotated_piece
-            self.position += kick
-              
-    def __get_kick(self, kick_table, desired_state:int, offset:int):
-        """
-        Get the kick translation to apply to the piece for the given offset_order
-     
-        args:
-            kick_table (dict): The kick table containing the kicks to apply to the piece for the given rotation type
-            initial_state (int): Initial rotation state of the piece: [0, 1, 2, 3]
-            desired_state (int): Desired rotation state of the piece: [0, 1, 2, 3]
-            offset (int): The kick translation to try from the kick table
-        
-        returns:
-            kick (Vec2): The kick translation to apply to the piece
-        """
-        
-        if offset > len(kick_table[f'{self.state}->{desired_state}']) - 1:
-            return None
-        else:
-            return kick_table[f'{self.state}->{desired_state}'][offset]
+            self.shape = rotated_shape
+            self.position = Vec2(x + kick_x, y + kick_y)
+            return
         
-    def __is_spin(self, rotated_piece:int, kick:Vec2):
+    def __is_spin(self, rotated_shape:PieceShape, kick_x:int, kick_y:int):
         """
         check if the rotation is a spin: this is when the piece rotates into an position where it is then immobile
         
         args:
-            rotated_piece (list): The rotated piece
-            kick (Vec2): The kick translation to apply
+            rotated_shape (PieceShape): The shape of the rotated piece
+            kick_x (int): The x component of the kick translation to apply
+            kick_y (int): The y component of the kick translation to apply
             
         returns:
             (bool): True if the piece is immobile, False otherwise
         """
-        if self.collision(rotated_piece, self.position + kick + Vec2(1, 0)) and self.collision(rotated_piece, self.position + kick + Vec2(-1, 0)) and self.collision(rotated_piece, self.position + kick+ Vec2(0, 1)) and self.collision(rotated_piece, self.position + kick + Vec2(0, -1)):
+        x = self.position.x + kick_x
+        y = self.position.y + kick_y
+        
+        if self.matrix.collides(rotated_shape, x + 1, y) and self.matrix.collides(rotated_shape, x - 1, y) and self.matrix.collides(rotated_shape, x, y + 1) and self.matrix.collides(rotated_shape, x, y - 1):
             return True
             
-    def __Is_T_Spin(self, offset:int, desired_state:int, kick:Vec2):
+    def __Is_T_Spin(self, offset:int, desired_state:int, kick_x:int, kick_y:int):
         """
         Test if the T piece rotation is a T-spin.
         
@@ -324,23 +272,19 @@ class Tetromino():
         args:
             offset (int): The kick translation to try from the kick table
             desired_state (int): Desired rotation state of the piece [0, 1, 2, 3]
-            kick (Vec2): The kick translation to apply  
+            kick_x (int): The x component of the kick translation to apply
+            kick_y (int): The y component of the kick translation to apply
         """
-        corner_pairs = {
-            0: [Vec2(0, 0), Vec2(2, 0)],
-            1: [Vec2(2, 0), Vec2(2, 2)],
-            2: [Vec2(2, 2), Vec2(0, 2)],
-            3: [Vec2(0, 2), Vec2(0, 0)]
-        }
+        corner_pairs = T_CORNER_PAIRS
         
         def set_t_sin_flag(flag):
             pass
             
-        filled_corners = self.__test_corners(corner_pairs[desired_state], kick) # do facing test
+        filled_corners = self.__test_corners(corner_pairs[desired_state], kick_x, kick_y) # do facing test
             
         if len(filled_corners) == 1: # 1 corner test for T-Spin Mini
     
-            filled_corners = self.__test_corners(corner_pairs[(desired_state + 2) % 4], kick) # do back corner test
+            filled_corners = self.__test_corners(corner_pairs[(desired_state + 2) % 4], kick_x, kick_y) # do back corner test
             
             if len(filled_corners) > 1:
                 
@@ -351,73 +295,106 @@ class Tetromino():
             
         elif len(filled_corners) == 2: # 2 corner test for T-Spin
         
-            corners = [Vec2(0, 0), Vec2(2, 0), Vec2(0, 2), Vec2(2, 2)]
-            filled_corners = self.__test_corners(corners, kick)
+            filled_corners = self.__test_corners(T_CORNERS, kick_x, kick_y)
             
             if len(filled_corners) >= 3: # 3 corner test for T-Spin
                 set_t_sin_flag("T-Spin")
         else:
             set_t_sin_flag(None)
         
-    def __test_corners(self, corners:list, kick:Vec2):
+    def __test_corners(self, corners:list, kick_x:int, kick_y:int):
         """
         Test if the corners of the pieces bounding box are occupied
         
         args:
-            corners (list): The corners of the piece bounding box
-            kick (Vec2): The kick translation to apply
+            corners (tuple): The (x, y) corners of the piece bounding box
+            kick_x (int): The x component of the kick translation to apply
+            kick_y (int): The y component of the kick translation to apply
         
         returns:
             filled_corners (list): The corners that are occupied
         """
+        x = self.position.x + kick_x
+        y = self.position.y + kick_y
+        
         return [
-            corner for _, corner in enumerate(corners)
-            if (
-                (corner_pos := self.position + kick + corner).x < 0 or 
-                corner_pos.x >= self.matrix.WIDTH or 
-                corner_pos.y < 0 or 
-                corner_pos.y >= self.matrix.HEIGHT or 
-                self.matrix.matrix[corner_pos.y][corner_pos.x] != 0
-            )
+            (corner_x, corner_y) for corner_x, corner_y in corners
+            if self.matrix.is_occupied(x + corner_x, y + corner_y)
         ]
      
     def attempt_to_move_downwards(self):
         """
         Attempt to move the piece downwards
         """
-        if self.collision(self.blocks, self.position + Vec2(0, 1)):
+        if self.is_on_floor():
             return
         else:
-            self.position = self.position + Vec2(0, 1)
+            x, y = self.position
+            self.position = Vec2(x, y + 1)
+    
+    def move_to_floor(self):
+        """
+        Move the piece straight down until it lands
+        """
+        distance = self.drop_distance()
+        
+        if distance > 0:
+            self.position = Vec2(self.position[0], self.position[1] + distance)
+    
+    def drop_distance(self):
+        """
+        Get the number of rows the piece can fall before it lands.
+        The distance is cached until either the placed blocks or the pose of the piece change.
+        
+        returns:
+            distance (int): The number of rows the piece can fall
+        """
+        key = (self.matrix.version, self.shape, self.position)
+        
+        if key != self.__drop_key:
+            x, y = self.position
+            
+            if self.matrix.collides(self.shape, x, y):
+                self.__drop_distance = 0
+            else:
+                self.__drop_distance = self.matrix.drop_distance(self.shape, x, y)
+            self.__drop_key = key
+            
+        return self.__drop_distance
     
     def is_on_floor(self):
         """
         Check if the piece is on the floor
         """
-        return self.collision(self.blocks, self.position + Vec2(0, 1))
+        x, y = self.position
+        
+        if self.matrix.collides(self.shape, x, y):
+            return self.matrix.collides(self.shape, x, y + 1)
+        
+        return self.drop_distance() == 0
                   
     def ghost(self):
         """
         Create a ghost piece that shows where the piece will land
         """
-        self.ghost_position = Vec2(self.position.x, self.position.y)
+        x, y = self.position
         
-        while not self.collision(self.blocks, self.ghost_position):
-            self.ghost_position.y += 1
+        if self.matrix.collides(self.shape, x, y):
+            ghost_y = y - 1
+        else:
+            ghost_y = y + self.drop_distance()
             
-        self.ghost_position.y -= 1
-        self.ghost_position.x = self.position.x 
+        self.ghost_position = Vec2(x, ghost_y)
           
-        if not self.collision(self.blocks, self.ghost_position):
-            self.matrix.ghost = self.matrix.empty_matrix()
-            self.matrix.insert_blocks(self.blocks, self.ghost_position, self.matrix.ghost)
+        if not self.matrix.collides(self.shape, x, ghost_y):
+            self.matrix.ghost.set(self.shape, x, ghost_y)
     
     def reset_lock_delay_lower_pivot(self):
         """
         Update the lowest pivot position of the piece and reset the lock delay if it is 
         lower than the previous lowest pivot position
         """
-        pivot_pos_y = self.matrix.HEIGHT - (len(self.blocks) / 2 + self.position.y)
+        pivot_pos_y = self.matrix.HEIGHT - (self.shape.size / 2 + self.position.y)
 
         if pivot_pos_y < self.lowest_pivot_position:
             self.lowest_pivot_position = pivot_pos_y
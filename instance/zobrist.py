@@ -0,0 +1,166 @@
+import random
+from collections import OrderedDict
+from functools import lru_cache
+
+PIECE_TYPES = ('T', 'S', 'Z', 'L', 'J', 'O', 'I')
+ZOBRIST_SEED = 0x5EED_F0F0 # the keys are the same in every process so hashes can be shared between workers
+POSITION_OFFSET = 4
+
+def generate_keys(count:int, rng:random.Random):
+    """
+    Generate random 64 bit keys
+
+    args:
+        count (int): The number of keys
+        rng (random.Random): The random number generator
+    """
+    return tuple(rng.getrandbits(64) for _ in range(count))
+
+def build_keys():
+    """
+    Build the keys of everything but the matrix cells, keyed by piece type
+    """
+    rng = random.Random(ZOBRIST_SEED)
+
+    piece_keys = dict(zip(PIECE_TYPES, generate_keys(len(PIECE_TYPES), rng)))
+    state_keys = {type: generate_keys(4, rng) for type in PIECE_TYPES}
+    hold_keys = dict(zip(PIECE_TYPES, generate_keys(len(PIECE_TYPES), rng)))
+    can_hold_key = rng.getrandbits(64)
+
+    return piece_keys, state_keys, hold_keys, can_hold_key
+
+PIECE_KEYS, STATE_KEYS, HOLD_KEYS, CAN_HOLD_KEY = build_keys()
+
+@lru_cache(maxsize = None)
+def cell_keys(WIDTH:int, HEIGHT:int):
+    """
+    Get the keys of the cells of a matrix, indexed as keys[y][x], shared by every matrix of the same size
+    """
+    rng = random.Random(ZOBRIST_SEED ^ (1 << 40 | WIDTH << 16 | HEIGHT))
+    return tuple(generate_keys(WIDTH, rng) for _ in range(HEIGHT))
+
+@lru_cache(maxsize = None)
+def position_keys(WIDTH:int, HEIGHT:int):
+    """
+    Get the keys of the x and y position of the current piece, indexed as x_keys[x + POSITION_OFFSET] and
+    y_keys[y + POSITION_OFFSET] as a piece can be partly outside of the matrix
+    """
+    rng = random.Random(ZOBRIST_SEED ^ (2 << 40 | WIDTH << 16 | HEIGHT))
+    return generate_keys(WIDTH + 2 * POSITION_OFFSET, rng), generate_keys(HEIGHT + 2 * POSITION_OFFSET, rng)
+
+@lru_cache(maxsize = None)
+def queue_keys(length:int):
+    """
+    Get the keys of the pieces in the queue, indexed as keys[index][type]
+    """
+    rng = random.Random(ZOBRIST_SEED ^ (3 << 40 | length))
+    return tuple(dict(zip(PIECE_TYPES, generate_keys(len(PIECE_TYPES), rng))) for _ in range(length))
+
+def piece_hash(current:str, held:str, can_hold:bool, queue:list, keys:tuple):
+    """
+    Get the Zobrist hash of the pieces in play, not including the pose of the current piece
+
+    args:
+        current (str): The type of the current piece, or None
+        held (str): The type of the hold piece, or None
+        can_hold (bool): Whether the current piece can be held
+        queue (list): The types of the next pieces, only the first len(keys) are hashed
+        keys (tuple): The keys of the queue from queue_keys()
+    """
+    hash = CAN_HOLD_KEY if can_hold else 0
+
+    if current is not None:
+        hash ^= PIECE_KEYS[current]
+
+    if held is not None:
+        hash ^= HOLD_KEYS[held]
+
+    for index_keys, type in zip(keys, queue):
+        hash ^= index_keys[type]
+
+    return hash
+
+class TranspositionTable():
+    def __init__(self, capacity:int = 1 << 20):
+        """
+        A bounded cache of search results keyed by the Zobrist hash of the game state
+
+        When the table is full the least recently used entry is replaced. Each entry stores the depth it was searched
+        to, a result is only returned for a search at least as deep, and a deeper result is not replaced by a
+        shallower one.
+
+        args:
+            capacity (int): The maximum number of entries
+
+        methods:
+            get(key, depth): Get the result stored for a state
+            store(key, value, depth): Store the result of a state
+            clear(): Remove every entry
+        """
+        if capacity < 1:
+            raise ValueError(f"\033[31mInvalid transposition table capacity!: {capacity} \033[31m\033[0m")
+
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key:int):
+        return key in self.entries
+
+    def get(self, key:int, depth:int = 0, default = None):
+        """
+        Get the result stored for a state
+
+        args:
+            key (int): The hash of the state
+            depth (int): The depth of the search the result is needed for
+            default: The value to return if there is no result deep enough
+
+        returns:
+            value: The stored result, or default
+        """
+        entry = self.entries.get(key)
+
+        if entry is None or entry[1] < depth:
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[0]
+
+    def store(self, key:int, value, depth:int = 0):
+        """
+        Store the result of a state, replacing the least recently used entry if the table is full
+
+        args:
+            key (int): The hash of the state
+            value: The result to store
+            depth (int): The depth the state was searched to
+        """
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            if entry[1] <= depth:
+                self.entries[key] = (value, depth)
+
+            self.entries.move_to_end(key)
+            return
+
+        if len(self.entries) >= self.capacity:
+            self.entries.popitem(last = False)
+
+        self.entries[key] = (value, depth)
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
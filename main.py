@@ -1,4 +1,3 @@
-import asyncio
 from core.core import Core
 from instance.four import Four
 
@@ -16,10 +15,10 @@ from instance.four import Four
 
 # redo render code it is a 3 course itallian meal rn
 
-async def main():
+def main():
     game_instance = Core()
     four = Four(game_instance, rotation_system = 'SRS')
-    await game_instance.run(four)
+    game_instance.run(four)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -1,4 +1,4 @@
-from instance.matrix import Matrix
+from instance.matrix import Matrix, Overlay
 import pygame
 from config import StructConfig
 from core.state.struct_render import StructRender
@@ -110,15 +110,42 @@ class Render():
         for i, row in enumerate(matrix):
             for j, value in enumerate(row):
                 if value != 0:
-                    if self.FlagStruct.GAME_OVER:
-                        colour = self.Config.COLOUR_MAP[8]
-                    else:
-                        colour = self.Config.COLOUR_MAP[value]
-                    if transparent:
-                        colour = lerpBlendRGBA(blend_colour, colour, alpha)
-                    pygame.draw.rect(self.four_surface, colour, 
-                                     (matrix_surface_rect.x + j * self.Config.GRID_SIZE, matrix_surface_rect.y + i * self.Config.GRID_SIZE - self.Config.MATRIX_SURFACE_HEIGHT, self.Config.GRID_SIZE, self.Config.GRID_SIZE)
-                                     )
+                    self.__draw_block(j, i, value, matrix_surface_rect, transparent, alpha, blend_colour)
+    
+    def __draw_overlay(self, overlay:Overlay, matrix_surface_rect:pygame.Rect, transparent:bool, alpha:float, blend_colour:tuple = (0, 0, 0)):
+        """
+        Draw the blocks of an overlay piece
+        
+        args:
+            overlay (Overlay): the overlay to draw the blocks from
+            matrix_surface_rect (pygame.Rect): the rectangle that the matrix is drawn in
+            transparent (bool): whether the blocks should be transparent
+            alpha (float): the alpha value of the transparency
+        """
+        for j, i, value in overlay.cells():
+            self.__draw_block(j, i, value, matrix_surface_rect, transparent, alpha, blend_colour)
+    
+    def __draw_block(self, j:int, i:int, value:int, matrix_surface_rect:pygame.Rect, transparent:bool, alpha:float, blend_colour:tuple):
+        """
+        Draw a single block of the matrix
+        
+        args:
+            j (int): the column of the block
+            i (int): the row of the block
+            value (int): the colour code of the block
+            matrix_surface_rect (pygame.Rect): the rectangle that the matrix is drawn in
+            transparent (bool): whether the block should be transparent
+            alpha (float): the alpha value of the transparency
+        """
+        if self.FlagStruct.GAME_OVER:
+            colour = self.Config.COLOUR_MAP[8]
+        else:
+            colour = self.Config.COLOUR_MAP[value]
+        if transparent:
+            colour = lerpBlendRGBA(blend_colour, colour, alpha)
+        pygame.draw.rect(self.four_surface, colour, 
+                         (matrix_surface_rect.x + j * self.Config.GRID_SIZE, matrix_surface_rect.y + i * self.Config.GRID_SIZE - self.Config.MATRIX_SURFACE_HEIGHT, self.Config.GRID_SIZE, self.Config.GRID_SIZE)
+                         )
 
     def __draw_matrix_border(self):
         """
@@ -215,22 +242,21 @@ class Render():
         Draw crosses on the danger matrix
         """
         offset = self.Config.GRID_SIZE // 5
-        for i, row in enumerate(self.GameInstanceStruct.matrix.danger):
-            for j, value in enumerate(row):
-                if value == -1:
-                    start_x = self.Config.MATRIX_SCREEN_CENTER_X + j * self.Config.GRID_SIZE + offset
-                    start_y = self.Config.MATRIX_SCREEN_CENTER_Y + i * self.Config.GRID_SIZE - self.Config.MATRIX_SURFACE_HEIGHT + offset
-                    end_x = self.Config.MATRIX_SCREEN_CENTER_X + (j + 1) * self.Config.GRID_SIZE - offset
-                    end_y = self.Config.MATRIX_SCREEN_CENTER_Y + (i + 1) * self.Config.GRID_SIZE - self.Config.MATRIX_SURFACE_HEIGHT - offset
-                    
-                    pygame.draw.line(self.four_surface, (255, 0, 0), 
-                                    (start_x, start_y), 
-                                    (end_x, end_y), 
-                                    5)
-                    pygame.draw.line(self.four_surface, (255, 0, 0), 
-                                    (end_x, start_y), 
-                                    (start_x, end_y), 
-                                    5)
+        for j, i, value in self.GameInstanceStruct.matrix.danger.cells():
+            if value == -1:
+                start_x = self.Config.MATRIX_SCREEN_CENTER_X + j * self.Config.GRID_SIZE + offset
+                start_y = self.Config.MATRIX_SCREEN_CENTER_Y + i * self.Config.GRID_SIZE - self.Config.MATRIX_SURFACE_HEIGHT + offset
+                end_x = self.Config.MATRIX_SCREEN_CENTER_X + (j + 1) * self.Config.GRID_SIZE - offset
+                end_y = self.Config.MATRIX_SCREEN_CENTER_Y + (i + 1) * self.Config.GRID_SIZE - self.Config.MATRIX_SURFACE_HEIGHT - offset
+                
+                pygame.draw.line(self.four_surface, (255, 0, 0), 
+                                (start_x, start_y), 
+                                (end_x, end_y), 
+                                5)
+                pygame.draw.line(self.four_surface, (255, 0, 0), 
+                                (end_x, start_y), 
+                                (start_x, end_y), 
+                                5)
     
     def __get_border_colour(self):
         """
@@ -250,7 +276,7 @@ class Render():
         """
         matrix_surface_rect = pygame.Rect(self.Config.MATRIX_SCREEN_CENTER_X, self.Config.MATRIX_SCREEN_CENTER_Y, self.Config.MATRIX_SURFACE_WIDTH, self.Config.MATRIX_SURFACE_HEIGHT)
         
-        self.__draw_blocks(self.GameInstanceStruct.matrix.ghost, matrix_surface_rect, transparent = True, alpha = 0.33, blend_colour=(0, 0, 0))
+        self.__draw_overlay(self.GameInstanceStruct.matrix.ghost, matrix_surface_rect, transparent = True, alpha = 0.33, blend_colour=(0, 0, 0))
         self.__draw_grid(matrix_surface_rect)
         self.__draw_blocks(self.GameInstanceStruct.matrix.matrix, matrix_surface_rect, transparent = True, alpha = 1, blend_colour=(0, 0, 0))
         
@@ -261,7 +287,7 @@ class Render():
             piece_alpha = 1
             piece_colour = (255, 255, 255)
 
-        self.__draw_blocks(self.GameInstanceStruct.matrix.piece, matrix_surface_rect, transparent = True, alpha = piece_alpha, blend_colour=piece_colour)
+        self.__draw_overlay(self.GameInstanceStruct.matrix.piece, matrix_surface_rect, transparent = True, alpha = piece_alpha, blend_colour=piece_colour)
         
         if self.FlagStruct.DANGER:
             self.draw_danger_crosses()
@@ -299,7 +325,7 @@ class Render():
         """
         queue_rect = self.__queue_rect()
         pygame.draw.rect(self.four_surface, (0, 0, 0), queue_rect)
-        for idx, tetromino in enumerate(self.GameInstanceStruct.queue.queue):
+        for idx, tetromino in enumerate(self.GameInstanceStruct.queue.preview()):
             
             # split queue_rect into four.queue.length number of rows
             row_height = queue_rect.height // self.GameInstanceStruct.queue.length
@@ -1,6 +1,6 @@
-import pygame
 import os
-import numpy as np
+import math
+from operator import itemgetter
 
 def lerpBlendRGBA(base:tuple, overlay:tuple, alpha:float):
     """
@@ -32,21 +32,25 @@ class Font():
         self.size = size
         self.base_path = os.path.join(os.path.dirname(__file__), 'render/font')
     
+    def __load(self, file:str):
+        """
+        Load a font file at the size, pygame is imported here as only the renderer uses fonts, so the engine can
+        import utils without loading pygame
+        """
+        import pygame
+        return pygame.font.Font(os.path.join(self.base_path, file), self.size)
+    
     def hun2(self):
-        font_path = os.path.join(self.base_path, 'hun2.ttf')
-        return pygame.font.Font(font_path, self.size)
+        return self.__load('hun2.ttf')
     
     def pfw(self):
-        font_path = os.path.join(self.base_path, 'pfw.ttf')
-        return pygame.font.Font(font_path, self.size)
+        return self.__load('pfw.ttf')
     
     def cr(self):
-        font_path = os.path.join(self.base_path, 'cr.ttf')
-        return pygame.font.Font(font_path, self.size)
+        return self.__load('cr.ttf')
     
     def action_ui(self):
-        font_path = os.path.join(self.base_path, 'action-icons.ttf')
-        return pygame.font.Font(font_path, self.size)
+        return self.__load('action-icons.ttf')
 
 def get_prefix(number:float, unit:str, precision:int = 1):
     """
@@ -151,41 +155,69 @@ def get_tetromino_blocks(type:str):
     }
     return blocks[type]
 
-class Vec2():
-    def __init__(self, x, y):
+_new_tuple = tuple.__new__
+
+class Vec2(tuple):
+    __slots__ = ()
+    
+    def __new__(cls, x, y):
         """
-        Construct a 2D vector (x , y)
+        Construct an immutable 2D vector (x , y)
+        
+        Vec2 is a tuple, so it unpacks as x, y = vec and anywhere a Vec2 is accepted a plain (x, y) pair can be used instead.
+        The constant vectors ZERO, UP, DOWN, LEFT and RIGHT are shared and should be used rather than constructing new ones.
+        The arithmetic operators are slower than those of the attribute based class Vec2 replaced, so hot paths should
+        work on the unpacked components and construct the result once.
         
         args:
             x (float): the x component of the vector
             y (float): the y component of the vector
         """
-        self.x = x
-        self.y = y
+        return _new_tuple(cls, (x, y))
+    
+    def __getnewargs__(self):
+        return tuple(self)
+    
+    x = property(itemgetter(0), doc = "the x component of the vector")
+    y = property(itemgetter(1), doc = "the y component of the vector")
     
     def __str__(self):
-        return f"<Vec2 | x={self.x} y={self.y}>" 
+        return f"<Vec2 | x={self[0]} y={self[1]}>" 
     
     def __repr__(self):
-        return f"<Vec2 | x={self.x} y={self.y}>"
+        return f"<Vec2 | x={self[0]} y={self[1]}>"
         
     def __truediv__(self, scalar): 
-        return Vec2(self.x/scalar , self.y/scalar) 
+        return _new_tuple(Vec2, (self[0] / scalar, self[1] / scalar))
     
     def __add__(self, vec): 
-        return Vec2(self.x + vec.x , self.y + vec.y)
+        return _new_tuple(Vec2, (self[0] + vec[0], self[1] + vec[1]))
+    
+    def __radd__(self, vec): # (x, y) + vec, rather than the tuple concatenation
+        return _new_tuple(Vec2, (vec[0] + self[0], vec[1] + self[1]))
     
     def __sub__(self, vec): 
-        return Vec2((self.x - vec.x) , (self.y - vec.y))
+        return _new_tuple(Vec2, (self[0] - vec[0], self[1] - vec[1]))
+    
+    def __rsub__(self, vec):
+        return _new_tuple(Vec2, (vec[0] - self[0], vec[1] - self[1]))
     
     def magnitude(self): 
-        return np.sqrt(self.x**2 + self.y**2)
+        return math.hypot(self[0], self[1])
     
     def normalise(a): 
         return a / a.magnitude()
     
     def __mul__(self, scalar):
-        return Vec2(self.x * scalar, self.y * scalar)
+        return _new_tuple(Vec2, (self[0] * scalar, self[1] * scalar))
+    
+    __rmul__ = __mul__ # scalar * vec, rather than the tuple repetition
     
     def distance(a, b): 
-        return np.sqrt((a.x - b.x)**2 + (a.y - b.y)**2)
\ No newline at end of file
+        return math.hypot(a[0] - b[0], a[1] - b[1])
+
+Vec2.ZERO = Vec2(0, 0)
+Vec2.UP = Vec2(0, -1)
+Vec2.DOWN = Vec2(0, 1)
+Vec2.LEFT = Vec2(-1, 0)
+Vec2.RIGHT = Vec2(1, 0)